@@ -3,43 +3,37 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_socketio import SocketIO
 from flasgger import Swagger
 import os
+import time
 from werkzeug.exceptions import HTTPException
 
 db = SQLAlchemy()
 socketio = SocketIO(async_mode='eventlet')
 
-# ---- Realtime summary broadcaster (module-level) ----
+# The single application instance; trader workers borrow it instead of building their own.
+_app = None
+_summary_broadcaster_started = False
+
+def get_app():
+    """Return the application built by create_app(), creating it on first use."""
+    return _app if _app is not None else create_app()
+
+# ---- Realtime broadcaster (module-level): one delta per subscribed room per interval ----
 def _summary_broadcaster(app):
-    from .models import Trade
-    from .bot_logic import running_bots
+    from .live_updates import live, LIVE_UPDATE_INTERVAL_MS
+    from .utils.metrics import broadcaster_seconds
+    emit = lambda event, payload, room: socketio.emit(event, payload, to=room)
     with app.app_context():
         while True:
+            t0 = time.perf_counter()
             try:
-                running_ids = list(running_bots.keys())
-                for bot_id in running_ids:
-                    trades = Trade.query.filter(Trade.bot_id == bot_id).all()
-                    total = len(trades)
-                    wins = sum(1 for t in trades if (t.pnl or 0) > 0)
-                    losses = sum(1 for t in trades if (t.pnl or 0) < 0)
-                    breakeven = total - wins - losses
-                    profit = sum(max(0.0, (t.pnl or 0.0)) for t in trades)
-                    loss = sum(min(0.0, (t.pnl or 0.0)) for t in trades)
-                    net = profit + loss
-                    socketio.emit('summary_snapshot', {
-                        'bot_id': bot_id,
-                        'total_trades': total,
-                        'win_trades': wins,
-                        'loss_trades': losses,
-                        'breakeven_trades': breakeven,
-                        'total_profit': round(profit, 2),
-                        'total_loss': round(loss, 2),
-                        'net_pnl': round(net, 2),
-                    })
+                live.tick(emit)
             except Exception:
                 pass
-            socketio.sleep(3)
+            broadcaster_seconds.observe(time.perf_counter() - t0)
+            socketio.sleep(LIVE_UPDATE_INTERVAL_MS / 1000)
 
 def create_app():
+    global _app, _summary_broadcaster_started
     app = Flask(__name__, instance_relative_config=True)
 
     try:
@@ -50,31 +44,59 @@ def create_app():
     app.config.setdefault('SECRET_KEY', os.environ.get('SECRET_KEY', 'dev'))
     app.config.setdefault('SQLALCHEMY_DATABASE_URI', os.environ.get('DATABASE_URL', f"sqlite:///{os.path.join(app.instance_path, 'database.db')}"))
     app.config.setdefault('SQLALCHEMY_TRACK_MODIFICATIONS', False)
+    # WAL, synchronous=NORMAL, busy timeout and a larger pool for a SQLite file
+    from .utils.sqlite_tuning import engine_options
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
     app.config.setdefault('SWAGGER', {'title': 'Omlol Bot API', 'uiversion': 3})
 
     db.init_app(app)
     socketio.init_app(app, cors_allowed_origins='*')
+    from . import live_updates  # registers the subscribe/unsubscribe handlers
     Swagger(app)
 
     from .accounts.routes import accounts_bp
     from .bots.routes import bots_bp
     from .trades.routes import trades_bp
     from .web.routes import web_bp
+    from .system.routes import system_bp
 
     app.register_blueprint(accounts_bp, url_prefix='/accounts')
     app.register_blueprint(bots_bp, url_prefix='/')
     app.register_blueprint(trades_bp, url_prefix='/')
     app.register_blueprint(web_bp, url_prefix='/')
+    app.register_blueprint(system_bp, url_prefix='/')
 
     with app.app_context():
         try:
             db.create_all()
         except Exception:
             pass
+        from .migrations import run_migrations
+        run_migrations(db.engine)
+        if _app is None:
+            from .summary_store import store
+            try:
+                store.rebuild()
+            except Exception:
+                pass
+            # warm the symbol catalogs and exchange clocks in use so the first requests need not wait
+            from .models import Account
+            from .utils.exchange_clock import get_clock
+            from .utils.symbol_catalog import get_catalog
+            try:
+                for testnet, simulated in db.session.query(Account.is_testnet, Account.is_simulated).distinct():
+                    get_catalog(bool(testnet), bool(simulated)).refresh_async()
+                    if not simulated:
+                        get_clock(bool(testnet))
+            except Exception:
+                pass
 
-    if not getattr(app, '_summary_broadcaster_started', False):
+    # One broadcaster per process, however many times create_app() is called.
+    if not _summary_broadcaster_started:
         socketio.start_background_task(_summary_broadcaster, app)
-        app._summary_broadcaster_started = True
+        _summary_broadcaster_started = True
+    if _app is None:
+        _app = app
 
     @app.errorhandler(Exception)
     def handle_exception(e):
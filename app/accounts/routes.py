@@ -1,33 +1,22 @@
 from flask import Blueprint, request, jsonify
-from ..models import Account
+from ..models import Account, Bot
 from .. import db
 from binance.client import Client
+from ..utils.symbol_catalog import get_catalog
+from ..utils.position_book import drop_position_book, get_position_book
+from ..utils.binance_helper import close_positions_and_cancel_orders
+from ..utils.client_pool import get_account_client, invalidate_account_client
+from ..utils.balance_cache import balance_cache
+from ..utils.sim_exchange import get_sim_exchange
+from ..user_data import stop_user_stream
+from ..bots.routes import drop_payloads
 
 accounts_bp = Blueprint('accounts', __name__)
 
 # --- Helpers ---
 def _client_for(acc: Account) -> Client:
-    """Return a python-binance Client configured for UM-Futures; supports testnet."""
-    client = Client(acc.api_key, acc.api_secret, testnet=bool(acc.is_testnet))
-    if acc.is_testnet:
-        try:
-            client.FUTURES_URL = 'https://testnet.binancefuture.com/fapi'
-            client.FUTURES_DATA_URL = 'https://testnet.binancefuture.com/futures/data'
-        except Exception:
-            pass
-    return client
-
-def _usdt_futures_balance(client: Client):
-    """Fetch USDT balance for UM-Futures. Returns float or None on failure."""
-    try:
-        balances = client.futures_account_balance()
-        usdt = next((b for b in balances if b.get('asset') == 'USDT'), None)
-        if not usdt:
-            return None
-        val = usdt.get('withdrawAvailable') or usdt.get('balance') or 0
-        return float(val)
-    except Exception:
-        return None
+    """Return the account's pooled python-binance Client for UM-Futures; supports testnet."""
+    return get_account_client(acc)
 
 @accounts_bp.route('/accounts')
 def accounts_root():
@@ -38,6 +27,9 @@ def accounts_root():
 def list_accounts():
     """
     List accounts (with USDT-M Futures balance)
+    Balances are fetched concurrently and cached for a few seconds; an account
+    that does not answer in time is returned with its last known balance and
+    ``balance_stale: true``.
     ---
       tags: [Accounts]
       summary: List accounts with Binance USDT-M Futures balance
@@ -53,20 +45,27 @@ def list_accounts():
                     name: TestDev
                     is_testnet: true
                     balance: 1234.56
+                    balance_age_s: 2.4
+                    balance_stale: false
+                    balance_error: null
     """
-    items = []
-    for acc in Account.query.order_by(Account.id.desc()).all():
-        bal = None
+    accounts = Account.query.order_by(Account.id.desc()).all()
+    clients = {}
+    for acc in accounts:
         try:
-            client = _client_for(acc)
-            bal = _usdt_futures_balance(client)
+            clients[acc.id] = _client_for(acc)
         except Exception:
-            bal = None
+            pass
+    balances = balance_cache.get_many(clients)
+    items = []
+    for acc in accounts:
+        bal = balances.get(acc.id) or {'balance': None, 'balance_age_s': None, 'balance_stale': True, 'balance_error': None}
         items.append({
             'id': acc.id,
             'name': acc.name,
             'is_testnet': bool(acc.is_testnet),
-            'balance': round(bal, 2) if isinstance(bal, (int, float)) else None,
+            'is_simulated': bool(acc.is_simulated),
+            **bal,
         })
     return jsonify({'success': True, 'accounts': items})
 
@@ -89,6 +88,7 @@ def create_account():
                 api_key: {type: string}
                 api_secret: {type: string}
                 is_testnet: {type: boolean}
+                is_simulated: {type: boolean, description: 'trade on the in-process simulated exchange; keys optional'}
       responses:
         200:
           description: Created
@@ -107,20 +107,20 @@ def create_account():
     api_key = (data.get('api_key') or '').strip()
     api_secret = (data.get('api_secret') or '').strip()
     is_testnet = bool(data.get('is_testnet'))
+    is_simulated = bool(data.get('is_simulated'))
 
-    if not name or not api_key or not api_secret:
+    if not name or (not is_simulated and (not api_key or not api_secret)):
         return jsonify({'success': False, 'message': 'name, api_key and api_secret required'}), 400
     if Account.query.filter_by(name=name).first():
         return jsonify({'success': False, 'message': 'account name already exists'}), 409
 
-    acc = Account(name=name, api_key=api_key, api_secret=api_secret, is_testnet=is_testnet)
+    acc = Account(name=name, api_key=api_key, api_secret=api_secret, is_testnet=is_testnet, is_simulated=is_simulated)
     db.session.add(acc)
     db.session.commit()
 
     ok = True
     try:
-        client = _client_for(acc)
-        client.futures_exchange_info()
+        get_catalog(bool(acc.is_testnet), is_simulated).ensure_loaded()
     except Exception:
         ok = False
 
@@ -128,6 +128,7 @@ def create_account():
         'id': acc.id,
         'name': acc.name,
         'is_testnet': acc.is_testnet,
+        'is_simulated': acc.is_simulated,
         'verified': ok
     }})
 
@@ -147,10 +148,54 @@ def delete_account(acc_id):
           description: OK
     """
     acc = Account.query.get_or_404(acc_id)
+    bot_ids = [b.id for b in acc.bots]
     db.session.delete(acc)
     db.session.commit()
+    drop_payloads(*bot_ids)
+    stop_user_stream(acc_id)
+    drop_position_book(acc_id)
+    invalidate_account_client(acc_id)
+    balance_cache.drop(acc_id)
+    if acc.is_simulated:
+        get_sim_exchange().reset_account(acc_id)
     return jsonify({'success': True})
 
+@accounts_bp.route('/api/<int:acc_id>/close-all', methods=['POST'])
+def close_all_bots(acc_id):
+    """
+    Immediate close for every bot of an account
+    ---
+      tags: [Accounts]
+      summary: Cancel orders + market-close positions for all bots on this account
+      description: Symbols shared by several bots are closed once.
+      parameters:
+        - in: path
+          name: acc_id
+          required: true
+          schema: {type: integer}
+      responses:
+        200:
+          description: OK
+          content:
+            application/json:
+              example:
+                success: true
+                bots: [1, 2]
+                result:
+                  closed: [BTCUSDT]
+                  cancelled: [BTCUSDT, ETHUSDT]
+                  errors: {}
+                  latency_ms: {BTCUSDT: 182.4, ETHUSDT: 95.1}
+    """
+    acc = Account.query.get_or_404(acc_id)
+    bots = Bot.query.filter_by(account_id=acc.id).all()
+    symbols = []
+    for b in bots:
+        symbols.extend(b.get_symbols_list())
+    client = _client_for(acc)
+    result = close_positions_and_cancel_orders(client, symbols, get_position_book(acc.id))
+    return jsonify({'success': True, 'bots': [b.id for b in bots], 'result': result})
+
 @accounts_bp.route('/api/<int:acc_id>/balance', methods=['GET'])
 def fetch_balance(acc_id):
     """
@@ -163,6 +208,10 @@ def fetch_balance(acc_id):
           name: acc_id
           required: true
           schema: {type: integer}
+        - in: query
+          name: refresh
+          schema: {type: boolean}
+          description: Ignore the cached balance and ask Binance
       responses:
         200:
           description: OK
@@ -171,8 +220,11 @@ def fetch_balance(acc_id):
               example:
                 success: true
                 balance: 1234.56
+                balance_age_s: 0.3
+                balance_stale: false
+                balance_error: null
     """
     acc = Account.query.get_or_404(acc_id)
-    client = _client_for(acc)
-    bal = _usdt_futures_balance(client)
-    return jsonify({'success': True, 'balance': round(bal, 2) if isinstance(bal, (int, float)) else None})
+    force = request.args.get('refresh') in ('1', 'true')
+    bal = balance_cache.get(acc.id, _client_for(acc), force=force)
+    return jsonify({'success': True, **bal})
@@ -0,0 +1,222 @@
+"""Vectorised backtest of the candle-colour strategy run by ``SymbolTrader``.
+
+At each candle open the trader closes the previous position and opens a new
+one on the side given by the colour of the candle that just closed (inverted
+in ``opposite`` mode, nothing on a doji), sized ``margin_usd * leverage`` at
+that candle's close. Here every trade is one array element: entry at the
+open of the trade candle, exit at its close, taker fees on both legs.
+
+Klines come from ``<SYMBOL>_<interval>.parquet`` or ``.csv`` files (REST
+kline column order, header optional); a missing interval is resampled from
+the ``1m`` file. Results use the key set of ``bots.routes._build_summary``.
+
+    python -m app.backtest data/klines --symbols BTCUSDT ETHUSDT --interval 1m \\
+        --modes follow opposite --leverage 5 10 --margin 10 --fee 0.0004
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .bot_logic import TIMEFRAME_SECONDS
+
+DEFAULT_FEE_RATE = 0.0004  # USDT-M taker
+
+SUMMARY_COUNTS = ['total_trades', 'running_trades', 'loss_trades', 'loss_negative_roi_stoploss',
+                  'loss_negative_roi_candle_close', 'win_trades', 'win_before_r2', 'win_between_r2_r3',
+                  'win_between_r3_r4', 'win_between_r4_r5', 'win_after_r5', 'breakeven_trades']
+# ROI bucket edges of the win_* counters in _build_summary
+WIN_EDGES = (5.0, 15.0, 20.0, 25.0)
+
+# ---- loading ----
+def _read_csv(path: str) -> np.ndarray:
+    with open(path) as fh:
+        first = fh.readline()
+    skip = 0 if first[:1].isdigit() else 1
+    return np.loadtxt(path, delimiter=',', usecols=(0, 1, 2, 3, 4), skiprows=skip, dtype=np.float64, ndmin=2)
+
+def _read_parquet(path: str) -> np.ndarray:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError(f"reading {path} needs pyarrow (pip install pyarrow)")
+    table = pq.read_table(path)
+    cols = table.column_names[:5]
+    return np.column_stack([table.column(c).to_numpy().astype(np.float64) for c in cols])
+
+def _as_klines(raw: np.ndarray) -> Dict[str, np.ndarray]:
+    order = np.argsort(raw[:, 0], kind='stable')
+    raw = raw[order]
+    return {'open_time': raw[:, 0].astype(np.int64), 'open': raw[:, 1], 'high': raw[:, 2],
+            'low': raw[:, 3], 'close': raw[:, 4]}
+
+def resample(k: Dict[str, np.ndarray], interval_ms: int) -> Dict[str, np.ndarray]:
+    """Aggregate finer candles into ``interval_ms`` buckets (first open, max high, min low, last close)."""
+    bucket = k['open_time'] // interval_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)] - 1
+    return {'open_time': bucket[starts] * interval_ms, 'open': k['open'][starts],
+            'high': np.maximum.reduceat(k['high'], starts), 'low': np.minimum.reduceat(k['low'], starts),
+            'close': k['close'][ends]}
+
+def load_klines(directory: str, symbol: str, interval: str) -> Dict[str, np.ndarray]:
+    """Column arrays for one symbol, sorted by open time."""
+    for ext, reader in (('parquet', _read_parquet), ('csv', _read_csv)):
+        path = os.path.join(directory, f"{symbol.upper()}_{interval}.{ext}")
+        if os.path.exists(path):
+            return _as_klines(reader(path))
+    if interval != '1m':
+        return resample(load_klines(directory, symbol, '1m'), TIMEFRAME_SECONDS[interval] * 1000)
+    raise FileNotFoundError(f"no klines for {symbol} {interval} in {directory}")
+
+# ---- simulation ----
+def prepare(k: Dict[str, np.ndarray], interval_ms: int) -> Dict[str, np.ndarray]:
+    """Per-trade arrays that do not depend on the parameter set.
+
+    Trade i is taken on candle i+1 after signal candle i. Dojis and candles
+    not directly followed by the next interval (data gaps) open nothing.
+    """
+    o, c, t = k['open'], k['close'], k['open_time']
+    color = np.sign(c[:-1] - o[:-1])
+    keep = (color != 0) & (np.diff(t) == interval_ms)
+    color = color[keep]
+    entry, exit_ = o[1:][keep], c[1:][keep]
+    per_notional = 100.0 / c[:-1][keep]
+    return {'open_time': t[1:], 'keep': keep, 'color': color, 'entry': entry, 'exit': exit_,
+            'per_notional': per_notional,
+            # price move in the follow direction and fee base, in % of notional:
+            # ROI without quantity rounding is linear in these
+            'move_pct': color * (exit_ - entry) * per_notional,
+            'cost_pct': (entry + exit_) * per_notional}
+
+def _direction(trade_mode: str) -> float:
+    return -1.0 if trade_mode == 'opposite' else 1.0
+
+def simulate(prep: Dict[str, np.ndarray], trade_mode: str, leverage: float, margin_usd: float,
+             fee_rate: float = DEFAULT_FEE_RATE, precision: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """side (+1 long / -1 short), quantity, pnl and roi_percent of every trade."""
+    d = _direction(trade_mode)
+    qty = margin_usd * leverage * prep['per_notional'] / 100.0
+    if precision is not None:
+        qty = np.round(qty, precision)   # as calculate_quantity formats it
+    entry, exit_ = prep['entry'], prep['exit']
+    pnl = qty * (d * prep['color'] * (exit_ - entry) - fee_rate * (entry + exit_))
+    traded = qty > 0
+    return {'side': d * prep['color'][traded], 'qty': qty[traded], 'pnl': pnl[traded],
+            'roi_percent': pnl[traded] / margin_usd * 100.0,
+            'entry_time': prep['open_time'][prep['keep']][traded]}
+
+def roi_percent(prep: Dict[str, np.ndarray], trade_mode: str, leverage: float,
+                fee_rate: float = DEFAULT_FEE_RATE) -> np.ndarray:
+    """ROI of every trade with unrounded quantities (then independent of margin_usd)."""
+    roi = prep['move_pct'] * (_direction(trade_mode) * leverage)
+    roi -= prep['cost_pct'] * (fee_rate * leverage)
+    return roi
+
+def summarise(roi: np.ndarray, margin_usd: float) -> dict:
+    """Same keys and bucket rules as ``_build_summary``; every trade closed at candle close.
+
+    pnl is ``roi * margin_usd / 100`` here, so it always has the sign of roi and
+    the totals reduce to sums of positive and negative roi.
+    """
+    n_win = int(np.count_nonzero(roi > 0))
+    n_loss = int(np.count_nonzero(roi < 0))
+    at_least = [int(np.count_nonzero(roi >= edge)) for edge in WIN_EDGES]
+    summary = dict.fromkeys(SUMMARY_COUNTS, 0)
+    summary.update({
+        'total_trades': int(roi.size),
+        'loss_trades': n_loss,
+        'loss_negative_roi_candle_close': n_loss,
+        'win_trades': n_win,
+        'win_before_r2': n_win - at_least[0],
+        'win_between_r2_r3': at_least[0] - at_least[1],
+        'win_between_r3_r4': at_least[1] - at_least[2],
+        'win_between_r4_r5': at_least[2] - at_least[3],
+        'win_after_r5': at_least[3],
+        'breakeven_trades': int(roi.size) - n_win - n_loss,
+        'profit_total': float(np.maximum(roi, 0).sum()) * margin_usd / 100.0,
+        'loss_total': float(-np.minimum(roi, 0).sum()) * margin_usd / 100.0,
+    })
+    summary['net_result'] = summary['profit_total'] - summary['loss_total']
+    return summary
+
+def merge(a: dict, b: dict) -> dict:
+    out = {k: a[k] + b[k] for k in SUMMARY_COUNTS + ['profit_total', 'loss_total']}
+    out['net_result'] = out['profit_total'] - out['loss_total']
+    return out
+
+def param_grid(modes: Iterable[str], leverages: Iterable[float], margins: Iterable[float],
+               fees: Iterable[float]) -> List[dict]:
+    return [{'trade_mode': m, 'leverage': lev, 'margin_usd': mu, 'fee_rate': fee}
+            for m, lev, mu, fee in itertools.product(modes, leverages, margins, fees)]
+
+def run(klines: Dict[str, Dict[str, np.ndarray]], interval: str, params: List[dict],
+        precision: Optional[Dict[str, int]] = None, per_symbol: bool = False) -> List[dict]:
+    """Backtest every parameter set over every symbol; one result per parameter set."""
+    interval_ms = TIMEFRAME_SECONDS[interval] * 1000
+    results = [{'params': p, 'summary': None, 'symbols': {}} for p in params]
+    for symbol, k in klines.items():
+        prep = prepare(k, interval_ms)
+        for res in results:
+            p = res['params']
+            digits = (precision or {}).get(symbol)
+            if digits is None:
+                roi = roi_percent(prep, p['trade_mode'], p['leverage'], p['fee_rate'])
+            else:
+                roi = simulate(prep, p['trade_mode'], p['leverage'], p['margin_usd'], p['fee_rate'], digits)['roi_percent']
+            s = summarise(roi, p['margin_usd'])
+            res['summary'] = s if res['summary'] is None else merge(res['summary'], s)
+            if per_symbol:
+                res['symbols'][symbol] = s
+    for res in results:
+        if res['summary'] is None:
+            res['summary'] = summarise(np.empty(0), res['params']['margin_usd'])
+        if not per_symbol:
+            del res['symbols']
+    return results
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    ap.add_argument('directory', help='folder with <SYMBOL>_<interval>.csv/.parquet files')
+    ap.add_argument('--symbols', nargs='*', help='default: every symbol with a file for the interval (or 1m)')
+    ap.add_argument('--interval', default='1m', choices=sorted(TIMEFRAME_SECONDS, key=TIMEFRAME_SECONDS.get))
+    ap.add_argument('--modes', nargs='+', default=['follow'], choices=['follow', 'opposite'])
+    ap.add_argument('--leverage', nargs='+', type=float, default=[1.0])
+    ap.add_argument('--margin', nargs='+', type=float, default=[10.0], help='margin_usd per trade')
+    ap.add_argument('--fee', nargs='+', type=float, default=[DEFAULT_FEE_RATE], help='fee rate per leg')
+    ap.add_argument('--precision', nargs='*', default=[], metavar='SYMBOL=DIGITS',
+                    help='quantity precision per symbol (unrounded if not given)')
+    ap.add_argument('--per-symbol', action='store_true')
+    ap.add_argument('--out', help='write JSON here instead of stdout')
+    args = ap.parse_args(argv)
+
+    symbols = args.symbols
+    if not symbols:
+        names = [f.rsplit('.', 1)[0] for f in os.listdir(args.directory) if f.endswith(('.csv', '.parquet'))]
+        symbols = sorted({n.rsplit('_', 1)[0] for n in names if n.rsplit('_', 1)[-1] in (args.interval, '1m')})
+    precision = {s.split('=')[0].upper(): int(s.split('=')[1]) for s in args.precision}
+
+    t0 = time.perf_counter()
+    klines = {s.upper(): load_klines(args.directory, s, args.interval) for s in symbols}
+    t1 = time.perf_counter()
+    params = param_grid(args.modes, args.leverage, args.margin, args.fee)
+    results = run(klines, args.interval, params, precision, args.per_symbol)
+    t2 = time.perf_counter()
+
+    candles = sum(len(k['open_time']) for k in klines.values())
+    print(f"{len(klines)} symbols, {candles} candles, {len(params)} parameter sets: "
+          f"load {t1 - t0:.2f}s, backtest {t2 - t1:.2f}s", file=sys.stderr)
+    out = json.dumps({'interval': args.interval, 'results': results}, indent=2)
+    if args.out:
+        with open(args.out, 'w') as fh:
+            fh.write(out)
+    else:
+        print(out)
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,29 @@
 import threading
 import time
 import json
-from . import db, create_app, socketio
+from . import db, get_app, socketio
 from .models import Bot, Account, Trade
+from .utils.symbol_catalog import get_catalog
+from .market_data import get_kline_feed
+from .utils.position_book import get_position_book
+from .utils.client_pool import get_account_client
+from .utils.rate_governor import RateBudgetExceeded
+from .utils.metrics import CycleSpans
+from .utils.execution import FillTimeout, move_to
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
 from datetime import datetime
 
 running_bots = {} 
 
+# How long a trader waits for the closed-candle event before falling back to REST klines.
+KLINE_WAIT_SECONDS = 3.0
+
 def get_symbol_precision(client, symbol):
     try:
-        exchange_info = client.futures_exchange_info()
-        for s in exchange_info['symbols']:
-            if s['symbol'] == symbol:
-                return s['quantityPrecision']
+        info = get_catalog(bool(getattr(client, 'testnet', False)), bool(getattr(client, 'simulated', False))).get(symbol)
+        if info:
+            return info['quantityPrecision']
     except Exception as e:
         print(f"Error getting precision for {symbol}: {e}")
     return 0
@@ -25,69 +34,110 @@ def calculate_quantity(margin_usdt, leverage, price, precision):
     quantity = total_usdt / price
     return f"{quantity:.{precision}f}"
 
-def symbol_trader(bot_id, symbol, stop_event):
-    app = create_app()
-    with app.app_context():
-        bot = Bot.query.get(bot_id)
-        if not bot: return
-
-        print(f"✅ Starting REAL trader for {symbol} under Bot '{bot.name}'")
-        account = bot.account
-        client = Client(account.api_key, account.api_secret, testnet=account.is_testnet)
-        
-        timeframe_map = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '4h': 14400}
-        timeframe_in_seconds = timeframe_map.get(bot.timeframe, 60)
-        
-        try:
-            client.futures_change_leverage(symbol=symbol, leverage=bot.leverage)
-            precision = get_symbol_precision(client, symbol)
-        except Exception as e:
-            print(f"Failed to set leverage for {symbol}: {e}")
-            return
+TIMEFRAME_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '4h': 14400}
+
+class SymbolTrader:
+    """Trading state for one (bot, symbol), driven by the candle scheduler.
+
+    ``setup()`` runs once when the bot starts; ``run_cycle()`` runs at every
+    candle open of the bot's timeframe (see ``app.scheduler``).
+    """
+
+    def __init__(self, bot_id, symbol, stop_event, timeframe='1m', app=None, clock=None):
+        self.bot_id = bot_id
+        self.symbol = symbol
+        self.stop_event = stop_event
+        self.key = (bot_id, symbol)
+        self.timeframe = timeframe
+        self.interval_ms = TIMEFRAME_SECONDS.get(timeframe, 60) * 1000
+        self.clock = clock
+        self.ready = False
+        self.has_position = False
+        self.retry_after = 0.0
+        self.app = app
+        self.client = None
+        self.feed = None
+        self.book = None
+        self.precision = 0
+        self.last_spans = {}
+
+    def priority(self):
+        # Traders holding a position must close it first; fresh entries can wait a burst.
+        return 0 if self.has_position else 1
+
+    def setup(self):
+        # Reuse the running application (engine, session factory, blueprints);
+        # an app context per worker call is all a trader needs.
+        if self.app is None:
+            self.app = get_app()
+        with self.app.app_context():
+            bot = Bot.query.get(self.bot_id)
+            if not bot:
+                self.stop_event.set()
+                return
+
+            print(f"✅ Starting REAL trader for {self.symbol} under Bot '{bot.name}'")
+            account = bot.account
+            self.bot_name = bot.name
+            self.trade_mode = (bot.trade_mode or 'follow').lower()
+            self.leverage = bot.leverage
+            self.margin_usd = bot.margin_usd
+            self.client = get_account_client(account)
+            self.book = get_position_book(account.id)
+            self.feed = get_kline_feed(bool(account.is_testnet), bool(account.is_simulated))
+            self.feed.subscribe(self.symbol, self.timeframe)
 
-        while not stop_event.is_set():
             try:
-                # --- STEP 1: SYNCHRONIZE WITH THE NEXT CANDLE (PRECISION TIMING) ---
-                # This logic is now at the START of the loop.
-                server_time_ms = client.get_server_time()['serverTime']
-                time_to_wait_ms = (timeframe_in_seconds * 1000) - (server_time_ms % (timeframe_in_seconds * 1000))
-                time_to_wait_sec = time_to_wait_ms / 1000
-                
-                print(f"Bot '{bot.name}' ({symbol}): Synchronizing... Waiting for {time_to_wait_sec:.2f} seconds until the next new candle.")
-                
-                # Wait for the calculated duration. If a stop signal comes, exit the loop.
-                if stop_event.wait(time_to_wait_sec):
-                    break
-
-                # --- STEP 2: EXECUTE TRADE CYCLE AT THE EXACT CANDLE OPEN ---
-                # At this point, a new candle has just opened.
-                
-                # First, close any existing position from the previous candle
-                position_amount = 0.0
-                entry_price = 0.0
-                positions = client.futures_position_information(symbol=symbol)
-
-                if positions:
-                    position_amount = float(positions[0]['positionAmt'])
-                    entry_price = float(positions[0]['entryPrice'])
-
-                if position_amount != 0:
-                    close_side = Client.SIDE_SELL if position_amount > 0 else Client.SIDE_BUY
-                    print(f"Bot '{bot.name}' ({symbol}): Closing previous position of {position_amount}...")
-                    client.futures_create_order(symbol=symbol, side=close_side, type=Client.ORDER_TYPE_MARKET, quantity=abs(position_amount))
-                    time.sleep(2) # Allow order to fill
-                    # PNL logging logic here...
-
-                # Second, analyze the just-closed candle and open a new trade
-                klines = client.futures_klines(symbol=symbol, interval=bot.timeframe, limit=2)
-                if len(klines) < 2:
-                    print(f"Bot '{bot.name}' ({symbol}): Not enough historical data. Waiting for next cycle.")
-                    continue
-
-                last_candle = klines[-2]
+                self.client.futures_change_leverage(symbol=self.symbol, leverage=bot.leverage)
+                self.precision = get_symbol_precision(self.client, self.symbol)
+            except Exception as e:
+                print(f"Failed to set leverage for {self.symbol}: {e}")
+                return
+            self.ready = True
+
+    def teardown(self):
+        if self.feed is not None:
+            self.feed.unsubscribe(self.symbol, self.timeframe)
+            self.feed = None
+
+    def last_closed_candle(self):
+        """The candle that just closed: from the websocket feed, else one REST call."""
+        now = self.clock.now_ms() if self.clock else int(time.time() * 1000)
+        open_time = round(now / self.interval_ms) * self.interval_ms - self.interval_ms
+        if self.feed is not None:
+            candle = self.feed.book.wait_closed(self.symbol, self.timeframe, open_time, KLINE_WAIT_SECONDS)
+            if candle is not None:
+                return candle
+        klines = self.client.futures_klines(symbol=self.symbol, interval=self.timeframe, limit=2)
+        return klines[-2] if len(klines) >= 2 else None
+
+    def run_cycle(self):
+        """Execute one trade cycle right after a new candle opened."""
+        if self.stop_event.is_set() or time.time() < self.retry_after:
+            return
+        client, symbol = self.client, self.symbol
+        spans = CycleSpans(self.key)
+        now = self.clock.now_ms() if self.clock else int(time.time() * 1000)
+        # candle open -> cycle start; the nearest boundary, since a lower offset estimate than the
+        # scheduler used can put `now` a few ms before it (clamped to 0 then)
+        boundary = round(now / self.interval_ms) * self.interval_ms
+        spans.add('wake', max(0, now - boundary) / 1000)
+        try:
+            # Current position (one account-wide snapshot, refreshed after our own orders)
+            with spans.stage('position'):
+                positions = self.book.position(client, symbol)
+            position_amount = float(positions[0]['positionAmt']) if positions else 0.0
+
+            # Analyze the just-closed candle to get the position we want for the new one
+            with spans.stage('klines'):
+                last_candle = self.last_closed_candle()
+            target = 0.0
+            if last_candle is None:
+                print(f"Bot '{self.bot_name}' ({symbol}): Not enough historical data. Waiting for next cycle.")
+            else:
                 open_price, close_price = float(last_candle[1]), float(last_candle[4])
-                print(f"Bot '{bot.name}' ({symbol}): Analyzing {bot.timeframe} candle. O:{open_price}, C:{close_price}")
-                
+                print(f"Bot '{self.bot_name}' ({symbol}): Analyzing {self.timeframe} candle. O:{open_price}, C:{close_price}")
+
                 # --- FIX: Candle color → side mapping ---
                 # Rule:
                 #   Green (open < close)  => NEW LONG (BUY)
@@ -97,7 +147,6 @@ def symbol_trader(bot_id, symbol, stop_event):
                 #   follow  => as above
                 #   opposite=> invert side
                 side = None
-                mode = (bot.trade_mode or 'follow').lower()
                 if close_price > open_price:
                     # green candle
                     side_follow = Client.SIDE_BUY
@@ -108,25 +157,42 @@ def symbol_trader(bot_id, symbol, stop_event):
                     side_follow = None  # doji
 
                 if side_follow:
-                    if mode == 'opposite':
+                    if self.trade_mode == 'opposite':
                         side = Client.SIDE_SELL if side_follow == Client.SIDE_BUY else Client.SIDE_BUY
                     else:
                         side = side_follow
 
                 if side:
-                    quantity = calculate_quantity(bot.margin_usd, bot.leverage, close_price, precision)
-                    if float(quantity) > 0:
-                        print(f"Bot '{bot.name}' ({symbol}): Placing NEW {side} order for {quantity} units.")
-                        client.futures_create_order(symbol=symbol, side=side, type=Client.ORDER_TYPE_MARKET, quantity=quantity)
+                    quantity = float(calculate_quantity(self.margin_usd, self.leverage, close_price, self.precision))
+                    target = quantity if side == Client.SIDE_BUY else -quantity
                 else:
-                    print(f"Bot '{bot.name}' ({symbol}): No trade condition met for new candle.")
-
-            except Exception as e:
-                print(f"Error in trade cycle for Bot '{bot.name}': {e}")
-                # Wait for a short period before retrying the next full cycle
-                stop_event.wait(30)
-    
-    print(f"🛑 Trader for {symbol} under Bot '{bot.name}' stopped.")
+                    print(f"Bot '{self.bot_name}' ({symbol}): No trade condition met for new candle.")
+
+            # One order from the previous position to the new one: close, reverse in a
+            # single order for the combined quantity, or keep a position on the same side.
+            with spans.stage('order'):
+                fill = move_to(client, symbol, position_amount, target, self.bot_id, self.precision)
+            if fill is not None:
+                print(f"Bot '{self.bot_name}' ({symbol}): {fill.get('side')} {fill.get('executedQty')} "
+                      f"{fill.get('status')} at {fill.get('avgPrice')} (position {position_amount} -> {target}).")
+                self.book.invalidate(symbol)
+            elif position_amount and target:
+                print(f"Bot '{self.bot_name}' ({symbol}): Keeping {position_amount}, same side as the new signal.")
+            self.has_position = target != 0
+
+        except FillTimeout as e:
+            # accepted but unconfirmed: re-read the position next cycle instead of pausing
+            print(f"Bot '{self.bot_name}' ({symbol}): {e}")
+            self.book.invalidate(symbol)
+        except RateBudgetExceeded as e:
+            # the governor already waited as long as a trade cycle may; try again next candle
+            print(f"Bot '{self.bot_name}' ({symbol}): Skipping cycle, {e}")
+        except Exception as e:
+            print(f"Error in trade cycle for Bot '{self.bot_name}': {e}")
+            # Skip cycles for a short period before retrying
+            self.retry_after = time.time() + 30
+        finally:
+            self.last_spans = spans.done()
 
 
 # ===== Additions to support push & limit run modes =====
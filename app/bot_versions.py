@@ -0,0 +1,69 @@
+import threading
+import uuid
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .models import Account, Bot
+
+class BotVersions:
+    """Change counters for bot configuration, used as ETags by the bot endpoints.
+
+    Every committed insert/update/delete of a Bot bumps that bot's counter and
+    the list counter; an Account change (name, testnet flag, deletion) bumps an
+    account epoch that is part of every tag, since bot payloads embed account
+    fields. Tags carry a per-process token so they never match across restarts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boot = uuid.uuid4().hex[:8]
+        self._list = 0
+        self._accounts = 0
+        self._bots: Dict[int, int] = {}
+
+    def bump(self, bot_ids=(), accounts: bool = False):
+        with self._lock:
+            for bot_id in bot_ids:
+                self._bots[bot_id] = self._bots.get(bot_id, 0) + 1
+            if bot_ids or accounts:
+                self._list += 1
+            if accounts:
+                self._accounts += 1
+
+    def list_etag(self) -> str:
+        with self._lock:
+            return f"{self._boot}-{self._accounts}-{self._list}"
+
+    def bot_etag(self, bot_id: int) -> str:
+        with self._lock:
+            return f"{self._boot}-{self._accounts}-{bot_id}.{self._bots.get(bot_id, 0)}"
+
+bot_versions = BotVersions()
+
+# ---- bump on committed Bot / Account changes ----
+_PENDING = 'bot_versions_pending'
+
+@event.listens_for(Session, 'after_flush')
+def _collect(session, flush_context):
+    pending = session.info.setdefault(_PENDING, {'bots': set(), 'accounts': False})
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Bot):
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            pending['bots'].add(obj.id)
+        elif isinstance(obj, Account):
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            pending['accounts'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _apply(session):
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        bot_versions.bump(pending['bots'], pending['accounts'])
+
+@event.listens_for(Session, 'after_rollback')
+def _discard(session):
+    session.info.pop(_PENDING, None)
@@ -1,14 +1,46 @@
 
-from flask import Blueprint, request, jsonify
-from sqlalchemy import func
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import func, case, and_, not_
+from sqlalchemy.orm import joinedload
 import threading, json
 
 from ..models import Bot, Account, Trade
-from .. import db, socketio
-from ..bot_logic import running_bots, symbol_trader
+from .. import db
+from ..bot_logic import running_bots, SymbolTrader
+from ..bot_versions import bot_versions
+from ..user_data import ensure_user_stream
+from ..scheduler import scheduler, local_clock
+from ..utils.symbol_catalog import get_catalog
+from ..utils.exchange_clock import get_clock
+from ..utils.position_book import get_position_book
+from ..utils.client_pool import get_account_client
+from ..utils.rate_governor import priority as rate_priority, RateBudgetExceeded, UI
 
 bots_bp = Blueprint('bots', __name__)
 
+# Encoded JSON bodies of the bot payloads, with the ETag they were built for; rebuilt only
+# after a committed config change.
+_payloads = {}
+
+def _conditional_json(key, etag, build):
+    """JSON response for ``build()`` with an ETag: 304 on a matching If-None-Match,
+    and the encoded body is reused while ``etag`` is unchanged."""
+    if request.if_none_match.contains(etag):
+        resp = current_app.response_class(status=304)
+    else:
+        cached = _payloads.get(key)
+        if cached is None or cached[0] != etag:
+            cached = _payloads[key] = (etag, (current_app.json.dumps(build()) + '\n').encode())
+        resp = current_app.response_class(cached[1], mimetype='application/json')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+def drop_payloads(*bot_ids):
+    """Forget the cached payloads of deleted bots."""
+    for bot_id in bot_ids:
+        _payloads.pop(bot_id, None)
+
 @bots_bp.route('/')
 @bots_bp.route('/dashboard')
 def dashboard():
@@ -27,22 +59,25 @@ def dashboard():
 @bots_bp.route('/api/bots', methods=['GET'])
 def get_bots():
     """List bots
+    Sends an ETag that changes only when a bot or account is created, updated,
+    deleted, started or stopped; a matching ``If-None-Match`` gets 304.
     ---
       tags:
         - Bots
     """
-    bots = Bot.query.all()
-    items = []
-    for b in bots:
-        items.append({
-            'id': b.id,
-            'name': b.name,
-            'status': b.status,
-            'symbols': b.get_symbols_list(),
-            'account_name': b.account.name if b.account else None,
-            'is_testnet': b.account.is_testnet if b.account else None
-        })
-    return jsonify({'success': True, 'bots': items})
+    def build():
+        items = []
+        for b in Bot.query.options(joinedload(Bot.account)).order_by(Bot.id).all():
+            items.append({
+                'id': b.id,
+                'name': b.name,
+                'status': b.status,
+                'symbols': b.get_symbols_list(),
+                'account_name': b.account.name if b.account else None,
+                'is_testnet': b.account.is_testnet if b.account else None
+            })
+        return {'success': True, 'bots': items}
+    return _conditional_json('list', bot_versions.list_etag(), build)
 
 @bots_bp.route('/api/bots', methods=['POST'])
 def create_bot():
@@ -94,6 +129,7 @@ def create_bot():
 @bots_bp.route('/api/bots/<int:bot_id>', methods=['GET'])
 def get_bot_detail(bot_id):
     """Get bot detail
+    Conditional like ``GET /api/bots``: ETag per bot, 304 when unchanged.
     ---
       tags:
         - Bots
@@ -103,31 +139,33 @@ def get_bot_detail(bot_id):
           required: true
           schema: {type: integer}
     """
-    bot = Bot.query.get_or_404(bot_id)
     def parse(raw):
         if raw is None: return None
         try: return json.loads(raw)
         except Exception: return raw
-    return jsonify({'success': True, 'bot': {
-        'id': bot.id,
-        'name': bot.name,
-        'account_id': bot.account_id,
-        'account_name': bot.account.name if bot.account else None,
-        'is_testnet': bot.account.is_testnet if bot.account else None,
-        'timeframe': bot.timeframe,
-        'symbols': bot.get_symbols_list(),
-        'trade_mode': bot.trade_mode,
-        'leverage': bot.leverage,
-        'margin_mode': bot.margin_mode,
-        'margin_usd': bot.margin_usd,
-        'recovery_roi_threshold': bot.recovery_roi_threshold,
-        'max_recovery_margin': bot.max_recovery_margin,
-        'roi_targets': parse(bot.roi_targets),
-        'conditions': parse(bot.conditions),
-        'run_mode': bot.run_mode,
-        'max_trades_limit': bot.max_trades_limit,
-        'status': bot.status
-    }})
+    def build():
+        bot = Bot.query.options(joinedload(Bot.account)).filter_by(id=bot_id).first_or_404()
+        return {'success': True, 'bot': {
+            'id': bot.id,
+            'name': bot.name,
+            'account_id': bot.account_id,
+            'account_name': bot.account.name if bot.account else None,
+            'is_testnet': bot.account.is_testnet if bot.account else None,
+            'timeframe': bot.timeframe,
+            'symbols': bot.get_symbols_list(),
+            'trade_mode': bot.trade_mode,
+            'leverage': bot.leverage,
+            'margin_mode': bot.margin_mode,
+            'margin_usd': bot.margin_usd,
+            'recovery_roi_threshold': bot.recovery_roi_threshold,
+            'max_recovery_margin': bot.max_recovery_margin,
+            'roi_targets': parse(bot.roi_targets),
+            'conditions': parse(bot.conditions),
+            'run_mode': bot.run_mode,
+            'max_trades_limit': bot.max_trades_limit,
+            'status': bot.status
+        }}
+    return _conditional_json(bot_id, bot_versions.bot_etag(bot_id), build)
 
 @bots_bp.route('/api/bots/<int:bot_id>', methods=['PUT','PATCH'])
 def update_bot(bot_id):
@@ -166,6 +204,7 @@ def delete_bot(bot_id):
     bot = Bot.query.get_or_404(bot_id)
     db.session.delete(bot)
     db.session.commit()
+    drop_payloads(bot_id)
     return jsonify({'success': True})
 
 @bots_bp.route('/api/bot-setup', methods=['POST'])
@@ -214,6 +253,9 @@ def bot_setup():
 @bots_bp.route('/api/symbols', methods=['GET'])
 def get_symbols():
     """List futures symbols (USDT)
+    Answered from the cached symbol catalog, never from a live exchangeInfo call;
+    an expired catalog is reloaded in the background. Sends an ETag and returns
+    304 when ``If-None-Match`` still matches.
     ---
       tags:
         - Symbols
@@ -221,23 +263,67 @@ def get_symbols():
         - in: query
           name: account_id
           schema: {type: integer}
+        - in: query
+          name: q
+          schema: {type: string}
+          description: Case-insensitive substring; symbols starting with it come first
+        - in: query
+          name: prefix
+          schema: {type: string}
+          description: Case-insensitive prefix
+        - in: query
+          name: limit
+          schema: {type: integer}
+        - in: query
+          name: refresh
+          schema: {type: integer}
+          description: 1 to start reloading exchangeInfo in the background now
+      responses:
+        200:
+          description: OK
+        304:
+          description: Not modified
+        503:
+          description: Catalog not loaded yet (Retry-After set)
     """
-    import requests
     acc_id = request.args.get('account_id', type=int)
     acc = Account.query.get_or_404(acc_id) if acc_id else Account.query.first()
     if not acc:
         return jsonify({'success': False, 'message': 'no account available'}), 400
 
-    base = 'https://testnet.binancefuture.com' if acc.is_testnet else 'https://fapi.binance.com'
-    url = f"{base}/fapi/v1/exchangeInfo"
-    try:
-        r = requests.get(url, timeout=5)
-        r.raise_for_status()
-        info = r.json()
-        syms = [s['symbol'] for s in info.get('symbols', []) if s.get('quoteAsset') == 'USDT' and s.get('status') == 'TRADING']
-        return jsonify({'success': True, 'symbols': syms, 'source': base})
-    except Exception as e:
-        return jsonify({'success': False, 'message': f'symbol fetch failed: {e}', 'source': base}), 502
+    catalog = get_catalog(bool(acc.is_testnet), bool(acc.is_simulated))
+    base = catalog.base_url
+    if request.args.get('refresh', type=int):
+        catalog.refresh_async()
+    syms = catalog.symbols(quote_asset='USDT', status='TRADING', wait=False)
+    if not catalog.loaded:
+        resp = jsonify({'success': False, 'message': 'symbol catalog is loading', 'source': base})
+        resp.status_code = 503
+        resp.headers['Retry-After'] = '2'
+        return resp
+
+    # the response is a pure function of the URL and the catalog content
+    etag = catalog.etag
+    if request.if_none_match.contains(etag):
+        resp = current_app.response_class(status=304)
+        resp.set_etag(etag)
+        return resp
+
+    prefix = (request.args.get('prefix') or '').upper()
+    q = (request.args.get('q') or '').upper()
+    limit = request.args.get('limit', type=int)
+    if prefix:
+        syms = [s for s in syms if s.startswith(prefix)]
+    if q:
+        syms = [s for s in syms if s.startswith(q)] + [s for s in syms if q in s and not s.startswith(q)]
+    total = len(syms)
+    if limit and limit > 0:
+        syms = syms[:limit]
+    resp = jsonify({'success': True, 'symbols': syms, 'total': total, 'source': base,
+                    'loaded_at': int(catalog.loaded_at)})
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
 
 @bots_bp.route('/api/bots/<int:bot_id>/start', methods=['POST'])
 def start_bot(bot_id):
@@ -250,25 +336,29 @@ def start_bot(bot_id):
     if bot_id in running_bots:
         return jsonify({'success': False, 'message': 'Bot is already running'}), 400
 
-    threads = {}
+    traders = {}
     stop_event = threading.Event()
     symbols = bot.get_symbols_list() or []
+    app = current_app._get_current_object()
+    # the simulated exchange runs on local time
+    clock = local_clock if bot.account.is_simulated else get_clock(bool(bot.account.is_testnet))
     for sym in symbols:
-        t = threading.Thread(target=symbol_trader, args=(bot.id, sym, stop_event), daemon=True)
-        t.start()
-        threads[sym] = t
+        trader = SymbolTrader(bot.id, sym, stop_event, timeframe=bot.timeframe, app=app, clock=clock)
+        scheduler.add(trader)
+        traders[sym] = trader
 
-    running_bots[bot.id] = {'threads': threads, 'stop_event': stop_event, 'push': False}
+    running_bots[bot.id] = {'traders': traders, 'stop_event': stop_event, 'push': False, 'account_id': bot.account_id}
+    # fills, positions and Trade rows of the account come from its user-data stream
+    ensure_user_stream(bot.account)
     try:
         bot.status = 'running'; db.session.commit()
-        socketio.emit('bot_status_update', {'bot_id': bot.id, 'status': 'running'})
     except Exception:
         pass
     return jsonify({'success': True, 'message': f"Bot '{bot.name}' started."})
 
 @bots_bp.route('/api/bots/<int:bot_id>/stop', methods=['POST'])
 def stop_bot(bot_id):
-    """Stop bot (threads only)
+    """Stop bot (traders only)
     ---
       tags:
         - Bots
@@ -277,14 +367,9 @@ def stop_bot(bot_id):
     bot = Bot.query.get_or_404(bot_id)
     if bot_info:
         bot_info['stop_event'].set()
-        for thread in bot_info['threads'].values():
-            try:
-                thread.join(timeout=5)
-            except Exception:
-                pass
+        scheduler.remove_bot(bot_id, timeout=5)
     try:
         bot.status = 'stopped'; db.session.commit()
-        socketio.emit('bot_status_update', {'bot_id': bot.id, 'status': 'stopped'})
     except Exception:
         pass
     return jsonify({'success': True, 'message': f"Bot '{bot.name}' stopped."})
@@ -301,7 +386,6 @@ def push_bot(bot_id):
         return jsonify({'success': False, 'message': 'bot not running'}), 400
     info['push'] = True
     running_bots[bot_id] = info
-    socketio.emit('bot_status_update', {'bot_id': bot_id, 'push': True})
     return jsonify({'success': True, 'message': 'push activated (pause after current)'})
 
 @bots_bp.route('/api/bots/<int:bot_id>/resume', methods=['POST'])
@@ -316,7 +400,6 @@ def resume_bot(bot_id):
         return jsonify({'success': False, 'message': 'bot not running'}), 400
     info['push'] = False
     running_bots[bot_id] = info
-    socketio.emit('bot_status_update', {'bot_id': bot_id, 'push': False})
     return jsonify({'success': True, 'message': 'push cleared (resume)'})
 
 @bots_bp.route('/api/bots/<int:bot_id>/close', methods=['POST'])
@@ -326,12 +409,12 @@ def close_bot_positions(bot_id):
       tags:
         - Bots
     """
-    from ..utils.binance_helper import get_client, close_positions_and_cancel_orders
+    from ..utils.binance_helper import close_positions_and_cancel_orders
     bot = Bot.query.get_or_404(bot_id)
     acc = bot.account
-    client = get_client(acc.api_key, acc.api_secret, acc.is_testnet)
+    client = get_account_client(acc)
     symbols = bot.get_symbols_list()
-    result = close_positions_and_cancel_orders(client, symbols)
+    result = close_positions_and_cancel_orders(client, symbols, get_position_book(acc.id))
     return jsonify({'success': True, 'result': result})
 
 @bots_bp.route('/api/bots/<int:bot_id>/cancel-orders', methods=['POST'])
@@ -341,16 +424,11 @@ def cancel_orders(bot_id):
       tags:
         - Bots
     """
-    from ..utils.binance_helper import get_client, cancel_all_open_orders
+    from ..utils.binance_helper import cancel_open_orders_concurrently
     bot = Bot.query.get_or_404(bot_id)
     acc = bot.account
-    client = get_client(acc.api_key, acc.api_secret, acc.is_testnet)
-    out = {'cancelled': [], 'errors': {}}
-    for sym in bot.get_symbols_list():
-        try:
-            cancel_all_open_orders(client, sym); out['cancelled'].append(sym)
-        except Exception as e:
-            out['errors'][sym] = str(e)
+    client = get_account_client(acc)
+    out = cancel_open_orders_concurrently(client, bot.get_symbols_list(), get_position_book(acc.id))
     return jsonify({'success': True, 'result': out})
 
 @bots_bp.route('/api/bots/<int:bot_id>/status', methods=['GET'])
@@ -368,7 +446,7 @@ def bot_status(bot_id):
         'db_status': bot.status,
         'running': bool(info),
         'push': bool(info.get('push', False)),
-        'symbols': list(info.get('threads', {}).keys()) if info else bot.get_symbols_list(),
+        'symbols': list(info.get('traders', {}).keys()) if info else bot.get_symbols_list(),
     }
     return jsonify({'success': True, 'status': status})
 
@@ -378,65 +456,69 @@ def positions(bot_id):
     ---
       tags:
         - Bots
+      description: Served from the account's position book (one all-symbols position call and one open-orders call, reused for about a second). When the rate governor keeps the budget for trading, rows come from the last snapshot and carry stale_age_s.
     """
-    from binance.client import Client
     bot = Bot.query.get_or_404(bot_id)
     acc = bot.account
-    client = Client(acc.api_key, acc.api_secret, testnet=acc.is_testnet)
+    client = get_account_client(acc)
+    book = get_position_book(acc.id)
     data = []
     for sym in bot.get_symbols_list():
         try:
-            pos = client.futures_position_information(symbol=sym)
-            orders = client.futures_get_open_orders(symbol=sym)
+            stale_age = None
+            try:
+                with rate_priority(UI):
+                    pos = book.position(client, sym)
+                    orders = book.open_orders(client, sym)
+            except RateBudgetExceeded:
+                # keep the weight budget for trading; show the last snapshot instead
+                pos, orders, stale_age = book.cached(sym)
             entry_price = float(pos[0].get('entryPrice', 0) or 0) if pos else 0.0
             amt = float(pos[0].get('positionAmt', 0) or 0) if pos else 0.0
-            data.append({'symbol': sym, 'entry_price': entry_price, 'position_amt': amt, 'open_orders': orders})
+            row = {'symbol': sym, 'entry_price': entry_price, 'position_amt': amt, 'open_orders': orders}
+            if stale_age is not None:
+                row['stale_age_s'] = round(stale_age, 1)
+            data.append(row)
         except Exception as e:
             data.append({'symbol': sym, 'error': str(e)})
     return jsonify({'success': True, 'positions': data})
 
 def _build_summary(query):
-    summary = {
-        'total_trades': 0,
-        'running_trades': 0,
-        'loss_trades': 0,
-        'loss_negative_roi_stoploss': 0,
-        'loss_negative_roi_candle_close': 0,
-        'win_trades': 0,
-        'win_before_r2': 0,
-        'win_between_r2_r3': 0,
-        'win_between_r3_r4': 0,
-        'win_between_r4_r5': 0,
-        'win_after_r5': 0,
-        'breakeven_trades': 0,
-        'profit_total': 0.0,
-        'loss_total': 0.0,
-        'net_result': 0.0
-    }
-    items = query.all()
-    for t in items:
-        summary['total_trades'] += 1
-        roi = t.roi_percent or 0.0
-        pnl = t.pnl or 0.0
-        reason = (t.close_reason or '').lower()
-        if t.exit_time is None:
-            summary['running_trades'] += 1
-            continue
-        if roi > 0:
-            summary['win_trades'] += 1
-            if roi < 5: summary['win_before_r2'] += 1
-            elif roi < 15: summary['win_between_r2_r3'] += 1
-            elif roi < 20: summary['win_between_r3_r4'] += 1
-            elif roi < 25: summary['win_between_r4_r5'] += 1
-            else: summary['win_after_r5'] += 1
-            summary['profit_total'] += pnl if pnl > 0 else abs(roi) * (t.margin_used or 0)/100.0
-        elif roi < 0:
-            summary['loss_trades'] += 1
-            if 'stop' in reason: summary['loss_negative_roi_stoploss'] += 1
-            else: summary['loss_negative_roi_candle_close'] += 1
-            summary['loss_total'] += abs(pnl) if pnl < 0 else abs(roi) * (t.margin_used or 0)/100.0
-        else:
-            summary['breakeven_trades'] += 1
+    """Report summary for the trades selected by ``query``, computed in one aggregate
+    query (CASE buckets) instead of loading every Trade row."""
+    closed = Trade.exit_time.isnot(None)
+    roi = func.coalesce(Trade.roi_percent, 0.0)
+    pnl = func.coalesce(Trade.pnl, 0.0)
+    margin = func.coalesce(Trade.margin_used, 0.0)
+    win = and_(closed, roi > 0)
+    loss = and_(closed, roi < 0)
+    stop = func.lower(func.coalesce(Trade.close_reason, '')).like('%stop%')
+
+    def count(cond):
+        return func.sum(case((cond, 1), else_=0))
+
+    row = query.order_by(None).with_entities(
+        func.count(Trade.id),
+        count(Trade.exit_time.is_(None)),
+        count(loss),
+        count(and_(loss, stop)),
+        count(and_(loss, not_(stop))),
+        count(win),
+        count(and_(win, roi < 5)),
+        count(and_(win, roi >= 5, roi < 15)),
+        count(and_(win, roi >= 15, roi < 20)),
+        count(and_(win, roi >= 20, roi < 25)),
+        count(and_(win, roi >= 25)),
+        count(and_(closed, roi == 0)),
+        func.sum(case((win, case((pnl > 0, pnl), else_=func.abs(roi) * margin / 100.0)), else_=0.0)),
+        func.sum(case((loss, case((pnl < 0, func.abs(pnl)), else_=func.abs(roi) * margin / 100.0)), else_=0.0)),
+    ).one()
+    keys = ['total_trades', 'running_trades', 'loss_trades', 'loss_negative_roi_stoploss',
+            'loss_negative_roi_candle_close', 'win_trades', 'win_before_r2', 'win_between_r2_r3',
+            'win_between_r3_r4', 'win_between_r4_r5', 'win_after_r5', 'breakeven_trades']
+    summary = {k: int(v or 0) for k, v in zip(keys, row[:12])}
+    summary['profit_total'] = float(row[12] or 0.0)
+    summary['loss_total'] = float(row[13] or 0.0)
     summary['net_result'] = summary['profit_total'] - summary['loss_total']
     return summary
 
@@ -0,0 +1,181 @@
+"""Socket.IO rooms per bot and per account with throttled, versioned field deltas.
+
+Clients ``subscribe`` to ``{'bots': [ids], 'accounts': [ids]}`` and get one
+``snapshot`` per room (``{room, version, data}``). The broadcaster then calls
+``live.tick()`` every ``LIVE_UPDATE_INTERVAL_MS``: each room that has members is
+rebuilt from in-memory state (running bots, summary store, user-data streams,
+PnL engine) and compared with what its members last received. Changed fields go out as one
+``delta`` per room (``{room, from, version, changes}``), however often the
+source changed in between. A client whose version differs from ``from``
+missed a message and subscribes again for a fresh snapshot.
+
+Work per tick grows with the number of rooms in use, not with clients x bots;
+rooms without members are dropped and rebuilt on the next join.
+"""
+import os
+import threading
+from typing import Callable, Dict, Optional, Set
+
+from flask import request
+from flask_socketio import join_room, leave_room
+
+from . import socketio
+from .utils import metrics
+
+LIVE_UPDATE_INTERVAL_MS = int(os.getenv('LIVE_UPDATE_INTERVAL_MS', '1000'))
+LIVE_MAX_ROOMS_PER_CLIENT = int(os.getenv('LIVE_MAX_ROOMS_PER_CLIENT', '500'))
+
+messages = metrics.counter('omlol_live_messages_total', 'Socket.IO room messages sent by kind')
+
+# ---- room state sources ----
+def bot_state(bot_id: int) -> dict:
+    from .bot_logic import running_bots
+    from .pnl import pnl_engine
+    from .summary_store import store
+    info = running_bots.get(bot_id)
+    # the closed-trade totals stay with /api/reports/bot-summary; the version tells clients when to re-read them
+    state = {'status': 'running' if info else 'stopped', 'push': bool(info and info.get('push')),
+             'trades_version': store.version(bot_id)}
+    snap = pnl_engine.snapshot()
+    state.update(snap.bot(bot_id))
+    state['positions'] = {r['symbol']: {k: r[k] for k in ('side', 'quantity', 'entry_price', 'mark_price',
+                                                          'unrealised_pnl', 'roi_percent')}
+                          for r in snap.rows(bot_id)}
+    return state
+
+def account_state(account_id: int) -> dict:
+    from .bot_logic import running_bots
+    from .pnl import pnl_engine
+    from .user_data import user_streams
+    stream = next((s for s in user_streams() if s.account_id == account_id), None)
+    usdt = (stream.balances.get('USDT') if stream else None) or {}
+    state = {'running_bots': sorted(b for b, info in list(running_bots.items()) if info.get('account_id') == account_id),
+             'user_stream': None if stream is None else ('connected' if stream.connected else 'disconnected'),
+             'usdt_wallet': usdt.get('wallet'), 'usdt_cross': usdt.get('cross')}
+    state.update(pnl_engine.snapshot().account(account_id))
+    return state
+
+SOURCES: Dict[str, Callable[[int], dict]] = {'bot': bot_state, 'account': account_state}
+
+def room_name(kind: str, id_) -> str:
+    return f"{kind}:{id_}"
+
+class Room:
+    __slots__ = ('name', 'source', 'key', 'members', 'version', 'data')
+
+    def __init__(self, name: str, source: Callable[[int], dict], key: int):
+        self.name, self.source, self.key = name, source, key
+        self.members: Set[str] = set()
+        self.version = 0
+        self.data: dict = {}
+
+    def refresh(self) -> Optional[dict]:
+        """Rebuild the state; return the changed fields (None if nothing changed)."""
+        fresh = self.source(self.key)
+        changes = {k: v for k, v in fresh.items() if self.data.get(k, object()) != v}
+        changes.update({k: None for k in self.data if k not in fresh})
+        if not changes:
+            return None
+        self.data = fresh
+        self.version += 1
+        return changes
+
+class LiveHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rooms: Dict[str, Room] = {}
+        self._clients: Dict[str, Set[str]] = {}   # sid -> room names
+
+    def join(self, sid: str, kind: str, key: int) -> Optional[dict]:
+        """Add ``sid`` to a room; returns the snapshot to send it, or None if refused."""
+        name = room_name(kind, key)
+        with self._lock:
+            rooms = self._clients.setdefault(sid, set())
+            if name not in rooms and len(rooms) >= LIVE_MAX_ROOMS_PER_CLIENT:
+                return None
+            room = self._rooms.get(name)
+            if room is None:
+                room = self._rooms[name] = Room(name, SOURCES[kind], key)
+                room.refresh()
+            room.members.add(sid)
+            rooms.add(name)
+            return {'room': name, 'version': room.version, 'data': dict(room.data)}
+
+    def leave(self, sid: str, name: str):
+        with self._lock:
+            self._clients.get(sid, set()).discard(name)
+            room = self._rooms.get(name)
+            if room is not None:
+                room.members.discard(sid)
+                if not room.members:
+                    del self._rooms[name]
+
+    def drop(self, sid: str):
+        for name in list(self._clients.get(sid, ())):
+            self.leave(sid, name)
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    def tick(self, emit: Callable[[str, dict, str], None]):
+        """Send one delta per room whose state changed since the last tick."""
+        with self._lock:
+            rooms = list(self._rooms.values())
+        for room in rooms:
+            with self._lock:
+                before = room.version
+                try:
+                    changes = room.refresh()
+                except Exception as e:
+                    print(f"Live room {room.name} refresh failed: {e}")
+                    continue
+            if changes is not None:
+                emit('delta', {'room': room.name, 'from': before, 'version': room.version, 'changes': changes},
+                     room.name)
+                messages.inc({'kind': 'delta'})
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'rooms': len(self._rooms), 'clients': len(self._clients),
+                    'subscriptions': sum(len(r.members) for r in self._rooms.values())}
+
+live = LiveHub()
+
+metrics.gauge('omlol_live_rooms', 'Socket.IO rooms with at least one subscriber', lambda: live.stats()['rooms'])
+metrics.gauge('omlol_live_subscriptions', 'Room subscriptions over all clients',
+              lambda: live.stats()['subscriptions'])
+
+# ---- Socket.IO handlers ----
+def _requested(data) -> list:
+    """[(kind, id)] from ``{'bots': [...], 'accounts': [...]}``; invalid ids are skipped."""
+    out = []
+    for field, kind in (('bots', 'bot'), ('accounts', 'account')):
+        for value in (data or {}).get(field) or []:
+            try:
+                out.append((kind, int(value)))
+            except (TypeError, ValueError):
+                continue
+    return out
+
+@socketio.on('subscribe')
+def _subscribe(data):
+    sid = request.sid
+    for kind, key in _requested(data):
+        snapshot = live.join(sid, kind, key)
+        if snapshot is None:
+            socketio.emit('subscribe_error', {'room': room_name(kind, key), 'error': 'too many rooms'}, to=sid)
+            continue
+        join_room(snapshot['room'])
+        socketio.emit('snapshot', snapshot, to=sid)
+        messages.inc({'kind': 'snapshot'})
+
+@socketio.on('unsubscribe')
+def _unsubscribe(data):
+    sid = request.sid
+    for kind, key in _requested(data):
+        name = room_name(kind, key)
+        leave_room(name)
+        live.leave(sid, name)
+
+@socketio.on('disconnect')
+def _disconnect(*args):
+    live.drop(request.sid)
@@ -0,0 +1,186 @@
+import csv
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .utils.binance_helper import futures_ws_url
+from .utils.ws_stream import StreamMux
+
+# Closed candles kept per (symbol, interval).
+KLINE_BUFFER_SIZE = int(os.environ.get('KLINE_BUFFER_SIZE', 500))
+
+def kline_from_event(k: dict) -> list:
+    """Convert a websocket kline payload into the REST ``futures_klines`` row layout."""
+    return [int(k['t']), k['o'], k['h'], k['l'], k['c'], k['v'], int(k['T']),
+            k.get('q', '0'), int(k.get('n', 0)), k.get('V', '0'), k.get('Q', '0'), '0']
+
+class CandleBook:
+    """Fixed-size ring buffers of closed candles keyed by (symbol, interval)."""
+
+    def __init__(self, size: int = KLINE_BUFFER_SIZE):
+        self.size = size
+        self._cond = threading.Condition()
+        self._candles: Dict[Tuple[str, str], deque] = {}
+
+    def add(self, symbol: str, interval: str, kline: list):
+        key = (symbol.upper(), interval)
+        with self._cond:
+            buf = self._candles.get(key)
+            if buf is None:
+                buf = self._candles[key] = deque(maxlen=self.size)
+            if buf and buf[-1][0] >= kline[0]:
+                if buf[-1][0] == kline[0]:
+                    buf[-1] = kline   # duplicate close after a reconnect
+                return
+            buf.append(kline)
+            self._cond.notify_all()
+
+    def last(self, symbol: str, interval: str) -> Optional[list]:
+        buf = self._candles.get((symbol.upper(), interval))
+        return buf[-1] if buf else None
+
+    def history(self, symbol: str, interval: str, limit: Optional[int] = None) -> List[list]:
+        with self._cond:
+            buf = list(self._candles.get((symbol.upper(), interval), ()))
+        return buf[-limit:] if limit else buf
+
+    def wait_closed(self, symbol: str, interval: str, open_time: int, timeout: float) -> Optional[list]:
+        """Block until the candle that opened at ``open_time`` (ms) has closed.
+
+        Returns that candle, or None on timeout. Candles already in the buffer
+        return immediately.
+        """
+        key = (symbol.upper(), interval)
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                buf = self._candles.get(key)
+                if buf and buf[-1][0] >= open_time:
+                    for k in reversed(buf):
+                        if k[0] == open_time:
+                            return k
+                        if k[0] < open_time:
+                            break
+                    return None
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+class KlineFeed:
+    """Closed-candle feed for one futures websocket base: ``<symbol>@kline_<interval>``
+    streams multiplexed over shared connections and written into a CandleBook.
+
+    Subscriptions are reference counted, so several bots trading the same
+    symbol/interval share one stream.
+    """
+
+    def __init__(self, ws_base: str, stream_factory=None):
+        self.book = CandleBook()
+        kwargs = {'stream_factory': stream_factory} if stream_factory else {}
+        self.mux = StreamMux(ws_base, self._on_message, name='kline', **kwargs)
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stream_name(symbol: str, interval: str) -> str:
+        return f"{symbol.lower()}@kline_{interval}"
+
+    def subscribe(self, symbol: str, interval: str):
+        name = self.stream_name(symbol, interval)
+        with self._lock:
+            self._refs[name] = self._refs.get(name, 0) + 1
+            first = self._refs[name] == 1
+        if first:
+            self.mux.subscribe(name)
+
+    def unsubscribe(self, symbol: str, interval: str):
+        name = self.stream_name(symbol, interval)
+        with self._lock:
+            left = self._refs.get(name, 0) - 1
+            if left > 0:
+                self._refs[name] = left
+                return
+            self._refs.pop(name, None)
+        self.mux.unsubscribe(name)
+
+    def _on_message(self, stream: str, data: dict):
+        k = data.get('k')
+        if not k or not k.get('x'):
+            return  # only closed candles are interesting to the strategy
+        self.book.add(k['s'], k['i'], kline_from_event(k))
+
+class ReplayStream:
+    """Offline stand-in for ``CombinedStream``: replays recorded klines as kline events.
+
+    Reads CSV files named ``<SYMBOL>_<interval>.csv`` (REST kline column order,
+    header optional) from ``directory`` and emits one closed-candle event per
+    row for every subscribed stream, ``delay`` seconds apart.
+
+        feed = KlineFeed('replay', stream_factory=ReplayStream.factory('data/klines', delay=0.5))
+    """
+
+    def __init__(self, ws_base, on_message, name='replay', directory='.', delay=0.0):
+        self.on_message = on_message
+        self.name = name
+        self.directory = directory
+        self.delay = delay
+        self.streams = set()
+        self._stop = threading.Event()
+
+    @classmethod
+    def factory(cls, directory: str, delay: float = 0.0):
+        def build(ws_base, on_message, name='replay'):
+            return cls(ws_base, on_message, name=name, directory=directory, delay=delay)
+        return build
+
+    def _rows(self, symbol: str, interval: str):
+        path = os.path.join(self.directory, f"{symbol.upper()}_{interval}.csv")
+        with open(path, newline='') as fh:
+            for row in csv.reader(fh):
+                if row and row[0].strip().isdigit():
+                    yield row
+
+    def _play(self, stream: str):
+        symbol, interval = stream.split('@kline_')
+        try:
+            for row in self._rows(symbol, interval):
+                if self._stop.is_set() or stream not in self.streams:
+                    return
+                self.on_message(stream, {'e': 'kline', 'k': {
+                    's': symbol.upper(), 'i': interval, 't': int(row[0]), 'T': int(row[6]),
+                    'o': row[1], 'h': row[2], 'l': row[3], 'c': row[4], 'v': row[5], 'x': True}})
+                if self.delay:
+                    self._stop.wait(self.delay)
+        except FileNotFoundError:
+            print(f"Replay: no recorded klines for {stream} in {self.directory}")
+
+    def subscribe(self, streams):
+        for s in streams:
+            if s not in self.streams:
+                self.streams.add(s)
+                threading.Thread(target=self._play, args=(s,), name=f'{self.name}-{s}', daemon=True).start()
+
+    def unsubscribe(self, streams):
+        self.streams.difference_update(streams)
+
+    def stop(self):
+        self._stop.set()
+
+_feeds: Dict[str, KlineFeed] = {}
+_feeds_lock = threading.Lock()
+
+def get_kline_feed(testnet: bool = False, simulated: bool = False) -> KlineFeed:
+    """Return the shared kline feed for mainnet, testnet or the simulated exchange."""
+    base = 'sim' if simulated else futures_ws_url(testnet)
+    with _feeds_lock:
+        feed = _feeds.get(base)
+        if feed is None:
+            if simulated:
+                from .utils.sim_exchange import SimStream
+                feed = _feeds[base] = KlineFeed(base, stream_factory=SimStream.factory())
+            else:
+                feed = _feeds[base] = KlineFeed(base)
+        return feed
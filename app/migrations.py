@@ -0,0 +1,40 @@
+"""Idempotent schema upgrades for databases created by older versions.
+
+``db.create_all()`` only creates missing tables; it never touches tables that
+already exist. Each step below checks the live schema first, so running them
+at every start-up is safe.
+"""
+from sqlalchemy import inspect, text
+
+from .models import Account, Trade
+
+def _trade_indexes(conn):
+    existing = {ix['name'] for ix in inspect(conn).get_indexes(Trade.__table__.name)}
+    for index in Trade.__table__.indexes:
+        if index.name not in existing:
+            index.create(conn)
+
+def _account_is_simulated(conn):
+    columns = {c['name'] for c in inspect(conn).get_columns(Account.__table__.name)}
+    if 'is_simulated' not in columns:
+        conn.execute(text(f"ALTER TABLE {Account.__table__.name} ADD COLUMN is_simulated BOOLEAN DEFAULT 0"))
+
+def _trade_fill_columns(conn):
+    columns = {c['name'] for c in inspect(conn).get_columns(Trade.__table__.name)}
+    for name in ('quantity', 'fees'):
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE {Trade.__table__.name} ADD COLUMN {name} FLOAT"))
+
+MIGRATIONS = [
+    ('0001_trade_indexes', _trade_indexes),
+    ('0002_account_is_simulated', _account_is_simulated),
+    ('0003_trade_fill_columns', _trade_fill_columns),
+]
+
+def run_migrations(engine):
+    with engine.begin() as conn:
+        for name, step in MIGRATIONS:
+            try:
+                step(conn)
+            except Exception as e:
+                print(f"Migration {name} failed: {e}")
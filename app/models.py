@@ -8,6 +8,8 @@ class Account(db.Model):
     api_key = db.Column(db.String(200), nullable=False)
     api_secret = db.Column(db.String(200), nullable=False)
     is_testnet = db.Column(db.Boolean, default=False)
+    # routed to the in-process simulated exchange (app/utils/sim_exchange.py) instead of Binance
+    is_simulated = db.Column(db.Boolean, default=False)
     bots = db.relationship('Bot', backref='account', lazy=True, cascade="all, delete-orphan")
 
 class Bot(db.Model):
@@ -44,6 +46,16 @@ class Bot(db.Model):
         }
 
 class Trade(db.Model):
+    __table_args__ = (
+        # /api/trades and /api/trades/open: filter by bot or symbol, newest first
+        db.Index('ix_trade_bot_entry', 'bot_id', 'entry_time'),
+        db.Index('ix_trade_symbol_entry', 'symbol', 'entry_time'),
+        db.Index('ix_trade_entry_time', 'entry_time'),
+        db.Index('ix_trade_exit_time', 'exit_time'),
+        # covering index for per-bot summaries and open-trade lookups
+        db.Index('ix_trade_bot_summary', 'bot_id', 'exit_time', 'roi_percent', 'pnl', 'margin_used', 'close_reason'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     bot_id = db.Column(db.Integer, db.ForeignKey('bot.id'), nullable=False)
     symbol = db.Column(db.String(20), nullable=False)
@@ -55,4 +67,7 @@ class Trade(db.Model):
     pnl = db.Column(db.Float)
     roi_percent = db.Column(db.Float)
     close_reason = db.Column(db.String(100))
-    side = db.Column(db.String(10))
\ No newline at end of file
+    side = db.Column(db.String(10))
+    # filled quantity and USDT commissions of both legs, from the user-data stream
+    quantity = db.Column(db.Float)
+    fees = db.Column(db.Float)
\ No newline at end of file
@@ -0,0 +1,238 @@
+"""Live unrealised PnL of open trades from the ``<symbol>@markPrice@1s`` streams.
+
+``TradeRecorder`` reports every open trade to ``pnl_engine.track`` (and
+``untrack`` once it is flat). The engine keeps one row per open trade in NumPy
+columns (signed quantity, entry price, margin, symbol column, bot, account) and
+one mark price per (feed, symbol). Mark updates only overwrite one array cell;
+``snapshot()`` recomputes every trade's PnL/ROI and the per-bot and per-account
+totals in a single vectorised pass, at most once per ``PNL_REFRESH_MS``. It is
+read by the live Socket.IO rooms and by ``/api/trades/open``, so neither needs
+REST calls.
+
+Unrealised PnL is ``quantity * (mark - entry)`` before fees, like the exchange
+shows it; ROI is relative to the trade's ``margin_used``. Until the first mark
+price of a symbol arrives, the entry price stands in for it.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .utils import metrics
+from .utils.binance_helper import futures_ws_url
+from .utils.ws_stream import StreamMux
+
+PNL_REFRESH_MS = int(os.getenv('PNL_REFRESH_MS', '1000'))
+
+compute_seconds = metrics.histogram('omlol_pnl_compute_seconds', 'One vectorised unrealised PnL pass over all open trades')
+
+class MarkPriceFeed:
+    """``<symbol>@markPrice@1s`` streams of one futures websocket base, reference counted per symbol."""
+
+    def __init__(self, ws_base: str, stream_factory=None):
+        self.base = ws_base
+        kwargs = {'stream_factory': stream_factory} if stream_factory else {}
+        self.mux = StreamMux(ws_base, self._on_message, name='mark', **kwargs)
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stream_name(symbol: str) -> str:
+        return f"{symbol.lower()}@markPrice@1s"
+
+    def subscribe(self, symbol: str):
+        name = self.stream_name(symbol)
+        with self._lock:
+            self._refs[name] = self._refs.get(name, 0) + 1
+            first = self._refs[name] == 1
+        if first:
+            self.mux.subscribe(name)
+
+    def unsubscribe(self, symbol: str):
+        name = self.stream_name(symbol)
+        with self._lock:
+            left = self._refs.get(name, 0) - 1
+            if left > 0:
+                self._refs[name] = left
+                return
+            self._refs.pop(name, None)
+        self.mux.unsubscribe(name)
+
+    def _on_message(self, stream: str, data: dict):
+        if data.get('e') == 'markPriceUpdate':
+            pnl_engine.set_mark(self.base, data['s'], float(data['p']))
+
+class PnlSnapshot:
+    """Result of one PnL pass: per-trade arrays plus per-bot and per-account totals."""
+
+    def __init__(self, meta: List[Optional[dict]], rows, bot_ids, qty, entry, mark, margin, pnl, roi,
+                 bots: Dict[int, dict], accounts: Dict[int, dict], at: float):
+        self.meta, self.row_ids, self.bot_ids = meta, rows, bot_ids   # meta is indexed by engine row
+        self.qty, self.entry, self.mark, self.margin = qty, entry, mark, margin
+        self.pnl, self.roi = pnl, roi
+        self.bots, self.accounts, self.at = bots, accounts, at
+
+    def rows(self, bot_id: Optional[int] = None, symbol: Optional[str] = None) -> List[dict]:
+        out = []
+        picked = np.flatnonzero(self.bot_ids == bot_id) if bot_id else range(len(self.row_ids))
+        for i in picked:
+            m = self.meta[self.row_ids[i]]
+            if symbol and m['symbol'] != symbol:
+                continue
+            out.append({'id': m['ref'].id if m['ref'] is not None else None, 'bot_id': m['bot_id'],
+                        'account_id': m['account_id'], 'symbol': m['symbol'],
+                        'side': 'LONG' if self.qty[i] > 0 else 'SHORT', 'quantity': abs(float(self.qty[i])),
+                        'entry_price': float(self.entry[i]), 'mark_price': float(self.mark[i]),
+                        'entry_time': m['opened'].isoformat() if m['opened'] else None,
+                        'margin_used': float(self.margin[i]), 'unrealised_pnl': round(float(self.pnl[i]), 4),
+                        'roi_percent': round(float(self.roi[i]), 2)})
+        return out
+
+    def bot(self, bot_id) -> dict:
+        return self.bots.get(bot_id) or _totals(0, 0.0, 0.0)
+
+    def account(self, account_id) -> dict:
+        return self.accounts.get(account_id) or _totals(0, 0.0, 0.0)
+
+def _totals(n, pnl, margin) -> dict:
+    return {'open_trades': int(n), 'unrealised_pnl': round(float(pnl), 4),
+            'unrealised_roi_percent': round(float(pnl) / float(margin) * 100, 2) if margin else 0.0}
+
+def _group(keys: np.ndarray, pnl: np.ndarray, margin: np.ndarray) -> Dict[int, dict]:
+    if not len(keys):
+        return {}
+    ids, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse)
+    pnl_sum = np.bincount(inverse, weights=pnl)
+    margin_sum = np.bincount(inverse, weights=margin)
+    return {int(k): _totals(counts[i], pnl_sum[i], margin_sum[i]) for i, k in enumerate(ids)}
+
+class PnlEngine:
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._cols: Dict[Tuple[str, str], int] = {}        # (feed base, symbol) -> index into _marks
+        self._marks = np.full(64, np.nan)
+        self._rows: Dict[Tuple[int, int, str], int] = {}   # (account, bot, symbol) -> row
+        self._free: List[int] = []
+        self._size = 0                                     # rows ever used (high-water mark)
+        self._qty = np.zeros(capacity)
+        self._entry = np.zeros(capacity)
+        self._margin = np.zeros(capacity)
+        self._col = np.zeros(capacity, dtype=np.int64)
+        self._bot = np.zeros(capacity, dtype=np.int64)
+        self._account = np.zeros(capacity, dtype=np.int64)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._meta: List[Optional[dict]] = [None] * capacity
+        self._snapshot: Optional[PnlSnapshot] = None
+        self._changed = True
+
+    # ---- state updates (user-data stream and mark streams) ----
+    def _column(self, base: str, symbol: str) -> int:
+        key = (base, symbol.upper())
+        col = self._cols.get(key)
+        if col is None:
+            col = self._cols[key] = len(self._cols)
+            if col >= len(self._marks):
+                self._marks = np.concatenate([self._marks, np.full(len(self._marks), np.nan)])
+        return col
+
+    def set_mark(self, base: str, symbol: str, price: float):
+        with self._lock:
+            col = self._cols.get((base, symbol.upper()))
+            if col is not None:
+                self._marks[col] = price
+                self._changed = True
+
+    def _grow(self):
+        n = len(self._qty)
+        for name in ('_qty', '_entry', '_margin', '_col', '_bot', '_account', '_active'):
+            arr = getattr(self, name)
+            setattr(self, name, np.concatenate([arr, np.zeros(n, dtype=arr.dtype)]))
+        self._meta.extend([None] * n)
+
+    def track(self, account_id: int, bot_id: int, symbol: str, amount: float, entry: float, margin: float,
+              ref=None, opened: Optional[datetime] = None, feed: Optional[MarkPriceFeed] = None):
+        """Add or update the open trade of (account, bot, symbol); ``amount`` is signed."""
+        key = (account_id, bot_id, symbol)
+        with self._lock:
+            row = self._rows.get(key)
+            new = row is None
+            if new:
+                if self._free:
+                    row = self._free.pop()
+                else:
+                    if self._size == len(self._qty):
+                        self._grow()
+                    row, self._size = self._size, self._size + 1
+                self._rows[key] = row
+                self._col[row] = self._column(feed.base if feed else '', symbol)
+                self._bot[row], self._account[row] = bot_id, account_id
+                self._active[row] = True
+                self._meta[row] = {'account_id': account_id, 'bot_id': bot_id, 'symbol': symbol, 'ref': ref,
+                                   'opened': opened, 'feed': feed}
+            self._qty[row], self._entry[row], self._margin[row] = amount, entry, margin
+            self._changed = True
+        if new and feed is not None:
+            feed.subscribe(symbol)
+
+    def untrack(self, account_id: int, bot_id: int, symbol: str):
+        with self._lock:
+            row = self._rows.pop((account_id, bot_id, symbol), None)
+            if row is None:
+                return
+            feed = self._meta[row]['feed']
+            self._active[row] = False
+            self._meta[row] = None
+            self._free.append(row)
+            self._changed = True
+        if feed is not None:
+            feed.unsubscribe(symbol)
+
+    def open_count(self) -> int:
+        return len(self._rows)
+
+    # ---- reads ----
+    def snapshot(self) -> PnlSnapshot:
+        """PnL of every open trade and its totals, recomputed at most once per ``PNL_REFRESH_MS``."""
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and (not self._changed or time.time() - snap.at < PNL_REFRESH_MS / 1000):
+                return snap
+            t0 = time.perf_counter()
+            rows = np.flatnonzero(self._active[:self._size])
+            qty, entry, margin = self._qty[rows], self._entry[rows], self._margin[rows]
+            mark = self._marks[self._col[rows]]
+            mark = np.where(np.isnan(mark), entry, mark)
+            pnl = qty * (mark - entry)
+            roi = np.divide(pnl * 100, margin, out=np.zeros_like(pnl), where=margin > 0)
+            bot_ids = self._bot[rows]
+            bots = _group(bot_ids, pnl, margin)
+            accounts = _group(self._account[rows], pnl, margin)
+            self._snapshot = PnlSnapshot(list(self._meta), rows, bot_ids, qty, entry, mark, margin, pnl, roi,
+                                         bots, accounts, time.time())
+            self._changed = False
+        compute_seconds.observe(time.perf_counter() - t0)
+        return self._snapshot
+
+pnl_engine = PnlEngine()
+
+metrics.gauge('omlol_open_trades_tracked', 'Open trades in the unrealised PnL engine', pnl_engine.open_count)
+
+_feeds: Dict[str, MarkPriceFeed] = {}
+_feeds_lock = threading.Lock()
+
+def get_mark_price_feed(testnet: bool = False, simulated: bool = False) -> MarkPriceFeed:
+    """Return the shared mark price feed for mainnet, testnet or the simulated exchange."""
+    base = 'sim' if simulated else futures_ws_url(testnet)
+    with _feeds_lock:
+        feed = _feeds.get(base)
+        if feed is None:
+            if simulated:
+                from .utils.sim_exchange import SimStream
+                feed = _feeds[base] = MarkPriceFeed(base, stream_factory=SimStream.factory())
+            else:
+                feed = _feeds[base] = MarkPriceFeed(base)
+        return feed
@@ -0,0 +1,188 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+def _local_now_ms() -> int:
+    return int(time.time() * 1000)
+
+class LocalClock:
+    """Fallback exchange clock: trusts the local clock (offset 0)."""
+
+    def offset_ms(self) -> float:
+        return 0.0
+
+    def now_ms(self) -> int:
+        return _local_now_ms()
+
+local_clock = LocalClock()
+
+class CandleScheduler:
+    """Central candle-boundary scheduler for all (bot, symbol) traders.
+
+    One dispatcher thread sleeps until the next candle open of every active
+    (exchange clock, timeframe) pair and wakes once per boundary. Boundaries
+    are computed on the exchange clock (``utils.exchange_clock``) and converted
+    to local time for sleeping, so no trader asks Binance for the time. The traders due at that boundary are
+    queued, ordered by priority and staggered in small bursts, and run by a
+    fixed pool of worker threads - the thread count no longer depends on how
+    many bots and symbols are running.
+
+    A job is any object exposing ``key`` (bot_id, symbol), ``bot_id``,
+    ``interval_ms``, ``clock``, ``stop_event``, ``ready``, ``priority()``, ``setup()``,
+    ``run_cycle()`` and optionally ``teardown()``; see ``bot_logic.SymbolTrader``.
+    """
+
+    def __init__(self, max_workers: int = 16, burst_size: int = 10, stagger_ms: int = 100,
+                 now_ms: Optional[Callable[[], int]] = None):
+        self.max_workers = max_workers
+        self.burst_size = max(1, burst_size)
+        self.stagger_ms = stagger_ms
+        self.now_ms = now_ms or _local_now_ms
+        self._cond = threading.Condition()
+        self._jobs: Dict[Tuple[int, str], object] = {}
+        self._by_group: Dict[tuple, set] = {}          # (clock, interval_ms) -> job keys
+        self._boundaries: List[tuple] = []             # heap of (local_ms, seq, server_boundary_ms, group)
+        self._scheduled: set = set()                   # groups present in _boundaries
+        self._tasks: List[tuple] = []                  # heap of (not_before_ms, priority, seq, kind, job)
+        self._seq = itertools.count()
+        self._busy: Dict[Tuple[int, str], threading.Event] = {}
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self.missed_cycles = 0
+
+    # ---- lifecycle ----
+    def _ensure_started(self):
+        if self._started:
+            return
+        self._started = True
+        t = threading.Thread(target=self._dispatch_loop, name='candle-dispatcher', daemon=True)
+        t.start()
+        self._threads.append(t)
+        for i in range(self.max_workers):
+            w = threading.Thread(target=self._worker_loop, name=f'candle-worker-{i}', daemon=True)
+            w.start()
+            self._threads.append(w)
+
+    def add(self, job):
+        """Register a trader; its setup runs on the pool right away and its
+        first cycle at the next boundary of its timeframe after setup."""
+        with self._cond:
+            self._ensure_started()
+            self._jobs[job.key] = job
+            idle = threading.Event(); idle.set()
+            self._busy[job.key] = idle
+            group = self._group(job)
+            self._by_group.setdefault(group, set()).add(job.key)
+            if group not in self._scheduled:
+                self._scheduled.add(group)
+                clock, interval = group
+                now = clock.now_ms()
+                self._push_boundary(now - (now % interval) + interval, group)
+            self._push_task(self.now_ms(), 0, 'setup', job)
+            self._cond.notify_all()
+
+    def remove_bot(self, bot_id: int, timeout: float = 5.0):
+        """Drop every job of a bot and wait (bounded) for in-flight cycles to end."""
+        with self._cond:
+            keys = [k for k in self._jobs if k[0] == bot_id]
+            idle = [self._busy.pop(k) for k in keys if k in self._busy]
+            jobs = [self._jobs.pop(k) for k in keys]
+            for job in jobs:
+                self._by_group.get(self._group(job), set()).discard(job.key)
+            self._cond.notify_all()
+        deadline = time.time() + timeout
+        for ev in idle:
+            ev.wait(max(0.0, deadline - time.time()))
+        for job in jobs:
+            teardown = getattr(job, 'teardown', None)
+            if teardown:
+                try:
+                    teardown()
+                except Exception as e:
+                    print(f"Scheduler: teardown failed for {job.key}: {e}")
+
+    def job_count(self) -> int:
+        return len(self._jobs)
+
+    # ---- internals ----
+    @staticmethod
+    def _group(job) -> tuple:
+        return (getattr(job, 'clock', None) or local_clock, job.interval_ms)
+
+    def _push_boundary(self, server_boundary: int, group: tuple):
+        # Re-read the clock offset for every boundary so drift corrections apply.
+        local = int(server_boundary - group[0].offset_ms())
+        heapq.heappush(self._boundaries, (local, next(self._seq), server_boundary, group))
+
+    def _push_task(self, not_before: int, priority: int, kind: str, job):
+        heapq.heappush(self._tasks, (not_before, priority, next(self._seq), kind, job))
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while not self._boundaries:
+                    self._cond.wait()
+                local, _, server_boundary, group = self._boundaries[0]
+                wait_ms = local - self.now_ms()
+                if wait_ms > 0:
+                    self._cond.wait(wait_ms / 1000.0)
+                    continue
+                heapq.heappop(self._boundaries)
+                members = self._by_group.get(group)
+                if not members:
+                    self._by_group.pop(group, None)
+                    self._scheduled.discard(group)
+                    continue
+                self._push_boundary(server_boundary + group[1], group)
+                self._enqueue_due(local, [self._jobs[k] for k in members])
+                self._cond.notify_all()
+
+    def _enqueue_due(self, boundary: int, jobs: list):
+        due = []
+        for job in jobs:
+            if job.stop_event.is_set() or not job.ready:
+                continue
+            if not self._busy[job.key].is_set():
+                # previous cycle still running; never run one trader twice at once
+                self.missed_cycles += 1
+                continue
+            due.append((job.priority(), job))
+        due.sort(key=lambda p: p[0])
+        for i, (prio, job) in enumerate(due):
+            not_before = boundary + (i // self.burst_size) * self.stagger_ms
+            self._push_task(not_before, prio, 'cycle', job)
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._tasks:
+                        wait_ms = self._tasks[0][0] - self.now_ms()
+                        if wait_ms <= 0:
+                            break
+                        self._cond.wait(wait_ms / 1000.0)
+                    else:
+                        self._cond.wait()
+                _, _, _, kind, job = heapq.heappop(self._tasks)
+                idle = self._busy.get(job.key)
+                if idle is None or self._jobs.get(job.key) is not job or job.stop_event.is_set():
+                    continue
+                idle.clear()
+            try:
+                if kind == 'setup':
+                    job.setup()
+                else:
+                    job.run_cycle()
+            except Exception as e:
+                print(f"Scheduler: {kind} failed for {job.key}: {e}")
+            finally:
+                idle.set()
+
+scheduler = CandleScheduler(
+    max_workers=int(os.environ.get('SCHEDULER_MAX_WORKERS', 16)),
+    burst_size=int(os.environ.get('SCHEDULER_BURST_SIZE', 10)),
+    stagger_ms=int(os.environ.get('SCHEDULER_STAGGER_MS', 100)),
+)
@@ -0,0 +1,120 @@
+import threading
+from typing import Dict, Tuple
+
+from sqlalchemy import event, func, case, inspect
+from sqlalchemy.orm import Session
+
+from .models import Trade
+
+def _contribution(pnl) -> Tuple[int, int, int, float, float]:
+    pnl = pnl or 0.0
+    return (1, 1 if pnl > 0 else 0, 1 if pnl < 0 else 0, max(0.0, pnl), min(0.0, pnl))
+
+class SummaryStore:
+    """Running per-bot and per-(bot, symbol) trade aggregates kept in memory.
+
+    Rebuilt with one GROUP BY at start-up, then updated from committed Trade
+    inserts/updates/deletes, so reading a bot's summary is O(1) regardless of
+    how many trades it has. Each bot carries a version that changes whenever
+    its aggregates do.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bots: Dict[int, list] = {}
+        self._symbols: Dict[Tuple[int, str], list] = {}
+        self._versions: Dict[int, int] = {}
+
+    def rebuild(self):
+        pnl = func.coalesce(Trade.pnl, 0.0)
+        rows = Trade.query.session.query(
+            Trade.bot_id, Trade.symbol, func.count(Trade.id),
+            func.sum(case((pnl > 0, 1), else_=0)),
+            func.sum(case((pnl < 0, 1), else_=0)),
+            func.sum(case((pnl > 0, pnl), else_=0.0)),
+            func.sum(case((pnl < 0, pnl), else_=0.0)),
+        ).group_by(Trade.bot_id, Trade.symbol).all()
+        bots: Dict[int, list] = {}
+        symbols: Dict[Tuple[int, str], list] = {}
+        for bot_id, symbol, total, wins, losses, profit, loss in rows:
+            agg = [int(total or 0), int(wins or 0), int(losses or 0), float(profit or 0.0), float(loss or 0.0)]
+            symbols[(bot_id, symbol)] = agg
+            b = bots.setdefault(bot_id, [0, 0, 0, 0.0, 0.0])
+            for i, v in enumerate(agg):
+                b[i] += v
+        with self._lock:
+            self._bots, self._symbols = bots, symbols
+            for bot_id in set(self._versions) | set(bots):
+                self._versions[bot_id] = self._versions.get(bot_id, 0) + 1
+
+    def apply(self, bot_id, symbol, delta, sign: int):
+        if bot_id is None:
+            return
+        with self._lock:
+            for agg in (self._bots.setdefault(bot_id, [0, 0, 0, 0.0, 0.0]),
+                        self._symbols.setdefault((bot_id, symbol), [0, 0, 0, 0.0, 0.0])):
+                for i, v in enumerate(delta):
+                    agg[i] += sign * v
+            self._versions[bot_id] = self._versions.get(bot_id, 0) + 1
+
+    def version(self, bot_id) -> int:
+        return self._versions.get(bot_id, 0)
+
+    def _as_dict(self, bot_id, agg) -> dict:
+        total, wins, losses, profit, loss = agg or (0, 0, 0, 0.0, 0.0)
+        return {
+            'bot_id': bot_id,
+            'total_trades': total,
+            'win_trades': wins,
+            'loss_trades': losses,
+            'breakeven_trades': total - wins - losses,
+            'total_profit': round(profit, 2),
+            'total_loss': round(loss, 2),
+            'net_pnl': round(profit + loss, 2),
+        }
+
+    def bot_summary(self, bot_id) -> dict:
+        with self._lock:
+            return self._as_dict(bot_id, list(self._bots.get(bot_id) or ()))
+
+    def symbol_summaries(self, bot_id) -> Dict[str, dict]:
+        with self._lock:
+            items = [(sym, list(agg)) for (b, sym), agg in self._symbols.items() if b == bot_id]
+        return {sym: self._as_dict(bot_id, agg) for sym, agg in items}
+
+store = SummaryStore()
+
+# ---- keep the store in step with committed Trade changes ----
+_PENDING = 'summary_store_pending'
+
+def _old_value(obj, attr):
+    hist = inspect(obj).attrs[attr].history
+    if hist.deleted:
+        return hist.deleted[0]
+    return getattr(obj, attr)
+
+@event.listens_for(Session, 'after_flush')
+def _collect(session, flush_context):
+    pending = session.info.setdefault(_PENDING, [])
+    for obj in session.new:
+        if isinstance(obj, Trade):
+            pending.append((obj.bot_id, obj.symbol, _contribution(obj.pnl), 1))
+    for obj in session.dirty:
+        if isinstance(obj, Trade) and session.is_modified(obj, include_collections=False):
+            old = (_old_value(obj, 'bot_id'), _old_value(obj, 'symbol'), _old_value(obj, 'pnl'))
+            new = (obj.bot_id, obj.symbol, obj.pnl)
+            if old != new:
+                pending.append((old[0], old[1], _contribution(old[2]), -1))
+                pending.append((new[0], new[1], _contribution(new[2]), 1))
+    for obj in session.deleted:
+        if isinstance(obj, Trade):
+            pending.append((_old_value(obj, 'bot_id'), _old_value(obj, 'symbol'), _contribution(_old_value(obj, 'pnl')), -1))
+
+@event.listens_for(Session, 'after_commit')
+def _apply(session):
+    for bot_id, symbol, delta, sign in session.info.pop(_PENDING, []):
+        store.apply(bot_id, symbol, delta, sign)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,96 @@
+from flask import Blueprint, Response, jsonify
+
+from ..bot_logic import running_bots
+from ..scheduler import scheduler
+from ..user_data import user_streams
+from ..utils import metrics
+from ..utils.exchange_clock import all_clocks
+from ..utils.rate_governor import governor
+
+system_bp = Blueprint('system', __name__)
+
+def _traders_by_state():
+    traders = [t for info in list(running_bots.values()) for t in list(info['traders'].values())]
+    ready = sum(1 for t in traders if t.ready)
+    return {(('state', 'ready'),): ready, (('state', 'starting'),): len(traders) - ready}
+
+metrics.gauge('omlol_active_traders', 'Symbol traders of running bots', _traders_by_state)
+metrics.gauge('omlol_running_bots', 'Bots currently running', lambda: len(running_bots))
+metrics.gauge('omlol_scheduler_jobs', 'Traders registered with the candle scheduler', scheduler.job_count)
+metrics.gauge('omlol_scheduler_missed_cycles_total', 'Trade cycles skipped because the previous one was still running',
+              lambda: scheduler.missed_cycles, kind='counter')
+metrics.gauge('omlol_user_streams', 'Account user-data streams by state',
+              lambda: {(('state', state),): sum(1 for s in user_streams() if s.connected == (state == 'connected'))
+                       for state in ('connected', 'disconnected')})
+metrics.gauge('omlol_user_stream_events_total', 'User-data events received',
+              lambda: sum(s.events for s in user_streams()), kind='counter')
+metrics.gauge('omlol_rate_rejected_total', 'Calls refused by the rate governor by priority',
+              lambda: {(('priority', p),): n for p, n in governor.snapshot()['rejected'].items()}, kind='counter')
+
+@system_bp.route('/api/system/clock', methods=['GET'])
+def clock_status():
+    """Exchange clock offset / RTT / jitter and scheduler state
+    ---
+      tags:
+        - System
+      responses:
+        200:
+          description: OK
+          content:
+            application/json:
+              example:
+                success: true
+                clocks:
+                  - base_url: https://fapi.binance.com
+                    offset_ms: -3.2
+                    rtt_ms: 41.7
+                    jitter_ms: 1.4
+                    drift_ppm: 0.8
+                    samples: 16
+                    last_sample_age_s: 12.3
+                    errors: 0
+                scheduler:
+                  jobs: 20
+                  missed_cycles: 0
+    """
+    return jsonify({'success': True,
+                    'clocks': [c.stats() for c in all_clocks()],
+                    'scheduler': {'jobs': scheduler.job_count(), 'missed_cycles': scheduler.missed_cycles}})
+
+@system_bp.route('/api/system/rate-limits', methods=['GET'])
+def rate_limits():
+    """Binance request-weight and order-rate headroom
+    ---
+      tags:
+        - System
+      responses:
+        200:
+          description: OK
+          content:
+            application/json:
+              example:
+                success: true
+                limits:
+                  ip:
+                    fapi.binance.com: {weight_limit: 2400, weight_headroom: 2210, headroom_pct: 92.1, banned_for_s: 0}
+                  accounts:
+                    '1': {10s: {limit: 300, headroom: 296}, 1m: {limit: 1200, headroom: 1180}}
+                  rejected: {order: 0, trading: 0, ui: 3}
+                  waited_s: 0.0
+    """
+    return jsonify({'success': True, 'limits': governor.snapshot()})
+
+@system_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrics (text exposition format)
+    ---
+      tags:
+        - System
+      produces:
+        - text/plain
+      responses:
+        200:
+          description: trade cycle stage histograms, Binance REST latency/errors by endpoint and code,
+            active traders, scheduler and summary broadcaster metrics
+    """
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,166 @@
+"""Write-behind persistence of ``Trade`` rows: one writer thread, grouped transactions.
+
+Producers (the user-data streams) enqueue inserts and updates and return at
+once; the writer commits them in batches of up to ``TRADE_WRITE_BATCH`` rows, at
+least every ``TRADE_WRITE_FLUSH_MS``. Changes go through the ORM session, so the
+summary store and bot versions see them like any other commit. The queue is
+bounded (``TRADE_WRITE_QUEUE``): when the database falls that far behind,
+producers wait for room (back-pressure) instead of growing memory without limit.
+"""
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from . import db, get_app
+from .models import Trade
+from .utils import metrics
+
+TRADE_WRITE_BATCH = int(os.getenv('TRADE_WRITE_BATCH', '500'))
+TRADE_WRITE_FLUSH_MS = int(os.getenv('TRADE_WRITE_FLUSH_MS', '200'))
+TRADE_WRITE_QUEUE = int(os.getenv('TRADE_WRITE_QUEUE', '20000'))
+# failed attempts of a batch before it is committed row by row, skipping the rows that fail
+BATCH_RETRIES = 5
+
+batch_seconds = metrics.histogram('omlol_trade_write_batch_seconds', 'Commit time of one batch of Trade writes')
+rows_written = metrics.counter('omlol_trade_write_rows_total', 'Trade inserts and updates committed')
+
+class TradeRef:
+    """Handle of a Trade row; ``id`` is set once the writer has inserted it."""
+
+    __slots__ = ('id',)
+
+    def __init__(self, id: Optional[int] = None):
+        self.id = id
+
+class TradeWriter:
+    def __init__(self, batch: int = TRADE_WRITE_BATCH, flush_ms: int = TRADE_WRITE_FLUSH_MS,
+                 max_queue: int = TRADE_WRITE_QUEUE, app=None):
+        self.batch = batch
+        self.flush_ms = flush_ms
+        self.app = app
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._thread = None
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.waited_s = 0.0
+
+    # ---- producers ----
+    def _put(self, op):
+        self._ensure_started()
+        with self._lock:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(op)
+        except queue.Full:
+            started = time.perf_counter()
+            self._queue.put(op)   # back-pressure: wait for the writer to make room
+            self.waited_s += time.perf_counter() - started
+
+    def insert(self, **fields) -> TradeRef:
+        ref = TradeRef()
+        self._put(('insert', ref, fields))
+        return ref
+
+    def update(self, ref: TradeRef, **fields):
+        self._put(('update', ref, fields))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything enqueued so far is committed."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    # ---- writer ----
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='trade-writer', daemon=True)
+                    self._thread.start()
+
+    def _take(self) -> List[tuple]:
+        ops = [self._queue.get()]
+        deadline = time.time() + self.flush_ms / 1000
+        while len(ops) < self.batch:
+            remaining = deadline - time.time()
+            try:
+                ops.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return ops
+
+    def _commit(self, ops: List[tuple]):
+        rows: Dict[TradeRef, Trade] = {}
+        for kind, ref, fields in ops:
+            if kind == 'insert':
+                rows[ref] = Trade(**fields)
+                db.session.add(rows[ref])
+                continue
+            trade = rows.get(ref)
+            if trade is None and ref.id is not None:
+                trade = rows[ref] = db.session.get(Trade, ref.id)
+            if trade is not None:
+                for name, value in fields.items():
+                    setattr(trade, name, value)
+        db.session.commit()
+        for ref, trade in rows.items():
+            if trade is not None:
+                ref.id = trade.id
+
+    def _commit_each(self, ops: List[tuple]):
+        for op in ops:
+            try:
+                self._commit([op])
+            except Exception as e:
+                db.session.rollback()
+                print(f"Trade writer: dropped {op[0]} of trade {op[1].id}: {e}")
+
+    def _run(self):
+        with (self.app or get_app()).app_context():
+            while True:
+                ops = self._take()
+                backoff = 0.1
+                started = time.perf_counter()
+                for attempt in range(BATCH_RETRIES + 1):
+                    try:
+                        if attempt == BATCH_RETRIES:
+                            self._commit_each(ops)
+                        else:
+                            self._commit(ops)
+                        break
+                    except Exception as e:
+                        db.session.rollback()
+                        self.failures += 1
+                        print(f"Trade writer: batch of {len(ops)} failed ({e}); retrying in {backoff:.1f}s")
+                        time.sleep(backoff)
+                        backoff = min(backoff * 2, 5.0)
+                    finally:
+                        db.session.remove()
+                batch_seconds.observe(time.perf_counter() - started)
+                rows_written.inc(amount=len(ops))
+                self.written += len(ops)
+                self.batches += 1
+                with self._idle:
+                    self._pending -= len(ops)
+                    if not self._pending:
+                        self._idle.notify_all()
+
+trade_writer = TradeWriter()
+
+metrics.gauge('omlol_trade_write_queue', 'Trade writes waiting for the writer', trade_writer.depth)
+metrics.gauge('omlol_trade_write_wait_seconds_total', 'Time producers waited for room in the write queue',
+              lambda: trade_writer.waited_s, kind='counter')
@@ -1,9 +1,11 @@
 
-from flask import request, jsonify
+from flask import request, jsonify, Response, stream_with_context
+from sqlalchemy import or_
 from . import trades_bp
 from ..models import Trade
 from .. import db
 from datetime import datetime
+import base64, csv, io, json, zlib
 
 def parse_datetime(s):
     if not s:
@@ -16,9 +18,76 @@ def parse_datetime(s):
     except Exception:
         return None
 
+CURSOR_MAX_PAGE_SIZE = 1000
+
+# Newest first; rows without entry_time (the column allows NULL) come last, by id.
+NEWEST_FIRST = (Trade.entry_time.desc().nulls_last(), Trade.id.desc())
+
+def encode_cursor(t: Trade) -> str:
+    raw = json.dumps([t.entry_time.isoformat() if t.entry_time else None, t.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(s: str):
+    """(entry_time or None, id) from an opaque cursor; raises ValueError if it is malformed."""
+    try:
+        entry, trade_id = json.loads(base64.urlsafe_b64decode(s + '=' * (-len(s) % 4)))
+        return (datetime.fromisoformat(entry) if entry is not None else None), int(trade_id)
+    except Exception:
+        raise ValueError('invalid cursor')
+
+def filtered_trades(args):
+    """Trade query for the bot_id/symbol/from/to filters shared by the trade listing routes."""
+    q = Trade.query
+    bot_id = args.get('bot_id', type=int)
+    symbol = args.get('symbol', type=str)
+    dt_from = parse_datetime(args.get('from'))
+    dt_to = parse_datetime(args.get('to'))
+    if bot_id:
+        q = q.filter(Trade.bot_id == bot_id)
+    if symbol:
+        q = q.filter(Trade.symbol == symbol)
+    if dt_from:
+        q = q.filter(Trade.entry_time >= dt_from)
+    if dt_to:
+        q = q.filter(Trade.exit_time <= dt_to)
+    return q
+
+def trade_row(t: Trade) -> dict:
+    return {
+        'id': t.id,
+        'bot_id': t.bot_id,
+        'symbol': t.symbol,
+        'entry_price': t.entry_price,
+        'exit_price': t.exit_price,
+        'entry_time': t.entry_time.isoformat() if t.entry_time else None,
+        'exit_time': t.exit_time.isoformat() if t.exit_time else None,
+        'margin_used': t.margin_used,
+        'quantity': t.quantity,
+        'fees': t.fees,
+        'pnl': t.pnl,
+        'roi_percent': t.roi_percent,
+        'close_reason': t.close_reason,
+        'side': t.side,
+    }
+
+def _estimated_total(args):
+    """Trade count from the in-memory summary store when only bot_id (and symbol) filter the list."""
+    bot_id = args.get('bot_id', type=int)
+    if not bot_id or args.get('from') or args.get('to'):
+        return None
+    from ..summary_store import store
+    symbol = args.get('symbol', type=str)
+    if symbol:
+        summary = store.symbol_summaries(bot_id).get(symbol)
+        return summary['total_trades'] if summary else 0
+    return store.bot_summary(bot_id)['total_trades']
+
 @trades_bp.route('/api/trades', methods=['GET'])
 def list_trades():
     """List historical trades
+    Newest first. Pass ``cursor`` (empty for the first page, then the returned
+    ``next_cursor``) for keyset pagination: every page costs the same and no
+    COUNT runs unless ``with_total=1``. ``page``/``page_size`` still work.
     ---
       tags:
         - Trades
@@ -41,54 +110,148 @@ def list_trades():
         - in: query
           name: page_size
           schema: {type: integer}
+        - in: query
+          name: cursor
+          schema: {type: string}
+        - in: query
+          name: with_total
+          schema: {type: boolean}
     """
-    q = Trade.query
-    bot_id = request.args.get('bot_id', type=int)
-    symbol = request.args.get('symbol', type=str)
-    dt_from = parse_datetime(request.args.get('from'))
-    dt_to = parse_datetime(request.args.get('to'))
-    page = request.args.get('page', default=1, type=int)
+    q = filtered_trades(request.args)
     page_size = request.args.get('page_size', default=50, type=int)
+    cursor = request.args.get('cursor')
 
-    if bot_id:
-        q = q.filter(Trade.bot_id == bot_id)
-    if symbol:
-        q = q.filter(Trade.symbol == symbol)
-    if dt_from:
-        q = q.filter(Trade.entry_time >= dt_from)
-    if dt_to:
-        q = q.filter(Trade.exit_time <= dt_to)
-
-    q = q.order_by(Trade.entry_time.desc())
-    items = q.paginate(page=page, per_page=page_size, error_out=False)
-
-    def row(t: Trade):
-        return {
-            'id': t.id,
-            'bot_id': t.bot_id,
-            'symbol': t.symbol,
-            'entry_price': t.entry_price,
-            'exit_price': t.exit_price,
-            'entry_time': t.entry_time.isoformat() if t.entry_time else None,
-            'exit_time': t.exit_time.isoformat() if t.exit_time else None,
-            'margin_used': t.margin_used,
-            'pnl': t.pnl,
-            'roi_percent': t.roi_percent,
-            'close_reason': t.close_reason,
-            'side': t.side,
-        }
+    if cursor is None:
+        page = request.args.get('page', default=1, type=int)
+        q = q.order_by(*NEWEST_FIRST)
+        items = q.paginate(page=page, per_page=page_size, error_out=False)
+        return jsonify({
+            'success': True,
+            'page': page,
+            'page_size': page_size,
+            'total': items.total,
+            'items': [trade_row(t) for t in items.items],
+            'next_cursor': encode_cursor(items.items[-1]) if items.has_next else None,
+        })
 
+    page_size = max(1, min(page_size, CURSOR_MAX_PAGE_SIZE))
+    if request.args.get('with_total') in ('1', 'true'):
+        total, estimated = q.order_by(None).count(), False
+    else:
+        total, estimated = _estimated_total(request.args), True
+    undated = q.filter(Trade.entry_time.is_(None))
+    if cursor:
+        try:
+            entry, last_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'invalid cursor'}), 400
+        if entry is None:
+            q = undated.filter(Trade.id < last_id)
+        else:
+            # entry_time <= x bounds the index range; the OR only breaks ties on id
+            q = q.filter(Trade.entry_time <= entry, or_(Trade.entry_time < entry, Trade.id < last_id))
+    rows = q.order_by(*NEWEST_FIRST).limit(page_size + 1).all()
+    if cursor and entry is not None and len(rows) <= page_size:
+        # dated rows ran out on this page: continue with the undated ones
+        rows += undated.order_by(Trade.id.desc()).limit(page_size + 1 - len(rows)).all()
+    items = rows[:page_size]
     return jsonify({
         'success': True,
-        'page': page,
         'page_size': page_size,
-        'total': items.total,
-        'items': [row(t) for t in items.items],
+        'total': total,
+        'total_estimated': estimated,
+        'items': [trade_row(t) for t in items],
+        'next_cursor': encode_cursor(items[-1]) if len(rows) > page_size else None,
     })
 
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = ['id', 'bot_id', 'symbol', 'entry_price', 'exit_price', 'entry_time', 'exit_time',
+                 'margin_used', 'quantity', 'fees', 'pnl', 'roi_percent', 'close_reason', 'side']
+
+def _export_chunks(rows, fmt):
+    """Encoded text chunks (one per batch) for an iterable of trade rows."""
+    buf = io.StringIO()
+    writer = csv.writer(buf) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(EXPORT_FIELDS)
+    n = 0
+    for r in rows:
+        row = trade_row(r)
+        if writer:
+            writer.writerow([row[f] for f in EXPORT_FIELDS])
+        else:
+            buf.write(json.dumps(row))
+            buf.write('\n')
+        n += 1
+        if n % EXPORT_BATCH_SIZE == 0:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+def _gzipped(chunks):
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+@trades_bp.route('/api/trades/export', methods=['GET'])
+def export_trades():
+    """Stream historical trades as NDJSON or CSV
+    Takes the same filters as ``/api/trades``, oldest first. Rows are read in
+    batches and written as they are produced, so memory stays flat however
+    many trades match. ``gzip=1`` compresses the stream.
+    ---
+      tags:
+        - Trades
+      parameters:
+        - in: query
+          name: bot_id
+          schema: {type: integer}
+        - in: query
+          name: symbol
+          schema: {type: string}
+        - in: query
+          name: from
+          schema: {type: string}
+        - in: query
+          name: to
+          schema: {type: string}
+        - in: query
+          name: format
+          schema: {type: string, enum: [ndjson, csv]}
+        - in: query
+          name: gzip
+          schema: {type: boolean}
+    """
+    fmt = (request.args.get('format') or 'ndjson').lower()
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'success': False, 'message': 'format must be ndjson or csv'}), 400
+    compress = request.args.get('gzip') in ('1', 'true')
+
+    # plain column rows instead of ORM objects: nothing piles up in the session
+    q = filtered_trades(request.args).with_entities(*Trade.__table__.columns)
+    q = q.order_by(Trade.entry_time.asc(), Trade.id.asc()).yield_per(EXPORT_BATCH_SIZE)
+
+    chunks = _export_chunks(q, fmt)
+    filename = f"trades.{fmt}"
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    if compress:
+        chunks, filename, mimetype = _gzipped(chunks), filename + '.gz', 'application/gzip'
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
 @trades_bp.route('/api/trades/open', methods=['GET'])
 def list_open_trades():
-    """List open (running) trades
+    """List open (running) trades with live unrealised PnL
+    ``unrealised_pnl``, ``roi_percent`` and ``mark_price`` come from the in-memory
+    PnL engine (mark price stream), not from Binance REST. Open trades the engine
+    does not track (their account's user-data stream is not running) are listed
+    from the database with ``mark_price`` null. ``totals`` sums the tracked
+    trades per bot and per account.
     ---
       tags:
         - Trades
@@ -100,15 +263,19 @@ def list_open_trades():
           name: symbol
           schema: {type: string}
     """
-    q = Trade.query.filter(Trade.exit_time.is_(None))
+    from ..pnl import pnl_engine
     bot_id = request.args.get('bot_id', type=int)
     symbol = request.args.get('symbol', type=str)
+    snap = pnl_engine.snapshot()
+    live = snap.rows(bot_id, symbol)
+    tracked = {r['id'] for r in live if r['id'] is not None}
+
+    q = Trade.query.filter(Trade.exit_time.is_(None))
     if bot_id:
         q = q.filter(Trade.bot_id == bot_id)
     if symbol:
         q = q.filter(Trade.symbol == symbol)
     q = q.order_by(Trade.entry_time.desc())
-    items = q.all()
 
     def row(t: Trade):
         return {
@@ -118,8 +285,17 @@ def list_open_trades():
             'entry_price': t.entry_price,
             'entry_time': t.entry_time.isoformat() if t.entry_time else None,
             'margin_used': t.margin_used,
+            'quantity': t.quantity,
             'roi_percent': t.roi_percent,
+            'unrealised_pnl': None,
+            'mark_price': None,
             'side': t.side,
         }
 
-    return jsonify({'success': True, 'items': [row(t) for t in items]})
+    items = live + [row(t) for t in q.all() if t.id not in tracked]
+    items.sort(key=lambda r: r['entry_time'] or '', reverse=True)
+    bots = {r['bot_id'] for r in live}
+    accounts = {r['account_id'] for r in live}
+    return jsonify({'success': True, 'items': items,
+                    'totals': {'bots': {b: snap.bot(b) for b in bots},
+                               'accounts': {a: snap.account(a) for a in accounts}}})
@@ -0,0 +1,367 @@
+"""Per-account user-data stream: order/position/balance state and Trade rows from real fills.
+
+One ``UserDataStream`` per account holds a listenKey (kept alive every
+``LISTEN_KEY_KEEPALIVE_S``) and reads ``<ws>/ws/<listenKey>``; simulated accounts
+subscribe to the in-process exchange instead. On every (re)connect the
+account's position book is resynced over REST once, then kept current from
+``ACCOUNT_UPDATE`` / ``ORDER_TRADE_UPDATE`` events, so trader reads need no REST
+while the stream is up. Fills are handed to ``execution.notify_order_update``
+and to a ``TradeRecorder`` that writes the ``Trade`` rows.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from websockets.sync.client import connect
+
+from . import db, get_app
+from .models import Bot, Trade
+from .pnl import get_mark_price_feed, pnl_engine
+from .trade_writer import TradeRef, trade_writer
+from .utils.binance_helper import futures_ws_url
+from .utils.client_pool import get_account_client
+from .utils.execution import bot_id_from_tag, notify_order_update
+from .utils.position_book import get_position_book
+
+# Binance expires a listenKey 60 min after the last keepalive.
+LISTEN_KEY_KEEPALIVE_S = float(os.getenv('LISTEN_KEY_KEEPALIVE_S', str(30 * 60)))
+QTY_EPSILON = 1e-9
+
+def _side(amount: float) -> str:
+    return 'LONG' if amount > 0 else 'SHORT'
+
+class TradeRecorder:
+    """Turns fills into ``Trade`` rows, one row per (bot, symbol) position from entry to flat.
+
+    Fills of our own orders carry the bot id in their clientOrderId
+    (``execution.order_tag``) and close with ``candle_close``. Untagged fills
+    (emergency close, manual orders) only reduce open bot trades on that symbol
+    and close them with ``manual_close``. Entry and exit prices are fill-weighted
+    averages; pnl is realised PnL minus USDT commissions of both legs, and ROI is
+    relative to ``margin_used`` (entry notional / bot leverage).
+
+    Rows are written through the write-behind ``trade_writer``; the recorder's
+    in-memory state is authoritative once loaded. Open trades are mirrored into
+    ``pnl_engine`` for live unrealised PnL.
+    """
+
+    def __init__(self, account_id, mark_feed=None):
+        self.account_id = account_id
+        self.mark_feed = mark_feed
+        self._open: Dict[Tuple[int, str], dict] = {}
+        self._leverage: Dict[int, float] = {}
+        self.opened = 0
+        self.closed = 0
+        self.loaded = False
+
+    def load(self):
+        """Continue the open trades of this account's bots after a restart (once per process)."""
+        if self.loaded:
+            return
+        rows = (Trade.query.join(Bot).filter(Bot.account_id == self.account_id, Trade.exit_time.is_(None),
+                                             Trade.quantity.isnot(None)).all())
+        self._open = {}
+        for t in rows:
+            amount = t.quantity if t.side == 'LONG' else -t.quantity
+            st = self._open[(t.bot_id, t.symbol)] = {
+                'ref': TradeRef(t.id), 'amount': amount, 'entry': t.entry_price or 0.0, 'fees': t.fees or 0.0,
+                'realised': 0.0, 'exit_qty': 0.0, 'exit_value': 0.0, 'margin': t.margin_used or 0.0,
+                'opened': t.entry_time}
+            self._track(t.bot_id, t.symbol, st)
+        self.loaded = True
+
+    def release(self):
+        """Stop reporting this account's open trades to the PnL engine (account removed)."""
+        for bot_id, symbol in list(self._open):
+            pnl_engine.untrack(self.account_id, bot_id, symbol)
+
+    def _track(self, bot_id, symbol, st):
+        pnl_engine.track(self.account_id, bot_id, symbol, st['amount'], st['entry'], st['margin'], st['ref'],
+                         st['opened'], self.mark_feed)
+
+    def _leverage_of(self, bot_id) -> float:
+        if bot_id not in self._leverage:
+            bot = Bot.query.get(bot_id)
+            self._leverage[bot_id] = float(bot.leverage or 1) if bot else 1.0
+        return self._leverage[bot_id]
+
+    def on_fill(self, bot_id: Optional[int], symbol: str, side: str, qty: float, price: float, fee: float, at: datetime):
+        sign = 1.0 if side == 'BUY' else -1.0
+        fee_per_qty = fee / qty
+        if bot_id is None:
+            # not ours: reduce whichever bot trades hold the other side of this symbol
+            for (b, s), st in list(self._open.items()):
+                if s == symbol and qty > QTY_EPSILON and (st['amount'] > 0) != (sign > 0):
+                    used = min(qty, abs(st['amount']))
+                    self._reduce(b, symbol, st, used, price, fee_per_qty * used, at, 'manual_close')
+                    qty -= used
+            return
+        st = self._open.get((bot_id, symbol))
+        if st is not None and (st['amount'] > 0) != (sign > 0):
+            # a reversal closes the old trade with part of the fill and opens the new one with the rest
+            used = min(qty, abs(st['amount']))
+            self._reduce(bot_id, symbol, st, used, price, fee_per_qty * used, at, 'candle_close')
+            qty -= used
+        if qty > QTY_EPSILON:
+            self._increase(bot_id, symbol, sign * qty, price, fee_per_qty * qty, at)
+
+    def _increase(self, bot_id, symbol, signed, price, fee, at):
+        margin = abs(signed) * price / self._leverage_of(bot_id)
+        st = self._open.get((bot_id, symbol))
+        if st is None:
+            ref = trade_writer.insert(bot_id=bot_id, symbol=symbol, entry_price=price, entry_time=at,
+                                      margin_used=margin, side=_side(signed), quantity=abs(signed), fees=fee)
+            st = self._open[(bot_id, symbol)] = {'ref': ref, 'amount': signed, 'entry': price, 'fees': fee,
+                                                 'realised': 0.0, 'exit_qty': 0.0, 'exit_value': 0.0,
+                                                 'margin': margin, 'opened': at}
+            self._track(bot_id, symbol, st)
+            self.opened += 1
+            return
+        total = st['amount'] + signed
+        st['entry'] = (st['entry'] * abs(st['amount']) + price * abs(signed)) / abs(total)
+        st['amount'], st['fees'], st['margin'] = total, st['fees'] + fee, st['margin'] + margin
+        trade_writer.update(st['ref'], entry_price=st['entry'], quantity=abs(total), fees=st['fees'],
+                            margin_used=st['margin'])
+        self._track(bot_id, symbol, st)
+
+    def _reduce(self, bot_id, symbol, st, qty, price, fee, at, reason):
+        direction = 1.0 if st['amount'] > 0 else -1.0
+        st['realised'] += (price - st['entry']) * qty * direction
+        st['fees'] += fee
+        st['exit_qty'] += qty
+        st['exit_value'] += qty * price
+        st['amount'] -= qty * direction
+        if abs(st['amount']) > QTY_EPSILON:
+            trade_writer.update(st['ref'], fees=st['fees'])
+            self._track(bot_id, symbol, st)
+            return
+        del self._open[(bot_id, symbol)]
+        pnl_engine.untrack(self.account_id, bot_id, symbol)
+        pnl = st['realised'] - st['fees']
+        trade_writer.update(st['ref'], exit_price=st['exit_value'] / st['exit_qty'], exit_time=at, fees=st['fees'],
+                            pnl=pnl, roi_percent=pnl / st['margin'] * 100 if st['margin'] else 0.0,
+                            close_reason=reason)
+        self.closed += 1
+
+    def reconcile(self, amounts: Dict[str, float], marks: Dict[str, float], at: datetime):
+        """Match open trades to the exchange's net position per symbol (after a REST resync).
+
+        Fills missed while the stream was down only show up as a changed
+        position. Trades on a symbol that is now flat or on the other side are
+        closed at the mark price with ``reconcile_close``; if the position is
+        smaller than the trades on its side, they are reduced by the difference
+        (largest first). A larger position is left alone: whatever added to it
+        did not come from a recorded bot order.
+        """
+        by_symbol: Dict[str, List[Tuple[int, dict]]] = {}
+        for (bot_id, symbol), st in self._open.items():
+            by_symbol.setdefault(symbol, []).append((bot_id, st))
+        for symbol, held in by_symbol.items():
+            amount = amounts.get(symbol, 0.0)
+            price = marks.get(symbol)
+            keep = []
+            for bot_id, st in held:
+                if abs(amount) <= QTY_EPSILON or (st['amount'] > 0) != (amount > 0):
+                    self._reduce(bot_id, symbol, st, abs(st['amount']), price or st['entry'], 0.0, at,
+                                 'reconcile_close')
+                else:
+                    keep.append((bot_id, st))
+            excess = sum(abs(st['amount']) for _, st in keep) - abs(amount)
+            for bot_id, st in sorted(keep, key=lambda k: -abs(k[1]['amount'])):
+                if excess <= QTY_EPSILON:
+                    break
+                used = min(excess, abs(st['amount']))
+                self._reduce(bot_id, symbol, st, used, price or st['entry'], 0.0, at, 'reconcile_close')
+                excess -= used
+
+class UserDataStream:
+    """User-data stream of one account in a daemon thread, reconnecting with backoff."""
+
+    def __init__(self, account_id, client, ws_base: Optional[str] = None, simulated: bool = False,
+                 mark_feed=None):
+        self.account_id = account_id
+        self.client = client
+        self.ws_base = ws_base
+        self.simulated = simulated
+        self.book = get_position_book(account_id)
+        self.recorder = TradeRecorder(account_id, mark_feed)
+        self.balances: Dict[str, dict] = {}
+        self.connected = False
+        self.events = 0
+        self.reconnects = 0
+        self.last_event_at = None
+        self._stop = threading.Event()
+        self._ws = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f'user-data-{self.account_id}', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        age = None if self.last_event_at is None else round(time.time() - self.last_event_at, 1)
+        return {'account_id': self.account_id, 'connected': self.connected, 'events': self.events,
+                'reconnects': self.reconnects, 'last_event_age_s': age,
+                'trades_opened': self.recorder.opened, 'trades_closed': self.recorder.closed}
+
+    # ---- connection ----
+    def _run(self):
+        backoff = 1.0
+        with get_app().app_context():
+            while not self._stop.is_set():
+                try:
+                    if self.simulated:
+                        self._consume_sim()
+                    else:
+                        self._consume_ws()
+                    backoff = 1.0
+                except Exception as e:
+                    if not self._stop.is_set():
+                        print(f"User-data stream of account {self.account_id} dropped: {e}; reconnecting in {backoff:.0f}s")
+                finally:
+                    self._disconnected()
+                if self._stop.is_set():
+                    break
+                self.reconnects += 1
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    def _resync(self):
+        """REST snapshot after (re)connecting.
+
+        The book, open orders and balances are replaced by it. Fills missed
+        while down are not replayed; the recorder only reconciles its open
+        trades against the positions (``TradeRecorder.reconcile``).
+        """
+        self.book.refresh_positions(self.client)
+        self.book.refresh_orders(self.client)
+        for b in self.client.futures_account_balance() or []:
+            self.balances[b['asset']] = {'wallet': float(b.get('balance') or 0),
+                                         'cross': float(b.get('crossWalletBalance') or b.get('balance') or 0)}
+        self.recorder.load()
+        amounts: Dict[str, float] = {}
+        marks: Dict[str, float] = {}
+        for symbol, rows in self.book.positions(self.client).items():
+            for p in rows:
+                amounts[symbol] = amounts.get(symbol, 0.0) + float(p.get('positionAmt') or 0)
+                if float(p.get('markPrice') or 0) > 0:
+                    marks[symbol] = float(p['markPrice'])
+        self.recorder.reconcile(amounts, marks, datetime.utcnow())
+        self.book.set_live(True)
+        self.connected = True
+
+    def _disconnected(self):
+        self.connected = False
+        self._ws = None
+        self.book.set_live(False)
+        db.session.remove()
+
+    def _consume_ws(self):
+        listen_key = self.client.futures_stream_get_listen_key()
+        with connect(f"{self.ws_base}/ws/{listen_key}", max_size=2 ** 22) as ws:
+            self._ws = ws
+            self._resync()
+            keepalive_at = time.time() + LISTEN_KEY_KEEPALIVE_S
+            while not self._stop.is_set():
+                if time.time() >= keepalive_at:
+                    self.client.futures_stream_keepalive(listenKey=listen_key)
+                    keepalive_at = time.time() + LISTEN_KEY_KEEPALIVE_S
+                try:
+                    raw = ws.recv(timeout=max(1.0, min(30.0, keepalive_at - time.time())))
+                except TimeoutError:
+                    continue
+                if self.handle(json.loads(raw)) == 'expired':
+                    return   # reconnect with a new listenKey
+
+    def _consume_sim(self):
+        from .utils.sim_exchange import get_sim_exchange
+        exchange = get_sim_exchange()
+        events: queue.Queue = queue.Queue()
+        exchange.subscribe_user(self.account_id, events.put)
+        try:
+            self._resync()
+            while not self._stop.is_set():
+                try:
+                    event = events.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                self.handle(event)
+        finally:
+            exchange.unsubscribe_user(self.account_id, events.put)
+
+    # ---- events ----
+    def handle(self, event: dict) -> Optional[str]:
+        kind = event.get('e')
+        self.events += 1
+        self.last_event_at = time.time()
+        try:
+            if kind == 'ORDER_TRADE_UPDATE':
+                self._on_order(event['o'])
+            elif kind == 'ACCOUNT_UPDATE':
+                self._on_account(event['a'])
+            elif kind == 'listenKeyExpired':
+                return 'expired'
+        except Exception as e:
+            db.session.rollback()
+            print(f"User-data event {kind} of account {self.account_id} failed: {e}")
+        return None
+
+    def _on_order(self, o: dict):
+        order = {'symbol': o['s'], 'orderId': o['i'], 'clientOrderId': o['c'], 'side': o['S'], 'type': o['o'],
+                 'status': o['X'], 'origQty': o['q'], 'price': o['p'], 'avgPrice': o['ap'],
+                 'executedQty': o['z'], 'reduceOnly': o.get('R', False), 'updateTime': o['T']}
+        self.book.apply_order(order)
+        notify_order_update(o['c'], order)
+        last_qty = float(o.get('l') or 0)
+        if o.get('x') == 'TRADE' and last_qty > 0:
+            # commissions paid in other assets (BNB discount) are not converted
+            fee = float(o.get('n') or 0) if o.get('N') in (None, 'USDT') else 0.0
+            self.recorder.on_fill(bot_id_from_tag(o['c']), o['s'], o['S'], last_qty, float(o['L']), fee,
+                                  datetime.utcfromtimestamp(int(o['T']) / 1000))
+
+    def _on_account(self, a: dict):
+        for b in a.get('B') or []:
+            self.balances[b['a']] = {'wallet': float(b['wb']), 'cross': float(b['cw'])}
+        for p in a.get('P') or []:
+            self.book.apply_position(p['s'], p['pa'], p['ep'], p.get('up', '0'), p.get('ps', 'BOTH'))
+
+_streams: Dict[object, UserDataStream] = {}
+_streams_lock = threading.Lock()
+
+def ensure_user_stream(account) -> UserDataStream:
+    """Start (once) the user-data stream of an account; called when one of its bots starts."""
+    with _streams_lock:
+        stream = _streams.get(account.id)
+        if stream is None:
+            simulated = bool(account.is_simulated)
+            stream = _streams[account.id] = UserDataStream(
+                account.id, get_account_client(account),
+                ws_base=None if simulated else futures_ws_url(bool(account.is_testnet)), simulated=simulated,
+                mark_feed=get_mark_price_feed(bool(account.is_testnet), simulated))
+            stream.start()
+        return stream
+
+def stop_user_stream(account_id):
+    with _streams_lock:
+        stream = _streams.pop(account_id, None)
+    if stream is not None:
+        stream.stop()
+        stream.recorder.release()
+
+def user_streams() -> List[UserDataStream]:
+    with _streams_lock:
+        return list(_streams.values())
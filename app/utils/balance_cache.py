@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+from .rate_governor import priority as rate_priority, UI
+
+# A balance younger than this is served without calling Binance.
+BALANCE_TTL = float(os.getenv('BALANCE_TTL', '15'))
+# How long a request waits for fresh balances before answering with cached ones.
+BALANCE_TIMEOUT = float(os.getenv('BALANCE_TIMEOUT', '3'))
+BALANCE_MAX_WORKERS = 8
+
+def usdt_futures_balance(client) -> Optional[float]:
+    """Available USDT on UM-Futures; None if the account has no USDT entry. Raises on API errors."""
+    balances = client.futures_account_balance()
+    usdt = next((b for b in balances if b.get('asset') == 'USDT'), None)
+    if not usdt:
+        return None
+    return float(usdt.get('withdrawAvailable') or usdt.get('balance') or 0)
+
+class BalanceCache:
+    """Short-TTL USDT balance per account, fetched concurrently.
+
+    Expired balances are refreshed on a shared pool with at most one fetch in
+    flight per account. Callers wait up to ``timeout`` for the refresh; an
+    account that is slower than that (or failing) is answered from its last
+    known balance and flagged stale, while the fetch finishes in the background.
+    """
+
+    def __init__(self, ttl: float = BALANCE_TTL, timeout: float = BALANCE_TIMEOUT, max_workers: int = BALANCE_MAX_WORKERS):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='balance')
+        self._lock = threading.Lock()
+        self._entries: Dict[int, dict] = {}
+        self._inflight = {}
+
+    def _fetch(self, account_id, client):
+        started = time.time()
+        try:
+            with rate_priority(UI):
+                bal = usdt_futures_balance(client)
+            with self._lock:
+                self._entries[account_id] = {'balance': bal, 'fetched_at': time.time(), 'attempted_at': started, 'error': None}
+        except Exception as e:
+            with self._lock:
+                entry = self._entries.setdefault(account_id, {'balance': None, 'fetched_at': None})
+                entry['attempted_at'] = started
+                entry['error'] = str(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(account_id, None)
+
+    def _submit(self, account_id, client):
+        with self._lock:
+            inflight = self._inflight.get(account_id)
+            if inflight is None:
+                inflight = self._inflight[account_id] = (self._pool.submit(self._fetch, account_id, client), time.time())
+            return inflight
+
+    def _view(self, account_id) -> dict:
+        now = time.time()
+        with self._lock:
+            entry = dict(self._entries.get(account_id) or {'balance': None, 'fetched_at': None, 'error': None})
+        age = None if entry['fetched_at'] is None else now - entry['fetched_at']
+        bal = entry['balance']
+        return {
+            'balance': round(bal, 2) if isinstance(bal, (int, float)) else None,
+            'balance_age_s': None if age is None else round(age, 1),
+            'balance_stale': age is None or age > self.ttl or bool(entry.get('error')),
+            'balance_error': entry.get('error'),
+        }
+
+    def get_many(self, clients: Dict[int, object], force: bool = False) -> Dict[int, dict]:
+        """Balances for ``{account_id: client}``, refreshing the expired ones concurrently."""
+        now = time.time()
+        futures, deadline = [], now
+        for account_id, client in clients.items():
+            with self._lock:
+                entry = self._entries.get(account_id)
+            # failed accounts are retried at most once per TTL, like successful ones
+            recent = entry and now - (entry.get('attempted_at') or 0) <= self.ttl
+            if force or not recent:
+                fut, submitted = self._submit(account_id, client)
+                futures.append(fut)
+                # a fetch left running by an earlier request only gets what remains of its timeout
+                deadline = max(deadline, submitted + self.timeout)
+        if futures:
+            wait(futures, timeout=max(0.0, deadline - now))
+        return {account_id: self._view(account_id) for account_id in clients}
+
+    def get(self, account_id, client, force: bool = False) -> dict:
+        return self.get_many({account_id: client}, force)[account_id]
+
+    def drop(self, account_id):
+        with self._lock:
+            self._entries.pop(account_id, None)
+
+balance_cache = BalanceCache()
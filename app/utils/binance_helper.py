@@ -1,9 +1,29 @@
 
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
+import time
+
+FUTURES_MAINNET_BASE = 'https://fapi.binance.com'
+FUTURES_TESTNET_BASE = 'https://testnet.binancefuture.com'
+FUTURES_MAINNET_WS = 'wss://fstream.binance.com'
+FUTURES_TESTNET_WS = 'wss://stream.binancefuture.com'
+
+# Concurrent symbols during an emergency close; keeps bursts well inside the order rate limits.
+CLOSE_MAX_WORKERS = 8
+
+def futures_base_url(testnet: bool=False) -> str:
+    """REST base URL of USDT-M Futures for mainnet or testnet."""
+    return FUTURES_TESTNET_BASE if testnet else FUTURES_MAINNET_BASE
+
+def futures_ws_url(testnet: bool=False) -> str:
+    """Websocket market-stream base of USDT-M Futures for mainnet or testnet."""
+    return FUTURES_TESTNET_WS if testnet else FUTURES_MAINNET_WS
 
 def get_client(api_key: str, api_secret: str, testnet: bool=False) -> Client:
+    """Build a standalone client. Routes and traders should use
+    ``client_pool.get_account_client(acc)`` to share the account's pooled client."""
     client = Client(api_key, api_secret, testnet=testnet)
     return client
 
@@ -16,7 +36,9 @@ def cancel_all_open_orders(client: Client, symbol: str):
             return
         raise
 
-def get_position_amt(client: Client, symbol: str) -> float:
+def get_position_amt(client: Client, symbol: str, book=None) -> float:
+    if book is not None:
+        return book.position_amt(client, symbol)
     pos_info = client.futures_position_information(symbol=symbol)
     if not pos_info:
         return 0.0
@@ -24,8 +46,8 @@ def get_position_amt(client: Client, symbol: str) -> float:
     amt = float(pos_info[0].get('positionAmt', 0) or 0)
     return amt
 
-def market_close_position(client: Client, symbol: str):
-    amt = get_position_amt(client, symbol)
+def market_close_position(client: Client, symbol: str, book=None):
+    amt = get_position_amt(client, symbol, book)
     if amt == 0:
         return False
     side = Client.SIDE_SELL if amt > 0 else Client.SIDE_BUY
@@ -36,22 +58,86 @@ def market_close_position(client: Client, symbol: str):
         type=Client.ORDER_TYPE_MARKET,
         quantity=qty
     )
+    if book is not None:
+        book.invalidate(symbol)
     return True
 
-def close_positions_and_cancel_orders(client: Client, symbols: List[str]) -> Dict[str, Any]:
-    result = {"closed": [], "cancelled": [], "errors": {}}
-    for sym in symbols:
-        # cancel open orders first to avoid rejection
+def _close_one(client: Client, sym: str, book=None) -> Dict[str, Any]:
+    """Cancel then market-close one symbol; returns its outcome and latency."""
+    started = time.perf_counter()
+    out = {"cancelled": False, "closed": False, "error": None}
+    # cancel open orders first to avoid rejection
+    try:
+        cancel_all_open_orders(client, sym)
+        out["cancelled"] = True
+        if book is not None:
+            book.invalidate(sym, positions=False)
+    except Exception as e:
+        out["error"] = f"cancel_error: {e}"
+
+    try:
+        out["closed"] = market_close_position(client, sym, book)
+    except Exception as e:
+        out["error"] = f"close_error: {e}"
+    out["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return out
+
+def close_positions_and_cancel_orders(client: Client, symbols: List[str], book=None,
+                                      max_workers: int = CLOSE_MAX_WORKERS) -> Dict[str, Any]:
+    """Cancel + close every symbol concurrently on a bounded pool.
+
+    Returns ``{"closed", "cancelled", "errors", "latency_ms"}`` with lists in
+    the order of ``symbols`` and per-symbol wall time in ``latency_ms``.
+    """
+    result = {"closed": [], "cancelled": [], "errors": {}, "latency_ms": {}}
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return result
+    if book is not None:
+        # one all-symbols snapshot instead of a position call per symbol
         try:
-            cancel_all_open_orders(client, sym)
+            book.refresh_positions(client)
+        except Exception:
+            pass
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as pool:
+        outcomes = dict(zip(symbols, pool.map(lambda sym: _close_one(client, sym, book), symbols)))
+    for sym in symbols:
+        out = outcomes[sym]
+        if out["cancelled"]:
             result["cancelled"].append(sym)
-        except Exception as e:
-            result["errors"][sym] = f"cancel_error: {e}"
+        if out["closed"]:
+            result["closed"].append(sym)
+        if out["error"]:
+            result["errors"][sym] = out["error"]
+        result["latency_ms"][sym] = out["latency_ms"]
+    return result
+
+def cancel_open_orders_concurrently(client: Client, symbols: List[str], book=None,
+                                    max_workers: int = CLOSE_MAX_WORKERS) -> Dict[str, Any]:
+    """Cancel open orders (no close) for every symbol concurrently."""
+    result = {"cancelled": [], "errors": {}, "latency_ms": {}}
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return result
 
+    def cancel(sym):
+        started = time.perf_counter()
         try:
-            closed = market_close_position(client, sym)
-            if closed:
-                result["closed"].append(sym)
+            cancel_all_open_orders(client, sym)
+            if book is not None:
+                book.invalidate(sym, positions=False)
+            err = None
         except Exception as e:
-            result["errors"][sym] = f"close_error: {e}"
+            err = str(e)
+        return err, round((time.perf_counter() - started) * 1000, 1)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as pool:
+        outcomes = dict(zip(symbols, pool.map(cancel, symbols)))
+    for sym in symbols:
+        err, latency = outcomes[sym]
+        if err:
+            result["errors"][sym] = err
+        else:
+            result["cancelled"].append(sym)
+        result["latency_ms"][sym] = latency
     return result
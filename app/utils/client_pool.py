@@ -0,0 +1,94 @@
+import inspect
+import threading
+import time
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+from binance.client import Client
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from .rate_governor import governor
+
+# Keep-alive pool per client: traders, the close fan-out and routes share one account client.
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+
+# Older python-binance releases (1.0.19, which requirements.txt allows) have no ``ping``
+# argument; their constructor always pings.
+_CAN_SKIP_PING = 'ping' in inspect.signature(Client.__init__).parameters
+
+_clients: Dict[Tuple[int, bool], Tuple[tuple, Client]] = {}
+_lock = threading.Lock()
+
+class GovernedClient(Client):
+    """python-binance Client whose every REST call goes through the shared rate governor."""
+
+    account_id = None
+
+    def _request(self, method, uri: str, signed: bool, force_params: bool = False, **kwargs):
+        host, weight, is_order = governor.classify(method, uri, kwargs.get('data') or kwargs.get('params'))
+        governor.acquire(host, weight, account_id=self.account_id, is_order=is_order)
+        endpoint = f"{method.upper()} {urlparse(uri).path}"
+        t0 = time.perf_counter()
+        try:
+            result = super()._request(method, uri, signed, force_params, **kwargs)
+        except Exception as e:
+            metrics.observe_request(endpoint, time.perf_counter() - t0, metrics.error_code(e))
+            raise
+        metrics.observe_request(endpoint, time.perf_counter() - t0)
+        return result
+
+def build_client(api_key: str, api_secret: str, testnet: bool = False, account_id=None) -> Client:
+    """New UM-Futures client with a tuned keep-alive session and no constructor ping (where supported)."""
+    extra = {'ping': False} if _CAN_SKIP_PING else {}
+    client = GovernedClient(api_key, api_secret, testnet=testnet, **extra)
+    client.account_id = account_id
+    client.session.hooks['response'].append(lambda r, *a, **k: governor.observe(r, account_id))
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    client.session.mount('https://', adapter)
+    client.session.mount('http://', adapter)
+    if testnet:
+        try:
+            client.FUTURES_URL = 'https://testnet.binancefuture.com/fapi'
+            client.FUTURES_DATA_URL = 'https://testnet.binancefuture.com/futures/data'
+        except Exception:
+            pass
+    return client
+
+def get_account_client(acc) -> Client:
+    """Shared, long-lived client for an account (keyed by account id + testnet flag).
+
+    The cached client is rebuilt automatically when the account's keys change.
+    Simulated accounts get a ``SimClient`` on the in-process simulated exchange.
+    """
+    if getattr(acc, 'is_simulated', False):
+        from .sim_exchange import SimClient, get_sim_exchange
+        return SimClient(get_sim_exchange(), acc.id)
+    key = (acc.id, bool(acc.is_testnet))
+    fingerprint = (acc.api_key, acc.api_secret)
+    with _lock:
+        cached = _clients.get(key)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+    client = build_client(acc.api_key, acc.api_secret, bool(acc.is_testnet), account_id=acc.id)
+    with _lock:
+        cached = _clients.get(key)
+        if cached and cached[0] == fingerprint:
+            client.session.close()
+            return cached[1]
+        _clients[key] = (fingerprint, client)
+    if cached:
+        cached[1].session.close()
+    return client
+
+def invalidate_account_client(account_id: int):
+    """Forget (and close) the clients of an account, e.g. after delete or a key change."""
+    with _lock:
+        dropped = [k for k in _clients if k[0] == account_id]
+        clients = [_clients.pop(k)[1] for k in dropped]
+    for c in clients:
+        try:
+            c.session.close()
+        except Exception:
+            pass
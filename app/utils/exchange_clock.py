@@ -0,0 +1,155 @@
+import statistics
+import threading
+import time
+import requests
+from collections import deque
+from urllib.parse import urlparse
+from typing import Dict, Any
+
+from .binance_helper import futures_base_url
+from .rate_governor import governor, TRADING
+
+# Seconds between background samples and how many samples the estimate looks at.
+DEFAULT_SAMPLE_INTERVAL = 60
+DEFAULT_WINDOW = 16
+INITIAL_BURST = 5
+# Drift is only fitted over samples spanning this many sample intervals (a burst spans
+# milliseconds, where ms resolution and RTT noise look like huge drift), and is clamped
+# to what a real quartz clock can do.
+DRIFT_MIN_SPAN_INTERVALS = 2
+MAX_DRIFT_PPM = 500
+
+class ExchangeClock:
+    """Local estimate of the Binance server clock for one base URL (NTP-style).
+
+    Each sample brackets a ``/fapi/v1/time`` call with local timestamps; the
+    server time is assumed to fall in the middle of the round trip, so the
+    error of a sample is at most RTT/2. The estimate uses the minimum-RTT
+    sample of the window, extrapolated by the drift fitted across the window.
+    Traders then compute candle boundaries locally with no request per cycle.
+    """
+
+    def __init__(self, base_url: str, sample_interval: float = DEFAULT_SAMPLE_INTERVAL, window: int = DEFAULT_WINDOW):
+        self.base_url = base_url
+        self.sample_interval = sample_interval
+        self._samples = deque(maxlen=window)   # (local_mid_ms, offset_ms, rtt_ms)
+        self._lock = threading.Lock()
+        self._offset_ms = 0.0
+        self._ref_local_ms = 0.0
+        self._drift = 0.0                       # ms of offset change per local ms
+        self._started = False
+        self._ready = threading.Event()
+        self.errors = 0
+
+    # ---- sampling ----
+    def _fetch_server_time(self) -> int:
+        r = requests.get(f"{self.base_url}/fapi/v1/time", timeout=5)
+        governor.observe(r)
+        r.raise_for_status()
+        return int(r.json()['serverTime'])
+
+    def sample(self):
+        """Take one offset/RTT measurement and update the estimate."""
+        # budget first, so any wait for it stays outside the measured round trip
+        governor.acquire(urlparse(self.base_url).netloc, 1, level=TRADING)
+        t0 = time.time() * 1000
+        server_ms = self._fetch_server_time()
+        t1 = time.time() * 1000
+        rtt = t1 - t0
+        mid = (t0 + t1) / 2
+        with self._lock:
+            self._samples.append((mid, server_ms - mid, rtt))
+            self._recompute()
+
+    def _recompute(self):
+        samples = list(self._samples)
+        best = min(samples, key=lambda s: s[2])
+        self._ref_local_ms, self._offset_ms = best[0], best[1]
+        # Fit drift only on samples whose RTT is close to the best one; slow samples are mostly queueing noise.
+        good = [s for s in samples if s[2] <= best[2] * 2 + 1]
+        span_ms = good[-1][0] - good[0][0] if good else 0.0
+        if len(good) >= 3 and span_ms >= DRIFT_MIN_SPAN_INTERVALS * self.sample_interval * 1000:
+            xs = [s[0] for s in good]
+            ys = [s[1] for s in good]
+            mx, my = statistics.fmean(xs), statistics.fmean(ys)
+            var = sum((x - mx) ** 2 for x in xs)
+            drift = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var if var else 0.0
+            limit = MAX_DRIFT_PPM / 1e6
+            self._drift = max(-limit, min(limit, drift))
+        else:
+            self._drift = 0.0
+
+    def _sample_loop(self):
+        for _ in range(INITIAL_BURST):
+            self._safe_sample()
+        self._ready.set()
+        while True:
+            time.sleep(self.sample_interval)
+            self._safe_sample()
+
+    def _safe_sample(self):
+        try:
+            self.sample()
+        except Exception as e:
+            self.errors += 1
+            print(f"Clock sample failed for {self.base_url}: {e}")
+
+    def start(self):
+        """Start sampling in the background (an initial burst, then every ``sample_interval``).
+
+        Never blocks: request handlers call this, and a ``/fapi/v1/time`` round
+        trip there would hold up every other client. Until the burst is done
+        the offset reads 0, i.e. local time.
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._sample_loop, name=f'clock-{self.base_url}', daemon=True).start()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    # ---- reading ----
+    def offset_ms(self) -> float:
+        """Estimated server-minus-local offset right now, in ms."""
+        now = time.time() * 1000
+        return self._offset_ms + self._drift * (now - self._ref_local_ms)
+
+    def now_ms(self) -> int:
+        """Estimated Binance server time in ms."""
+        return int(time.time() * 1000 + self.offset_ms())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._samples)
+        rtts = [s[2] for s in samples]
+        offsets = [s[1] for s in samples]
+        return {
+            'base_url': self.base_url,
+            'offset_ms': round(self.offset_ms(), 3),
+            'rtt_ms': round(min(rtts), 3) if rtts else None,
+            'jitter_ms': round(statistics.pstdev(offsets), 3) if len(offsets) > 1 else None,
+            'drift_ppm': round(self._drift * 1e6, 3),
+            'samples': len(samples),
+            'last_sample_age_s': round(time.time() - samples[-1][0] / 1000, 1) if samples else None,
+            'errors': self.errors,
+            'ready': self.ready,
+        }
+
+_clocks: Dict[str, ExchangeClock] = {}
+_clocks_lock = threading.Lock()
+
+def get_clock(testnet: bool = False) -> ExchangeClock:
+    """Return the shared, running clock for mainnet or testnet."""
+    base = futures_base_url(testnet)
+    with _clocks_lock:
+        clock = _clocks.get(base)
+        if clock is None:
+            clock = _clocks[base] = ExchangeClock(base)
+    clock.start()
+    return clock
+
+def all_clocks():
+    return list(_clocks.values())
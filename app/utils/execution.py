@@ -0,0 +1,114 @@
+"""Order execution for the candle traders: move a symbol to a target position in one order.
+
+At a candle open the trader knows the position it wants (long, short or flat).
+``move_to`` compares it with the current position and sends at most one MARKET
+order: nothing if the side is unchanged, a reduce-only order to go flat, and a
+single order for the combined quantity to reverse. Orders ask for
+``newOrderRespType=RESULT`` so the fill usually arrives with the response;
+otherwise the fill is awaited from the user-data stream (``notify_order_update``)
+and finally queried over REST, without a fixed sleep.
+"""
+import itertools
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from binance.client import Client
+
+# After a non-final order response: wait this long for the user-data stream, then poll REST.
+FILL_STREAM_WAIT_S = float(os.getenv('FILL_STREAM_WAIT_S', '0.5'))
+FILL_TIMEOUT_S = float(os.getenv('FILL_TIMEOUT_S', '5'))
+FILL_POLL_S = 0.25
+
+FINAL_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED')
+
+# Every order we send carries this prefix so the user-data stream can tell ours from manual ones.
+ORDER_TAG_PREFIX = 'omlol'
+
+class FillTimeout(Exception):
+    """The order was accepted but no final status was seen within FILL_TIMEOUT_S."""
+
+_seq = itertools.count()
+
+def order_tag(bot_id) -> str:
+    """Unique clientOrderId carrying the bot id: ``omlol-b<bot>-<ms>-<seq>`` (Binance allows 36 chars)."""
+    return f"{ORDER_TAG_PREFIX}-b{bot_id}-{int(time.time() * 1000) % 10**10}-{next(_seq) % 10**4}"
+
+def bot_id_from_tag(client_order_id: Optional[str]) -> Optional[int]:
+    """Bot id encoded by ``order_tag``, or None for orders we did not place."""
+    parts = (client_order_id or '').split('-')
+    if len(parts) == 4 and parts[0] == ORDER_TAG_PREFIX and parts[1][:1] == 'b' and parts[1][1:].isdigit():
+        return int(parts[1][1:])
+    return None
+
+# ---- fill notifications from the user-data stream ----
+_waiters: Dict[str, list] = {}     # clientOrderId -> [Event, order update or None]
+_waiters_lock = threading.Lock()
+
+def expect_fill(client_order_id: str):
+    """Start listening for updates of an order before it is sent (the stream may beat the response)."""
+    with _waiters_lock:
+        _waiters.setdefault(client_order_id, [threading.Event(), None])
+
+def notify_order_update(client_order_id: str, order: dict):
+    """Hand an order update (with ``status``/``executedQty``/``avgPrice``) to a waiting ``confirm_fill``."""
+    with _waiters_lock:
+        waiter = _waiters.get(client_order_id)
+    if waiter is not None and order.get('status') in FINAL_STATUSES:
+        waiter[1] = order
+        waiter[0].set()
+
+def confirm_fill(client, symbol: str, order: dict, tag: str) -> dict:
+    """Final state of an order: the response itself if final, else stream update, else REST query.
+
+    Expects ``expect_fill(tag)`` to have been called before the order was sent.
+    """
+    try:
+        if order.get('status') in FINAL_STATUSES:
+            return order
+        with _waiters_lock:
+            waiter = _waiters.setdefault(tag, [threading.Event(), None])
+        deadline = time.time() + FILL_TIMEOUT_S
+        if waiter[0].wait(min(FILL_STREAM_WAIT_S, FILL_TIMEOUT_S)):
+            return dict(order, **waiter[1])
+        while time.time() < deadline:
+            state = client.futures_get_order(symbol=symbol, origClientOrderId=tag)
+            if state.get('status') in FINAL_STATUSES:
+                return state
+            if waiter[0].wait(FILL_POLL_S):
+                return dict(order, **waiter[1])
+        raise FillTimeout(f"order {tag} on {symbol} not final after {FILL_TIMEOUT_S}s")
+    finally:
+        with _waiters_lock:
+            _waiters.pop(tag, None)
+
+def format_quantity(qty: float, precision: int) -> str:
+    return f"{qty:.{precision}f}"
+
+def move_to(client, symbol: str, current: float, target: float, bot_id, precision: int) -> Optional[dict]:
+    """Send the one order that takes the position from ``current`` to ``target`` (signed amounts).
+
+    Returns the confirmed order (``status``, ``executedQty``, ``avgPrice``, ...) or
+    None when no order is needed: already flat, or holding the target side.
+    """
+    if current and target and (current > 0) == (target > 0):
+        return None   # same side: keep the position instead of closing and reopening it
+    delta = target - current
+    quantity = format_quantity(abs(delta), precision)
+    if float(quantity) <= 0:
+        return None
+    params = {'symbol': symbol, 'side': Client.SIDE_BUY if delta > 0 else Client.SIDE_SELL,
+              'type': Client.ORDER_TYPE_MARKET, 'quantity': quantity,
+              'newOrderRespType': 'RESULT', 'newClientOrderId': order_tag(bot_id)}
+    if target == 0:
+        params['reduceOnly'] = 'true'
+    tag = params['newClientOrderId']
+    expect_fill(tag)
+    try:
+        order = client.futures_create_order(**params)
+    except Exception:
+        with _waiters_lock:
+            _waiters.pop(tag, None)
+        raise
+    return confirm_fill(client, symbol, order, tag)
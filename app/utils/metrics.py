@@ -0,0 +1,178 @@
+"""In-process metrics in the Prometheus text format (served at ``GET /metrics``).
+
+Counters and histograms are kept in plain dicts under one lock; gauges are
+callbacks read at scrape time. Histograms are labelled by a small fixed set of
+values (stage, endpoint, code) so the series count does not grow with the number
+of traders; set ``METRICS_PER_BOT=1`` to add a ``bot_id`` label to the trade
+cycle stages.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+METRICS_PER_BOT = os.getenv('METRICS_PER_BOT', '0') == '1'
+
+# seconds; candle-cycle stages range from sub-ms cache hits to multi-second waits
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Optional[dict]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+def _fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    esc = lambda v: v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{esc(v)}"' for k, v in pairs) + '}'
+
+def _fmt_value(v: float) -> str:
+    if v == float('inf'):
+        return '+Inf'
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.buckets = name, help, tuple(buckets)
+        self._series: Dict[Labels, list] = {}   # labels -> [bucket counts..., count, sum]
+
+    def observe(self, value: float, labels: Optional[dict] = None):
+        key = _labels(labels)
+        with _lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            s[bisect.bisect_left(self.buckets, value)] += 1
+            s[-1] += value
+
+    def render(self) -> List[str]:
+        out = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with _lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for key, s in sorted(series.items()):
+            cumulative = 0
+            for le, n in zip(self.buckets + (float('inf'),), s[:-1]):
+                cumulative += n
+                out.append(f'{self.name}_bucket{_fmt_labels(key, ("le", _fmt_value(le)))} {cumulative}')
+            out.append(f'{self.name}_count{_fmt_labels(key)} {cumulative}')
+            out.append(f'{self.name}_sum{_fmt_labels(key)} {s[-1]!r}')
+        return out
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self._series: Dict[Labels, float] = {}
+
+    def inc(self, labels: Optional[dict] = None, amount: float = 1):
+        key = _labels(labels)
+        with _lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        out = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with _lock:
+            series = dict(self._series)
+        out += [f'{self.name}{_fmt_labels(k)} {_fmt_value(v)}' for k, v in sorted(series.items())]
+        return out
+
+class Gauge:
+    """Value read from ``fn()`` at scrape time; ``fn`` may return a number or {labels-dict-items: value}.
+
+    ``kind='counter'`` exposes a running total kept elsewhere (e.g. ``scheduler.missed_cycles``).
+    """
+
+    def __init__(self, name: str, help: str, fn: Callable, kind: str = 'gauge'):
+        self.name, self.help, self.fn, self.kind = name, help, fn, kind
+
+    def render(self) -> List[str]:
+        out = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        try:
+            value = self.fn()
+        except Exception:
+            return out
+        if isinstance(value, dict):
+            out += [f'{self.name}{_fmt_labels(_labels(dict(k)))} {_fmt_value(v)}' for k, v in sorted(value.items())]
+        else:
+            out.append(f'{self.name} {_fmt_value(value)}')
+        return out
+
+_lock = threading.Lock()
+_registry: Dict[str, object] = {}
+
+def histogram(name: str, help: str, buckets=LATENCY_BUCKETS) -> Histogram:
+    return _registry.setdefault(name, Histogram(name, help, buckets))
+
+def counter(name: str, help: str) -> Counter:
+    return _registry.setdefault(name, Counter(name, help))
+
+def gauge(name: str, help: str, fn: Callable, kind: str = 'gauge') -> Gauge:
+    _registry[name] = Gauge(name, help, fn, kind)
+    return _registry[name]
+
+def render() -> str:
+    lines = []
+    for metric in list(_registry.values()):
+        lines += metric.render()
+    return '\n'.join(lines) + '\n'
+
+# ---- trade cycle stages ----
+cycle_stage_seconds = histogram('omlol_trade_cycle_stage_seconds',
+                                'Duration of each trade cycle stage after a candle open')
+
+def observe_stage(stage: str, seconds: float, bot_id=None):
+    labels = {'stage': stage}
+    if METRICS_PER_BOT and bot_id is not None:
+        labels['bot_id'] = bot_id
+    cycle_stage_seconds.observe(seconds, labels)
+
+class CycleSpans:
+    """Stage timings of one trade cycle of one (bot, symbol).
+
+    ``with spans.stage('klines'): ...`` times a stage; ``done()`` records every
+    stage plus ``total`` into the stage histogram. The last finished cycle of a
+    trader is kept as ``trader.last_spans`` (stage -> seconds).
+    """
+
+    def __init__(self, key, started: Optional[float] = None):
+        self.key = key
+        self.started = time.perf_counter() if started is None else started
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def add(self, name: str, seconds: float):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def done(self) -> Dict[str, float]:
+        self.durations['total'] = time.perf_counter() - self.started
+        for name, seconds in self.durations.items():
+            observe_stage(name, seconds, self.key[0])
+        return dict(self.durations)
+
+# ---- REST calls ----
+rest_seconds = histogram('omlol_binance_request_seconds', 'Binance REST call latency by endpoint')
+rest_errors = counter('omlol_binance_errors_total', 'Failed Binance REST calls by error code')
+
+def observe_request(endpoint: str, seconds: float, error_code=None):
+    """One REST call; ``error_code`` is the Binance code (or ``network``) if it failed."""
+    rest_seconds.observe(seconds, {'endpoint': endpoint})
+    if error_code is not None:
+        rest_errors.inc({'endpoint': endpoint, 'code': error_code})
+
+def error_code(exc: Exception) -> str:
+    code = getattr(exc, 'code', None)
+    return str(code) if code is not None else 'network'
+
+# ---- summary broadcaster ----
+broadcaster_seconds = histogram('omlol_summary_broadcaster_loop_seconds',
+                                'Time spent per broadcaster pass over the live rooms (excluding its sleep)')
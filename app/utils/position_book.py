@@ -0,0 +1,156 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+# How long an all-symbols snapshot may be reused before the next read refreshes it.
+DEFAULT_MAX_AGE = 1.0
+
+class PositionBook:
+    """Account-wide snapshot of futures positions and open orders.
+
+    One ``futures_position_information()`` call (all symbols) and one
+    ``futures_get_open_orders()`` call replace a call per symbol. Snapshots are
+    reused for ``max_age`` seconds; symbols we just traded are marked dirty via
+    ``invalidate()`` so the next read of that symbol fetches fresh data.
+
+    While the account's user-data stream is connected (``live``) the book is
+    kept current by ``apply_position()`` / ``apply_order()`` and reads never
+    call REST.
+    """
+
+    def __init__(self, account_id, max_age: float = DEFAULT_MAX_AGE):
+        self.account_id = account_id
+        self.max_age = max_age
+        # Reentrant: a read that finds the snapshot stale refreshes it while holding
+        # the lock, so concurrent readers wait for that one call instead of issuing their own.
+        self._lock = threading.RLock()
+        self._positions: Dict[str, List[dict]] = {}
+        self._positions_at = 0.0
+        self._orders: Dict[str, List[dict]] = {}
+        self._orders_at = 0.0
+        self._dirty_positions = set()
+        self._dirty_orders = set()
+        self.live = False
+
+    def _fresh(self, loaded_at: float, dirty: set, symbol: Optional[str], max_age: Optional[float]) -> bool:
+        if self.live:
+            return True
+        age = time.time() - loaded_at
+        if age > (self.max_age if max_age is None else max_age):
+            return False
+        return not dirty if symbol is None else symbol not in dirty
+
+    # ---- positions ----
+    def refresh_positions(self, client):
+        """Fetch every position of the account in one call."""
+        started = time.time()
+        rows = client.futures_position_information()
+        book: Dict[str, List[dict]] = {}
+        for p in rows or []:
+            book.setdefault(p.get('symbol'), []).append(p)
+        with self._lock:
+            self._positions = book
+            self._positions_at = started
+            self._dirty_positions.clear()
+
+    def positions(self, client, max_age: Optional[float] = None) -> Dict[str, List[dict]]:
+        with self._lock:
+            if not self._fresh(self._positions_at, self._dirty_positions, None, max_age):
+                self.refresh_positions(client)
+            return dict(self._positions)
+
+    def position(self, client, symbol: str, max_age: Optional[float] = None) -> List[dict]:
+        """Position rows for one symbol, in the same shape as ``futures_position_information(symbol=...)``."""
+        with self._lock:
+            if not self._fresh(self._positions_at, self._dirty_positions, symbol, max_age):
+                self.refresh_positions(client)
+            return list(self._positions.get(symbol, []))
+
+    def position_amt(self, client, symbol: str, max_age: Optional[float] = None) -> float:
+        rows = self.position(client, symbol, max_age)
+        return float(rows[0].get('positionAmt', 0) or 0) if rows else 0.0
+
+    # ---- open orders ----
+    def refresh_orders(self, client):
+        """Fetch every open order of the account in one call."""
+        started = time.time()
+        rows = client.futures_get_open_orders()
+        book: Dict[str, List[dict]] = {}
+        for o in rows or []:
+            book.setdefault(o.get('symbol'), []).append(o)
+        with self._lock:
+            self._orders = book
+            self._orders_at = started
+            self._dirty_orders.clear()
+
+    def open_orders(self, client, symbol: str, max_age: Optional[float] = None) -> List[dict]:
+        with self._lock:
+            if not self._fresh(self._orders_at, self._dirty_orders, symbol, max_age):
+                self.refresh_orders(client)
+            return list(self._orders.get(symbol, []))
+
+    def cached(self, symbol: str):
+        """Last known (positions, open_orders, age_seconds) for a symbol without any REST call."""
+        with self._lock:
+            loaded = min(self._positions_at, self._orders_at)
+            age = time.time() - loaded if loaded else None
+            return list(self._positions.get(symbol, [])), list(self._orders.get(symbol, [])), age
+
+    # ---- user-data stream ----
+    def set_live(self, live: bool):
+        """Called by the user-data stream after its REST resync (True) and when it drops (False)."""
+        with self._lock:
+            self.live = live
+
+    def apply_position(self, symbol: str, amount: str, entry_price: str, unrealised: str = '0',
+                       position_side: str = 'BOTH'):
+        """Position from an ACCOUNT_UPDATE event."""
+        with self._lock:
+            rows = self._positions.setdefault(symbol, [])
+            row = next((r for r in rows if r.get('positionSide', 'BOTH') == position_side), None)
+            if row is None:
+                row = {'symbol': symbol, 'positionSide': position_side}
+                rows.append(row)
+            row.update(positionAmt=amount, entryPrice=entry_price, unRealizedProfit=unrealised,
+                       updateTime=int(time.time() * 1000))
+            self._dirty_positions.discard(symbol)
+
+    def apply_order(self, order: dict):
+        """Open-order change from an ORDER_TRADE_UPDATE event (REST open-order shape)."""
+        symbol = order['symbol']
+        with self._lock:
+            rows = [o for o in self._orders.get(symbol, []) if o.get('orderId') != order['orderId']]
+            if order.get('status') in ('NEW', 'PARTIALLY_FILLED'):
+                rows.append(order)
+            self._orders[symbol] = rows
+            self._dirty_orders.discard(symbol)
+
+    # ---- invalidation ----
+    def invalidate(self, symbol: Optional[str] = None, positions: bool = True, orders: bool = True):
+        """Mark a symbol (or the whole account) stale after we sent orders/cancels."""
+        with self._lock:
+            if symbol is None:
+                if positions:
+                    self._positions_at = 0.0
+                if orders:
+                    self._orders_at = 0.0
+                return
+            if positions:
+                self._dirty_positions.add(symbol)
+            if orders:
+                self._dirty_orders.add(symbol)
+
+_books: Dict[object, PositionBook] = {}
+_books_lock = threading.Lock()
+
+def get_position_book(account_id) -> PositionBook:
+    """Return the shared position book of an account."""
+    with _books_lock:
+        book = _books.get(account_id)
+        if book is None:
+            book = _books[account_id] = PositionBook(account_id)
+        return book
+
+def drop_position_book(account_id):
+    with _books_lock:
+        _books.pop(account_id, None)
@@ -0,0 +1,182 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# Priorities: lower value = more important.
+ORDER = 0      # placing / cancelling orders
+TRADING = 1    # reads the trade loop depends on
+UI = 2         # dashboard reads; may be served from cache instead
+
+# USDT-M futures defaults; the headers Binance returns keep the local estimate honest.
+IP_WEIGHT_PER_MINUTE = 2400
+ORDERS_PER_10S = 300
+ORDERS_PER_MINUTE = 1200
+
+# Share of the IP weight budget that must remain for a priority to spend from it.
+RESERVE = {ORDER: 0.0, TRADING: 0.10, UI: 0.35}
+MAX_WAIT = {ORDER: 2.0, TRADING: 5.0, UI: 0.0}
+
+# Request weight of the endpoints we use; anything else counts as 1.
+ENDPOINT_WEIGHTS = {
+    'exchangeInfo': 1,
+    'klines': 5,
+    'positionRisk': 5,
+    'balance': 5,
+    'account': 5,
+    'leverage': 1,
+    'order': 1,
+    'allOpenOrders': 1,
+}
+
+class RateBudgetExceeded(Exception):
+    """Raised when a low-priority call would eat into the budget reserved for trading."""
+
+class TokenBucket:
+    def __init__(self, capacity: float, period: float):
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.time()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> float:
+        self._refill(time.time())
+        return self.tokens
+
+    def take(self, amount: float):
+        self._refill(time.time())
+        self.tokens -= amount
+
+    def sync_used(self, used: float):
+        """Align with the server's view of how much of the window is used."""
+        self._refill(time.time())
+        self.tokens = min(self.tokens, self.capacity - used)
+
+    def seconds_until(self, amount: float) -> float:
+        missing = amount - self.available()
+        return 0.0 if missing <= 0 else missing / self.rate
+
+_local = threading.local()
+
+@contextmanager
+def priority(level: int):
+    """Run the enclosed Binance calls at the given priority (default TRADING)."""
+    prev = getattr(_local, 'priority', TRADING)
+    _local.priority = level
+    try:
+        yield
+    finally:
+        _local.priority = prev
+
+def current_priority() -> int:
+    return getattr(_local, 'priority', TRADING)
+
+class RateGovernor:
+    """Shared request-weight and order-rate budget for every trader and route.
+
+    Weight is tracked per IP (one bucket per REST host) and order counts per
+    account, both as token buckets corrected by the ``X-MBX-USED-WEIGHT-1M``
+    and ``X-MBX-ORDER-COUNT-*`` response headers. Orders always go first;
+    trading reads may wait briefly; UI reads get ``RateBudgetExceeded`` when
+    the headroom is below their reserve so the caller can answer from cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._ip: Dict[str, TokenBucket] = {}
+        self._orders: Dict[object, Dict[str, TokenBucket]] = {}
+        self._banned_until: Dict[str, float] = {}
+        self.rejected = {ORDER: 0, TRADING: 0, UI: 0}
+        self.waited_s = 0.0
+
+    def _ip_bucket(self, host: str) -> TokenBucket:
+        b = self._ip.get(host)
+        if b is None:
+            b = self._ip[host] = TokenBucket(IP_WEIGHT_PER_MINUTE, 60)
+        return b
+
+    def _order_buckets(self, account_id) -> Dict[str, TokenBucket]:
+        b = self._orders.get(account_id)
+        if b is None:
+            b = self._orders[account_id] = {'10s': TokenBucket(ORDERS_PER_10S, 10), '1m': TokenBucket(ORDERS_PER_MINUTE, 60)}
+        return b
+
+    @staticmethod
+    def classify(method: str, uri: str, params: Optional[dict] = None):
+        """(host, weight, is_order) for a REST call."""
+        parsed = urlparse(uri)
+        endpoint = parsed.path.rstrip('/').rsplit('/', 1)[-1]
+        is_order = endpoint in ('order', 'batchOrders', 'allOpenOrders') and method.lower() in ('post', 'delete', 'put')
+        if endpoint == 'openOrders':
+            weight = 1 if params and params.get('symbol') else 40
+        else:
+            weight = ENDPOINT_WEIGHTS.get(endpoint, 1)
+        return parsed.netloc, weight, is_order
+
+    def acquire(self, host: str, weight: float, account_id=None, is_order: bool = False, level: Optional[int] = None):
+        """Reserve budget for one call, waiting or raising according to priority."""
+        level = ORDER if is_order else (current_priority() if level is None else level)
+        deadline = time.time() + MAX_WAIT[level]
+        with self._cond:
+            while True:
+                now = time.time()
+                wait = self._banned_until.get(host, 0) - now
+                bucket = self._ip_bucket(host)
+                floor = bucket.capacity * RESERVE[level]
+                if wait <= 0:
+                    wait = bucket.seconds_until(weight + floor)
+                if wait <= 0 and is_order and account_id is not None:
+                    wait = max(b.seconds_until(1) for b in self._order_buckets(account_id).values())
+                if wait <= 0:
+                    bucket.take(weight)
+                    if is_order and account_id is not None:
+                        for b in self._order_buckets(account_id).values():
+                            b.take(1)
+                    return
+                if now + wait > deadline:
+                    self.rejected[level] += 1
+                    raise RateBudgetExceeded(f"rate budget exhausted for {host} (priority {level}); retry in {wait:.1f}s")
+                self.waited_s += wait
+                self._cond.wait(wait)
+
+    def observe(self, response, account_id=None):
+        """Feed Binance's usage headers (and 418/429 bans) back into the buckets."""
+        host = urlparse(response.url).netloc
+        headers = response.headers
+        with self._cond:
+            used = headers.get('X-MBX-USED-WEIGHT-1M') or headers.get('X-MBX-USED-WEIGHT-1m')
+            if used is not None:
+                self._ip_bucket(host).sync_used(float(used))
+            if account_id is not None:
+                buckets = self._order_buckets(account_id)
+                for window in ('10s', '1m'):
+                    count = headers.get(f'X-MBX-ORDER-COUNT-{window.upper()}') or headers.get(f'X-MBX-ORDER-COUNT-{window}')
+                    if count is not None:
+                        buckets[window].sync_used(float(count))
+            if response.status_code in (418, 429):
+                retry = float(headers.get('Retry-After') or 60)
+                self._banned_until[host] = max(self._banned_until.get(host, 0), time.time() + retry)
+                self._ip_bucket(host).tokens = 0.0
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            now = time.time()
+            ip = {host: {'weight_limit': int(b.capacity),
+                         'weight_headroom': int(b.available()),
+                         'headroom_pct': round(100 * b.available() / b.capacity, 1),
+                         'banned_for_s': round(max(0.0, self._banned_until.get(host, 0) - now), 1)}
+                  for host, b in self._ip.items()}
+            accounts = {str(acc): {w: {'limit': int(b.capacity), 'headroom': int(b.available())} for w, b in buckets.items()}
+                        for acc, buckets in self._orders.items()}
+            return {'ip': ip, 'accounts': accounts,
+                    'rejected': {'order': self.rejected[ORDER], 'trading': self.rejected[TRADING], 'ui': self.rejected[UI]},
+                    'waited_s': round(self.waited_s, 3)}
+
+governor = RateGovernor()
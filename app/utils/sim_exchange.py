@@ -0,0 +1,578 @@
+import csv
+import json
+import math
+import os
+import random
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from binance.exceptions import BinanceAPIException
+
+from . import metrics
+
+# Tunables for paper trading / load tests (env overrides).
+SIM_TICK_MS = int(os.getenv('SIM_TICK_MS', '1000'))           # one price step per tick
+SIM_LATENCY_MS = float(os.getenv('SIM_LATENCY_MS', '0'))      # added to every call
+SIM_JITTER_MS = float(os.getenv('SIM_JITTER_MS', '0'))
+SIM_ERROR_RATE = float(os.getenv('SIM_ERROR_RATE', '0'))      # share of calls failing with -1001
+SIM_START_BALANCE = float(os.getenv('SIM_START_BALANCE', '10000'))
+SIM_PRICE_DIR = os.getenv('SIM_PRICE_DIR')                    # <SYMBOL>_1m.csv closes, one per tick
+SIM_SYMBOLS = os.getenv('SIM_SYMBOLS', 'BTCUSDT,ETHUSDT,BNBUSDT,SOLUSDT,XRPUSDT')
+# Price history available before the exchange was created (klines limit look-back).
+SIM_HISTORY_MS = 6 * 3600 * 1000
+SIM_ORDER_HISTORY = 1000  # orders kept per account for order queries
+
+TAKER_FEE = 0.0004
+MAKER_FEE = 0.0002
+
+INTERVAL_MS = {'1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+               '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '1d': 86_400_000}
+
+def api_error(code: int, msg: str, status: int = 400) -> BinanceAPIException:
+    """The exception python-binance raises for an error payload from the exchange."""
+    return BinanceAPIException(None, status, json.dumps({'code': code, 'msg': msg}))
+
+class PricePath:
+    """Price of one symbol at tick resolution: a seeded random walk or recorded closes.
+
+    Tick ``i`` covers ``[origin + i*tick_ms, origin + (i+1)*tick_ms)``. Recorded
+    closes are replayed one per tick and loop at the end of the file.
+
+    The walk is generated in chunks of ``CHUNK_TICKS``, each seeded from
+    ``(symbol, chunk)`` and starting where the previous one ended. Only the
+    first price of every chunk is kept for good, plus the ``CACHED_CHUNKS`` most
+    recently used chunks, so memory stays flat however long the exchange runs;
+    an evicted chunk is regenerated identically when asked for again.
+    """
+
+    CHUNK_TICKS = 4096
+    CACHED_CHUNKS = 8
+
+    def __init__(self, symbol: str, origin_ms: int, tick_ms: int, start_price: float = 100.0,
+                 recorded: Optional[List[float]] = None, volatility: float = 0.0005):
+        self.symbol = symbol
+        self.origin_ms = origin_ms
+        self.tick_ms = tick_ms
+        self.recorded = recorded
+        self.volatility = volatility
+        self._starts = [recorded[0] if recorded else start_price]   # first price of each chunk
+        self._chunks: "OrderedDict[int, array]" = OrderedDict()
+
+    def _generate(self, c: int) -> array:
+        rng = random.Random(f"{self.symbol}:{c}")
+        ticks = array('d', [self._starts[c]])
+        for _ in range(self.CHUNK_TICKS):
+            ticks.append(ticks[-1] * math.exp(rng.gauss(0.0, self.volatility)))
+        if len(self._starts) == c + 1:
+            self._starts.append(ticks.pop())
+        else:
+            ticks.pop()
+        return ticks
+
+    def _chunk(self, c: int) -> array:
+        ticks = self._chunks.get(c)
+        if ticks is not None:
+            self._chunks.move_to_end(c)
+            return ticks
+        while len(self._starts) <= c:
+            self._generate(len(self._starts) - 1)
+        ticks = self._chunks[c] = self._generate(c)
+        if len(self._chunks) > self.CACHED_CHUNKS:
+            self._chunks.popitem(last=False)
+        return ticks
+
+    def _tick(self, i: int) -> float:
+        if self.recorded:
+            return self.recorded[i % len(self.recorded)]
+        return self._chunk(i // self.CHUNK_TICKS)[i % self.CHUNK_TICKS]
+
+    def _index(self, t_ms: int) -> int:
+        return max(0, (t_ms - self.origin_ms) // self.tick_ms)
+
+    def price_at(self, t_ms: int) -> float:
+        return self._tick(self._index(t_ms))
+
+    def candle(self, open_ms: int, interval_ms: int, now_ms: Optional[int] = None) -> tuple:
+        """(open, high, low, close); a candle still open at ``now_ms`` ends at the current tick."""
+        end = open_ms + interval_ms - 1 if now_ms is None else min(open_ms + interval_ms - 1, now_ms)
+        first, last = self._index(open_ms), self._index(end)
+        prices = [self._tick(i) for i in range(first, last + 1)]
+        return prices[0], max(prices), min(prices), prices[-1]
+
+class SimAccount:
+    """Wallet, one-way positions, leverage and resting orders of one simulated account."""
+
+    def __init__(self, balance: float, account_id=None):
+        self.id = account_id
+        self.wallet = balance
+        self.positions: Dict[str, dict] = {}
+        self.leverage: Dict[str, int] = {}
+        self.orders: Dict[int, dict] = {}
+        self.history: Dict[int, dict] = {}     # recent orders of any status, for order queries
+        self.listeners: List[Callable[[dict], None]] = []   # user-data events, see subscribe_user
+
+    def position(self, symbol: str) -> dict:
+        return self.positions.setdefault(symbol, {'amt': 0.0, 'entry': 0.0})
+
+class SimExchange:
+    """In-process stand-in for the USDT-M futures REST API we use.
+
+    Prices come from :class:`PricePath` (synthetic, or ``SIM_PRICE_DIR`` recordings).
+    MARKET orders fill at the current price, LIMIT orders rest until the price
+    crosses them (checked whenever the symbol is touched). Every call can be
+    delayed (``latency_ms`` ± ``jitter_ms``) and fail at ``error_rate``.
+    """
+
+    def __init__(self, symbols: Optional[List[str]] = None, tick_ms: int = SIM_TICK_MS,
+                 latency_ms: float = SIM_LATENCY_MS, jitter_ms: float = SIM_JITTER_MS,
+                 error_rate: float = SIM_ERROR_RATE, start_balance: float = SIM_START_BALANCE,
+                 price_dir: Optional[str] = SIM_PRICE_DIR, auto_symbols: bool = True, now_ms=None,
+                 history_ms: int = SIM_HISTORY_MS):
+        self.tick_ms = tick_ms
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.start_balance = start_balance
+        self.price_dir = price_dir
+        self.auto_symbols = auto_symbols
+        self.now_ms = now_ms or (lambda: int(time.time() * 1000))
+        self.origin_ms = self.now_ms() - history_ms
+        self._lock = threading.RLock()
+        self._rng = random.Random()
+        self._paths: Dict[str, PricePath] = {}
+        self._accounts: Dict[object, SimAccount] = {}
+        self._next_order_id = 1
+        self.calls = 0
+        self.injected_errors = 0
+        for s in (symbols if symbols is not None else [x.strip() for x in SIM_SYMBOLS.split(',') if x.strip()]):
+            self._path(s)
+
+    # ---- market ----
+    def _recorded(self, symbol: str) -> Optional[List[float]]:
+        if not self.price_dir:
+            return None
+        path = os.path.join(self.price_dir, f"{symbol}_1m.csv")
+        if not os.path.exists(path):
+            return None
+        with open(path, newline='') as fh:
+            closes = [float(r[4]) for r in csv.reader(fh) if r and r[0].strip().isdigit()]
+        return closes or None
+
+    def _path(self, symbol: str, create: bool = True) -> PricePath:
+        symbol = symbol.upper()
+        p = self._paths.get(symbol)
+        if p is None:
+            if not create:
+                raise api_error(-1121, 'Invalid symbol.')
+            start = 100.0 + (sum(map(ord, symbol)) % 900)
+            p = self._paths[symbol] = PricePath(symbol, self.origin_ms, self.tick_ms, start, self._recorded(symbol))
+        return p
+
+    def mark_price(self, symbol: str) -> float:
+        with self._lock:
+            return self._path(symbol, self.auto_symbols).price_at(self.now_ms())
+
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return list(self._paths)
+
+    def _precision(self, price: float) -> int:
+        """Quantity decimals so one step is worth roughly 0.1-1 USDT, as on Binance."""
+        return max(0, min(3, int(math.floor(math.log10(max(price, 1e-9))))))
+
+    def exchange_info(self) -> dict:
+        rows = []
+        with self._lock:
+            for symbol, p in self._paths.items():
+                qp = self._precision(p.price_at(self.origin_ms))
+                rows.append({
+                    'symbol': symbol, 'status': 'TRADING', 'quoteAsset': 'USDT', 'baseAsset': symbol[:-4],
+                    'contractType': 'PERPETUAL', 'quantityPrecision': qp, 'pricePrecision': 2,
+                    'filters': [
+                        {'filterType': 'PRICE_FILTER', 'tickSize': '0.01', 'minPrice': '0.01', 'maxPrice': '1000000'},
+                        {'filterType': 'LOT_SIZE', 'stepSize': str(10 ** -qp), 'minQty': str(10 ** -qp), 'maxQty': '1000000'},
+                        {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+                    ],
+                })
+        return {'timezone': 'UTC', 'serverTime': self.now_ms(), 'symbols': rows}
+
+    def klines(self, symbol: str, interval: str, limit: int = 500, startTime=None, endTime=None) -> list:
+        step = INTERVAL_MS.get(interval)
+        if step is None:
+            raise api_error(-1120, 'Invalid interval.')
+        limit = max(1, min(int(limit or 500), 1500))
+        with self._lock:
+            p = self._path(symbol, self.auto_symbols)
+            now = self.now_ms()
+            if startTime is not None:
+                first = int(startTime) // step * step
+            else:
+                last_open = int(endTime if endTime is not None else now) // step * step
+                first = last_open - (limit - 1) * step
+            first = max(first, self.origin_ms // step * step + step)
+            rows = []
+            t = first
+            while t <= now and len(rows) < limit and (endTime is None or t <= int(endTime)):
+                o, h, l, c = p.candle(t, step, now)
+                rows.append([t, f"{o:.2f}", f"{h:.2f}", f"{l:.2f}", f"{c:.2f}", '0', t + step - 1, '0', 0, '0', '0', '0'])
+                t += step
+            return rows
+
+    # ---- accounts ----
+    def account(self, account_id) -> SimAccount:
+        with self._lock:
+            acc = self._accounts.get(account_id)
+            if acc is None:
+                acc = self._accounts[account_id] = SimAccount(self.start_balance, account_id)
+            return acc
+
+    # ---- user-data events (ORDER_TRADE_UPDATE / ACCOUNT_UPDATE, Binance payload shape) ----
+    def subscribe_user(self, account_id, callback: Callable[[dict], None]):
+        """Call ``callback(event)`` for every order and account update of an account (under the exchange lock)."""
+        with self._lock:
+            self.account(account_id).listeners.append(callback)
+
+    def unsubscribe_user(self, account_id, callback: Callable[[dict], None]):
+        with self._lock:
+            acc = self._accounts.get(account_id)
+            if acc is not None and callback in acc.listeners:
+                acc.listeners.remove(callback)
+
+    def _publish(self, acc: SimAccount, event: dict):
+        for callback in list(acc.listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Simulated user-data listener failed: {e}")
+
+    def _order_event(self, acc: SimAccount, order: dict, exec_type: str, qty: float = 0.0,
+                     price: float = 0.0, fee: float = 0.0, realised: float = 0.0):
+        if not acc.listeners:
+            return
+        now = self.now_ms()
+        self._publish(acc, {'e': 'ORDER_TRADE_UPDATE', 'E': now, 'T': now, 'o': {
+            's': order['symbol'], 'c': order['clientOrderId'], 'S': order['side'], 'o': order['type'],
+            'f': order['timeInForce'], 'q': order['origQty'], 'p': order['price'], 'ap': order['avgPrice'],
+            'x': exec_type, 'X': order['status'], 'i': order['orderId'], 'l': f"{qty}", 'z': order['executedQty'],
+            'L': f"{price}", 'N': 'USDT', 'n': f"{fee}", 'T': now, 'R': order['reduceOnly'], 'ps': 'BOTH',
+            'rp': f"{realised}"}})
+        if exec_type == 'TRADE':
+            pos = acc.position(order['symbol'])
+            mark = self.mark_price(order['symbol'])
+            self._publish(acc, {'e': 'ACCOUNT_UPDATE', 'E': now, 'T': now, 'a': {
+                'm': 'ORDER',
+                'B': [{'a': 'USDT', 'wb': f"{acc.wallet}", 'cw': f"{acc.wallet}", 'bc': '0'}],
+                'P': [{'s': order['symbol'], 'pa': f"{pos['amt']}", 'ep': f"{pos['entry']}",
+                       'up': f"{(mark - pos['entry']) * pos['amt']}", 'mt': 'cross', 'ps': 'BOTH'}]}})
+
+    def reset_account(self, account_id):
+        with self._lock:
+            self._accounts.pop(account_id, None)
+
+    def _fill(self, acc: SimAccount, symbol: str, side: str, qty: float, price: float, fee_rate: float) -> float:
+        """Apply a fill to the position and wallet; returns the realised PnL."""
+        pos = acc.position(symbol)
+        signed = qty if side == 'BUY' else -qty
+        realised = 0.0
+        if pos['amt'] and (pos['amt'] > 0) != (signed > 0):
+            closing = min(abs(signed), abs(pos['amt']))
+            direction = 1.0 if pos['amt'] > 0 else -1.0
+            realised = (price - pos['entry']) * closing * direction
+        new_amt = pos['amt'] + signed
+        if abs(new_amt) < 1e-12:
+            pos['amt'], pos['entry'] = 0.0, 0.0
+        elif pos['amt'] == 0 or (pos['amt'] > 0) != (new_amt > 0):
+            pos['amt'], pos['entry'] = new_amt, price                      # opened or flipped
+        elif abs(new_amt) > abs(pos['amt']):
+            pos['entry'] = (pos['entry'] * abs(pos['amt']) + price * abs(signed)) / abs(new_amt)
+            pos['amt'] = new_amt
+        else:
+            pos['amt'] = new_amt                                          # partly reduced
+        acc.wallet += realised - qty * price * fee_rate
+        return realised
+
+    def _match(self, acc: SimAccount, symbol: str):
+        """Fill resting LIMIT orders the current price has crossed."""
+        price = self._path(symbol).price_at(self.now_ms())
+        for oid, o in list(acc.orders.items()):
+            if o['symbol'] != symbol:
+                continue
+            limit = float(o['price'])
+            if (o['side'] == 'BUY' and price <= limit) or (o['side'] == 'SELL' and price >= limit):
+                qty = float(o['origQty'])
+                if o['reduceOnly']:
+                    qty = min(qty, abs(acc.position(symbol)['amt']))
+                realised = self._fill(acc, symbol, o['side'], qty, limit, MAKER_FEE)
+                o.update(status='FILLED', executedQty=f"{qty}", avgPrice=f"{limit}", updateTime=self.now_ms())
+                del acc.orders[oid]
+                self._order_event(acc, o, 'TRADE', qty, limit, qty * limit * MAKER_FEE, realised)
+
+    def _used_margin(self, acc: SimAccount) -> float:
+        total = 0.0
+        for symbol, pos in acc.positions.items():
+            if pos['amt']:
+                total += abs(pos['amt']) * self.mark_price(symbol) / acc.leverage.get(symbol, 20)
+        return total
+
+    def _unrealised(self, acc: SimAccount) -> float:
+        return sum((self.mark_price(s) - p['entry']) * p['amt'] for s, p in acc.positions.items() if p['amt'])
+
+    def create_order(self, account_id, symbol: str, side: str, type: str, quantity=None, price=None,
+                     reduceOnly=False, newClientOrderId=None, newOrderRespType='ACK', timeInForce=None, **_):
+        side, type = side.upper(), type.upper()
+        if side not in ('BUY', 'SELL'):
+            raise api_error(-1117, 'Invalid side.')
+        if type not in ('MARKET', 'LIMIT'):
+            raise api_error(-1116, 'Invalid orderType.')
+        qty = float(quantity or 0)
+        if qty <= 0:
+            raise api_error(-4003, 'Quantity less than or equal to zero.')
+        reduce_only = str(reduceOnly).lower() == 'true'
+        with self._lock:
+            acc = self.account(account_id)
+            symbol = symbol.upper()
+            self._path(symbol, self.auto_symbols)
+            self._match(acc, symbol)
+            mark = self.mark_price(symbol)
+            pos = acc.position(symbol)
+            if reduce_only:
+                if not pos['amt'] or (pos['amt'] > 0) == (side == 'BUY'):
+                    raise api_error(-2022, 'ReduceOnly Order is rejected.')
+                qty = min(qty, abs(pos['amt']))
+            else:
+                opening = qty if not pos['amt'] or (pos['amt'] > 0) == (side == 'BUY') else max(0.0, qty - abs(pos['amt']))
+                needed = opening * mark / acc.leverage.get(symbol, 20)
+                available = acc.wallet + self._unrealised(acc) - self._used_margin(acc)
+                if needed > available:
+                    raise api_error(-2019, 'Margin is insufficient.')
+            oid = self._next_order_id
+            self._next_order_id += 1
+            now = self.now_ms()
+            order = {'orderId': oid, 'symbol': symbol, 'status': 'NEW', 'clientOrderId': newClientOrderId or f'sim_{oid}',
+                     'price': f"{float(price or 0)}", 'avgPrice': '0.00', 'origQty': f"{qty}", 'executedQty': '0',
+                     'cumQuote': '0', 'timeInForce': timeInForce or 'GTC', 'type': type, 'reduceOnly': reduce_only,
+                     'side': side, 'positionSide': 'BOTH', 'updateTime': now}
+            acc.history[oid] = order
+            if len(acc.history) > SIM_ORDER_HISTORY:
+                del acc.history[next(iter(acc.history))]
+            if type == 'MARKET':
+                realised = self._fill(acc, symbol, side, qty, mark, TAKER_FEE)
+                order.update(status='FILLED', executedQty=f"{qty}", avgPrice=f"{mark}", cumQuote=f"{qty * mark}")
+                self._order_event(acc, order, 'TRADE', qty, mark, qty * mark * TAKER_FEE, realised)
+            else:
+                if price is None:
+                    raise api_error(-1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+                acc.orders[oid] = order
+                self._order_event(acc, order, 'NEW')
+                self._match(acc, symbol)
+            if newOrderRespType != 'RESULT' and order['status'] == 'FILLED':
+                # ACK responses are sent before the fill is known, as on Binance
+                return dict(order, status='NEW', executedQty='0', avgPrice='0.00', cumQuote='0')
+            return dict(order)
+
+    def get_order(self, account_id, symbol: str, orderId=None, origClientOrderId=None) -> dict:
+        with self._lock:
+            acc = self.account(account_id)
+            self._match(acc, symbol.upper())
+            for o in reversed(list(acc.history.values())):
+                if o['symbol'] == symbol.upper() and ((orderId is not None and o['orderId'] == int(orderId)) or o['clientOrderId'] == origClientOrderId):
+                    return dict(o)
+        raise api_error(-2013, 'Order does not exist.')
+
+    def open_orders(self, account_id, symbol: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            acc = self.account(account_id)
+            for s in ([symbol.upper()] if symbol else {o['symbol'] for o in acc.orders.values()}):
+                self._match(acc, s)
+            return [dict(o) for o in acc.orders.values() if symbol is None or o['symbol'] == symbol.upper()]
+
+    def cancel_all(self, account_id, symbol: str) -> dict:
+        with self._lock:
+            acc = self.account(account_id)
+            for oid in [oid for oid, o in acc.orders.items() if o['symbol'] == symbol.upper()]:
+                order = acc.orders.pop(oid)
+                order.update(status='CANCELED', updateTime=self.now_ms())
+                self._order_event(acc, order, 'CANCELED')
+        return {'code': 200, 'msg': 'The operation of cancel all open order is done.'}
+
+    def change_leverage(self, account_id, symbol: str, leverage) -> dict:
+        lev = int(leverage)
+        if not 1 <= lev <= 125:
+            raise api_error(-4028, 'Leverage is not valid.')
+        with self._lock:
+            self._path(symbol, self.auto_symbols)
+            self.account(account_id).leverage[symbol.upper()] = lev
+        return {'symbol': symbol.upper(), 'leverage': lev, 'maxNotionalValue': '1000000'}
+
+    def position_information(self, account_id, symbol: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            acc = self.account(account_id)
+            names = [symbol.upper()] if symbol else list(self._paths)
+            rows = []
+            for s in names:
+                self._match(acc, s)
+                pos = acc.positions.get(s) or {'amt': 0.0, 'entry': 0.0}
+                mark = self.mark_price(s)
+                rows.append({'symbol': s, 'positionAmt': f"{pos['amt']}", 'entryPrice': f"{pos['entry']}",
+                             'markPrice': f"{mark}", 'unRealizedProfit': f"{(mark - pos['entry']) * pos['amt']}",
+                             'leverage': str(acc.leverage.get(s, 20)), 'marginType': 'cross',
+                             'positionSide': 'BOTH', 'updateTime': self.now_ms()})
+            return rows
+
+    def balance(self, account_id) -> List[dict]:
+        with self._lock:
+            acc = self.account(account_id)
+            upnl = self._unrealised(acc)
+            available = acc.wallet + upnl - self._used_margin(acc)
+            return [{'accountAlias': 'sim', 'asset': 'USDT', 'balance': f"{acc.wallet}",
+                     'crossWalletBalance': f"{acc.wallet}", 'crossUnPnl': f"{upnl}",
+                     'availableBalance': f"{available}", 'maxWithdrawAmount': f"{max(0.0, available)}",
+                     'withdrawAvailable': f"{max(0.0, available)}", 'updateTime': self.now_ms()}]
+
+    # ---- transport effects ----
+    def ping(self) -> dict:
+        return {}
+
+    def server_time(self) -> dict:
+        return {'serverTime': self.now_ms()}
+
+    def call(self, fn, *args, **kwargs):
+        """Run one API call with the configured latency and error injection."""
+        self.calls += 1
+        endpoint = f"sim {getattr(fn, '__name__', 'call')}"
+        t0 = time.perf_counter()
+        try:
+            if self.latency_ms or self.jitter_ms:
+                time.sleep(max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.injected_errors += 1
+                raise api_error(-1001, 'Internal error; unable to process your request. Please try your request again.', 500)
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            metrics.observe_request(endpoint, time.perf_counter() - t0, metrics.error_code(e))
+            raise
+        metrics.observe_request(endpoint, time.perf_counter() - t0)
+        return result
+
+class SimClient:
+    """Duck-typed python-binance ``Client`` for one simulated account."""
+
+    simulated = True
+    testnet = False
+
+    def __init__(self, exchange: SimExchange, account_id):
+        self.exchange = exchange
+        self.account_id = account_id
+
+    def futures_ping(self):
+        return self.exchange.call(self.exchange.ping)
+
+    def futures_time(self):
+        return self.exchange.call(self.exchange.server_time)
+
+    def futures_exchange_info(self):
+        return self.exchange.call(self.exchange.exchange_info)
+
+    def futures_klines(self, symbol, interval, limit=500, startTime=None, endTime=None, **_):
+        return self.exchange.call(self.exchange.klines, symbol, interval, limit, startTime, endTime)
+
+    def futures_position_information(self, symbol=None, **_):
+        return self.exchange.call(self.exchange.position_information, self.account_id, symbol)
+
+    def futures_get_open_orders(self, symbol=None, **_):
+        return self.exchange.call(self.exchange.open_orders, self.account_id, symbol)
+
+    def futures_get_order(self, symbol, orderId=None, origClientOrderId=None, **_):
+        return self.exchange.call(self.exchange.get_order, self.account_id, symbol, orderId, origClientOrderId)
+
+    def futures_create_order(self, **params):
+        return self.exchange.call(self.exchange.create_order, self.account_id, **params)
+
+    def futures_cancel_all_open_orders(self, symbol, **_):
+        return self.exchange.call(self.exchange.cancel_all, self.account_id, symbol)
+
+    def futures_change_leverage(self, symbol, leverage, **_):
+        return self.exchange.call(self.exchange.change_leverage, self.account_id, symbol, leverage)
+
+    def futures_account_balance(self, **_):
+        return self.exchange.call(self.exchange.balance, self.account_id)
+
+class SimStream:
+    """``stream_factory`` for ``KlineFeed`` / ``MarkPriceFeed`` over the simulated market.
+
+    Each subscribed ``<symbol>@kline_<interval>`` gets one closed-candle event
+    right after every interval boundary of the exchange clock, and each
+    ``<symbol>@markPrice@1s`` one ``markPriceUpdate`` per second.
+    """
+
+    def __init__(self, ws_base, on_message, name='sim', exchange: Optional[SimExchange] = None):
+        self.on_message = on_message
+        self.name = name
+        self.exchange = exchange or get_sim_exchange()
+        self.streams = set()
+        self._stop = threading.Event()
+
+    @classmethod
+    def factory(cls, exchange: Optional[SimExchange] = None):
+        def build(ws_base, on_message, name='sim'):
+            return cls(ws_base, on_message, name=name, exchange=exchange)
+        return build
+
+    def _play_marks(self, stream: str):
+        symbol = stream.split('@')[0].upper()
+        while not self._stop.wait(1.0) and stream in self.streams:
+            self.on_message(stream, {'e': 'markPriceUpdate', 'E': self.exchange.now_ms(), 's': symbol,
+                                     'p': str(self.exchange.mark_price(symbol))})
+
+    def _play(self, stream: str):
+        if '@markPrice' in stream:
+            return self._play_marks(stream)
+        symbol, interval = stream.split('@kline_')
+        step = INTERVAL_MS.get(interval)
+        if step is None:
+            return
+        while not self._stop.is_set() and stream in self.streams:
+            now = self.exchange.now_ms()
+            boundary = now // step * step + step
+            if self._stop.wait((boundary - now) / 1000):
+                return
+            if stream not in self.streams:
+                return
+            rows = self.exchange.klines(symbol, interval, limit=1, endTime=boundary - step)
+            if rows:
+                r = rows[-1]
+                self.on_message(stream, {'e': 'kline', 'k': {
+                    's': symbol.upper(), 'i': interval, 't': r[0], 'T': r[6],
+                    'o': r[1], 'h': r[2], 'l': r[3], 'c': r[4], 'v': r[5], 'x': True}})
+
+    def subscribe(self, streams):
+        for s in streams:
+            if s not in self.streams:
+                self.streams.add(s)
+                threading.Thread(target=self._play, args=(s,), name=f'{self.name}-{s}', daemon=True).start()
+
+    def unsubscribe(self, streams):
+        self.streams.difference_update(streams)
+
+    def stop(self):
+        self._stop.set()
+
+_exchange: Optional[SimExchange] = None
+_exchange_lock = threading.Lock()
+
+def get_sim_exchange() -> SimExchange:
+    """The process-wide simulated exchange (created on first use from the SIM_* settings)."""
+    global _exchange
+    with _exchange_lock:
+        if _exchange is None:
+            _exchange = SimExchange()
+        return _exchange
+
+def set_sim_exchange(exchange: SimExchange):
+    """Replace the shared simulated exchange (tests, load benchmarks)."""
+    global _exchange
+    with _exchange_lock:
+        _exchange = exchange
@@ -0,0 +1,48 @@
+"""SQLite settings for many concurrent readers and one busy writer.
+
+WAL lets readers (request handlers, the broadcaster, traders) proceed while a
+write transaction is open; ``synchronous=NORMAL`` syncs at checkpoints instead
+of every commit, which is safe in WAL mode (a power cut can only lose the last
+transactions, never corrupt the file). The busy timeout makes a blocked writer
+wait instead of failing with "database is locked".
+"""
+import os
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+SQLITE_WAL = os.getenv('SQLITE_WAL', '1') == '1'
+SQLITE_BUSY_TIMEOUT_S = float(os.getenv('SQLITE_BUSY_TIMEOUT_S', '30'))
+# trader workers, request threads and stream threads each hold a connection while they work
+SQLITE_POOL_SIZE = int(os.getenv('SQLITE_POOL_SIZE', '20'))
+SQLITE_MAX_OVERFLOW = int(os.getenv('SQLITE_MAX_OVERFLOW', '20'))
+
+def is_file_sqlite(uri: str) -> bool:
+    return uri.startswith('sqlite') and ':memory:' not in uri and uri.rstrip('/') not in ('sqlite:', 'sqlite://')
+
+def engine_options(uri: str) -> dict:
+    """``SQLALCHEMY_ENGINE_OPTIONS`` for a database URI (empty unless it is a SQLite file).
+
+    The pool class is explicit: SQLAlchemy 1.4 gives file databases a
+    ``NullPool``, which rejects the pool sizes.
+    """
+    if not is_file_sqlite(uri):
+        return {}
+    return {'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT_S, 'check_same_thread': False},
+            'poolclass': QueuePool, 'pool_size': SQLITE_POOL_SIZE, 'max_overflow': SQLITE_MAX_OVERFLOW,
+            'pool_timeout': SQLITE_BUSY_TIMEOUT_S}
+
+@event.listens_for(Engine, 'connect')
+def _pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cur = dbapi_connection.cursor()
+    try:
+        cur.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_S * 1000)}")
+        if SQLITE_WAL:
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+    finally:
+        cur.close()
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import threading
+import time
+import requests
+from typing import Dict, Any, List, Optional
+
+from .binance_helper import futures_base_url
+from .rate_governor import governor, TRADING
+
+# exchangeInfo changes rarely (listings/delistings); one download per hour is plenty.
+DEFAULT_TTL = 3600
+# after a failed reload the old index is served this long before the next attempt
+REFRESH_RETRY_S = 30
+
+class SymbolCatalog:
+    """Process-wide index of USDT-M futures symbols for one base URL.
+
+    The full exchangeInfo document is downloaded at most once per TTL, no matter
+    how many trader threads or requests ask for it at the same time. Request
+    handlers use ``symbols(wait=False)``, which answers from the current index
+    and reloads an expired one in the background.
+    """
+
+    def __init__(self, base_url: str, ttl: float = DEFAULT_TTL):
+        self.base_url = base_url
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._symbols: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at = 0.0
+        self._etag = ''
+        # separate from _lock, which is held for the whole download
+        self._refresh_flag = threading.Lock()
+        self._refreshing = False
+
+    def _fetch(self) -> Dict[str, Any]:
+        url = f"{self.base_url}/fapi/v1/exchangeInfo"
+        host, weight, _ = governor.classify('get', url)
+        governor.acquire(host, weight, level=TRADING)
+        r = requests.get(url, timeout=10)
+        governor.observe(r)
+        r.raise_for_status()
+        return r.json()
+
+    @staticmethod
+    def _index(info: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        for s in info.get('symbols', []):
+            filters = {f.get('filterType'): f for f in s.get('filters', [])}
+            lot = filters.get('LOT_SIZE', {})
+            price = filters.get('PRICE_FILTER', {})
+            notional = filters.get('MIN_NOTIONAL', {})
+            out[s['symbol']] = {
+                'symbol': s['symbol'],
+                'status': s.get('status'),
+                'quoteAsset': s.get('quoteAsset'),
+                'quantityPrecision': int(s.get('quantityPrecision', 0) or 0),
+                'pricePrecision': int(s.get('pricePrecision', 0) or 0),
+                'stepSize': float(lot.get('stepSize', 0) or 0),
+                'minQty': float(lot.get('minQty', 0) or 0),
+                'tickSize': float(price.get('tickSize', 0) or 0),
+                'minNotional': float(notional.get('notional', 0) or 0),
+            }
+        return out
+
+    @property
+    def loaded_at(self) -> float:
+        return self._loaded_at
+
+    @property
+    def etag(self) -> str:
+        """Content hash of the current index ('' until loaded)."""
+        return self._etag
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._symbols)
+
+    def is_stale(self) -> bool:
+        return not self._symbols or (time.time() - self._loaded_at) > self.ttl
+
+    def refresh(self):
+        """Download exchangeInfo now and swap the index in one step."""
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self):
+        symbols = self._index(self._fetch())
+        self._etag = hashlib.sha1(json.dumps(symbols, sort_keys=True).encode()).hexdigest()[:16]
+        self._symbols = symbols
+        self._loaded_at = time.time()
+
+    def _retry_later(self):
+        """Keep serving the old index for ``REFRESH_RETRY_S`` instead of retrying on every call."""
+        if self._symbols:
+            self._loaded_at = time.time() - self.ttl + REFRESH_RETRY_S
+
+    def refresh_async(self) -> bool:
+        """Reload in a background thread unless a reload is already running."""
+        with self._refresh_flag:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True, name='symbol-catalog').start()
+        return True
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            self._retry_later()
+            print(f"Symbol catalog refresh failed for {self.base_url}: {e}")
+        finally:
+            self._refreshing = False
+
+    def ensure_loaded(self):
+        """Load (or reload after TTL). Concurrent callers share a single download.
+
+        When a reload fails but an older index exists, the old index keeps serving
+        and the next reload is tried after ``REFRESH_RETRY_S``.
+        """
+        if not self.is_stale():
+            return
+        with self._lock:
+            if not self.is_stale():
+                return
+            try:
+                self._refresh_locked()
+            except Exception:
+                if not self._symbols:
+                    raise
+                self._retry_later()
+                print(f"Symbol catalog refresh failed for {self.base_url}; serving cached data")
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        self.ensure_loaded()
+        return self._symbols.get(symbol)
+
+    def symbols(self, quote_asset: Optional[str] = 'USDT', status: Optional[str] = 'TRADING', wait: bool = True) -> List[str]:
+        """Symbol names; with ``wait=False`` never blocks (empty until the first load)."""
+        if wait:
+            self.ensure_loaded()
+        elif self.is_stale():
+            self.refresh_async()
+        return [s for s, f in self._symbols.items()
+                if (quote_asset is None or f['quoteAsset'] == quote_asset)
+                and (status is None or f['status'] == status)]
+
+class SimCatalog(SymbolCatalog):
+    """Catalog of the in-process simulated exchange; symbols it creates on demand show up at once."""
+
+    def __init__(self):
+        super().__init__('sim', ttl=60)
+
+    def _fetch(self) -> Dict[str, Any]:
+        from .sim_exchange import get_sim_exchange
+        return get_sim_exchange().exchange_info()
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        info = super().get(symbol)
+        if info is None:
+            self.refresh()
+            info = self._symbols.get(symbol)
+        return info
+
+_catalogs: Dict[str, SymbolCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+def get_catalog(testnet: bool = False, simulated: bool = False) -> SymbolCatalog:
+    """Return the shared catalog for mainnet, testnet or the simulated exchange."""
+    base = 'sim' if simulated else futures_base_url(testnet)
+    with _catalogs_lock:
+        cat = _catalogs.get(base)
+        if cat is None:
+            cat = _catalogs[base] = SimCatalog() if simulated else SymbolCatalog(base)
+        return cat
@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+from typing import Callable, Iterable, List, Set
+
+from websockets.sync.client import connect
+
+# Binance USDT-M futures accepts at most 200 streams per connection.
+MAX_STREAMS_PER_CONNECTION = 200
+# ... and at most 10 incoming messages per second on each; stay well below.
+MAX_CONTROL_FRAMES_PER_S = 5
+CONTROL_COALESCE_S = 0.2
+
+class CombinedStream:
+    """One Binance combined-stream websocket (``/stream?streams=a/b/c``) in a thread.
+
+    Streams can be added or removed while connected (SUBSCRIBE/UNSUBSCRIBE).
+    Changes are collected for ``CONTROL_COALESCE_S`` and sent as one frame per
+    method, at most ``MAX_CONTROL_FRAMES_PER_S`` frames per second (Binance
+    drops connections that send more than 10 messages a second). The connection
+    is re-opened with exponential backoff whenever it drops, and every message
+    is handed to ``on_message(stream_name, data)``.
+    """
+
+    def __init__(self, ws_base: str, on_message: Callable[[str, dict], None], name: str = 'stream'):
+        self.ws_base = ws_base
+        self.on_message = on_message
+        self.name = name
+        self.streams: Set[str] = set()
+        self.reconnects = 0
+        self.frames_sent = 0
+        self._lock = threading.Lock()
+        self._ws = None
+        self._ids = 0
+        self._to_subscribe: Set[str] = set()
+        self._to_unsubscribe: Set[str] = set()
+        self._last_frame = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f'ws-{self.name}', daemon=True)
+            self._thread.start()
+            threading.Thread(target=self._control_loop, name=f'ws-{self.name}-control', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    # ---- SUBSCRIBE / UNSUBSCRIBE frames ----
+    def _send(self, ws, method: str, streams: List[str]):
+        self._ids += 1
+        try:
+            ws.send(json.dumps({'method': method, 'params': streams, 'id': self._ids}))
+            self.frames_sent += 1
+        except Exception:
+            pass  # the connection is going down; the reconnect subscribes from self.streams
+
+    def _next_frame(self):
+        """(ws, method, streams) for the next pending frame, or None (nothing pending or not connected)."""
+        with self._lock:
+            ws = self._ws
+            if ws is None:
+                return None
+            if self._to_unsubscribe:
+                pending, method = self._to_unsubscribe, 'UNSUBSCRIBE'
+            elif self._to_subscribe:
+                pending, method = self._to_subscribe, 'SUBSCRIBE'
+            else:
+                return None
+            streams = sorted(pending)
+            pending.clear()
+            return ws, method, streams
+
+    def _control_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            self._stop.wait(CONTROL_COALESCE_S)   # let a burst of (un)subscribes pile up
+            while not self._stop.is_set():
+                gap = self._last_frame + 1.0 / MAX_CONTROL_FRAMES_PER_S - time.time()
+                if gap > 0:
+                    self._stop.wait(gap)
+                frame = self._next_frame()
+                if frame is None:
+                    break
+                self._send(*frame)
+                self._last_frame = time.time()
+
+    def subscribe(self, streams: Iterable[str]):
+        with self._lock:
+            new = [s for s in streams if s not in self.streams]
+            self.streams.update(new)
+            self._to_unsubscribe.difference_update(new)
+            self._to_subscribe.update(new)
+        if new:
+            self._wake.set()
+        self.start()
+
+    def unsubscribe(self, streams: Iterable[str]):
+        with self._lock:
+            gone = [s for s in streams if s in self.streams]
+            self.streams.difference_update(gone)
+            for s in gone:
+                if s in self._to_subscribe:
+                    self._to_subscribe.discard(s)   # never sent: nothing to undo
+                else:
+                    self._to_unsubscribe.add(s)
+        if gone:
+            self._wake.set()
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            with self._lock:
+                streams = sorted(self.streams)
+            if not streams:
+                self._stop.wait(1.0)
+                continue
+            try:
+                with connect(f"{self.ws_base}/stream?streams={'/'.join(streams)}", max_size=2 ** 22) as ws:
+                    backoff = 1.0
+                    # the URL subscribed `streams`; catch up on changes made while we were connecting
+                    with self._lock:
+                        self._ws = ws
+                        self._to_subscribe = self.streams - set(streams)
+                        self._to_unsubscribe = set(streams) - self.streams
+                    self._wake.set()
+                    for raw in ws:
+                        msg = json.loads(raw)
+                        if 'stream' in msg:
+                            self.on_message(msg['stream'], msg.get('data') or {})
+            except Exception as e:
+                if not self._stop.is_set():
+                    print(f"Websocket {self.name} dropped: {e}; reconnecting in {backoff:.0f}s")
+            finally:
+                self._ws = None
+            if self._stop.is_set():
+                break
+            self.reconnects += 1
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+class StreamMux:
+    """Spreads any number of streams over as few CombinedStream connections as possible."""
+
+    def __init__(self, ws_base: str, on_message: Callable[[str, dict], None], name: str = 'mux',
+                 stream_factory: Callable[..., CombinedStream] = CombinedStream):
+        self.ws_base = ws_base
+        self.on_message = on_message
+        self.name = name
+        self.stream_factory = stream_factory
+        self._lock = threading.Lock()
+        self._conns: List[CombinedStream] = []
+        self._where = {}
+
+    def subscribe(self, stream: str):
+        with self._lock:
+            if stream in self._where:
+                return
+            conn = next((c for c in self._conns if len(c.streams) < MAX_STREAMS_PER_CONNECTION), None)
+            if conn is None:
+                conn = self.stream_factory(self.ws_base, self.on_message, name=f'{self.name}-{len(self._conns)}')
+                self._conns.append(conn)
+            self._where[stream] = conn
+        conn.subscribe([stream])
+
+    def unsubscribe(self, stream: str):
+        with self._lock:
+            conn = self._where.pop(stream, None)
+        if conn is not None:
+            conn.unsubscribe([stream])
+
+    def connections(self) -> int:
+        return len(self._conns)
@@ -2,7 +2,8 @@
 const socket = (typeof io !== 'undefined') ? io() : null;
 
 async function api(path, opts={}){
-  const res = await fetch((window.API_BASE||'') + path, {headers:{'Content-Type':'application/json'}, ...opts});
+  // 'no-cache' = revalidate cached GETs with If-None-Match; unchanged bot lists come back as 304
+  const res = await fetch((window.API_BASE||'') + path, {headers:{'Content-Type':'application/json'}, cache:'no-cache', ...opts});
   const txt = await res.text();
   let data = {}; try { data = txt ? JSON.parse(txt) : {}; } catch(e) { data = {success:false, error: txt||e+''}; }
   if(!res.ok || data.success===false){ throw new Error(data.message || data.error || ('HTTP '+res.status)); }
@@ -19,6 +20,32 @@ function el(tag, attrs={}, ...children){
   return n;
 }
 function badge(text, on=true){ return el('span', {class:'badge ' + (on?'on':'off')}, text); }
+function money(v){ return '$' + (Number(v ?? 0)).toFixed(2); }
+
+/* -------- Live rooms: subscribe -> snapshot, then versioned field deltas -------- */
+const live = {state:{}, wanted:new Set(), listeners:{}};
+function roomsPayload(rooms){
+  const p = {bots:[], accounts:[]};
+  for(const r of rooms){ const [kind, id] = r.split(':'); (kind==='bot' ? p.bots : p.accounts).push(Number(id)); }
+  return p;
+}
+// Follow exactly these rooms ('bot:<id>', 'account:<id>'): leave the others, snapshot the new ones.
+function liveFollow(rooms){
+  const next = new Set(rooms);
+  const gone = [...live.wanted].filter(r=>!next.has(r));
+  const added = [...next].filter(r=>!live.wanted.has(r));
+  live.wanted = next;
+  for(const r of gone) delete live.state[r];
+  if(!socket) return;
+  if(gone.length) socket.emit('unsubscribe', roomsPayload(gone));
+  if(added.length) socket.emit('subscribe', roomsPayload(added));
+  for(const r of next){ if(live.state[r]) liveNotify(r, live.state[r].data); }
+}
+// One listener per page part: fn(room, fullState, changedFields)
+function liveOn(name, fn){ live.listeners[name] = fn; }
+function liveNotify(room, changes){
+  for(const fn of Object.values(live.listeners)){ try{ fn(room, live.state[room].data, changes); }catch(e){} }
+}
 
 /* -------- Modal helpers -------- */
 function openModal(title, bodyEl, onOk){
@@ -43,16 +70,18 @@ async function initDashboard(){
   if(!list.bots || !list.bots.length){ botList.append(el('div', {class:'text-subtle text-sm'}, 'No bots yet.')); empty.classList.remove('hidden'); shell.classList.add('hidden'); return; }
 
   let selected = list.bots[0];
+  const badges = {};
   function drawList(){
     botList.innerHTML = '';
     for(const b of list.bots){
       const row = el('div', {class: 'flex items-center justify-between rounded-xl p-3 bg-[rgba(27,37,56,.4)]'});
-      row.append(el('div', {}, b.name), badge(b.status || 'stopped', b.status==='running'));
+      badges[b.id] = badge(b.status || 'stopped', b.status==='running');
+      row.append(el('div', {}, b.name), badges[b.id]);
       // start button
       const startBtn = el('button', {class:'btn btn-primary ml-2'}, 'Start');
       startBtn.onclick = ()=> openStartModal(b);
       row.append(startBtn);
-      row.addEventListener('click', async (e)=>{ if(e.target===startBtn) return; selected = b; await refreshSummary(); });
+      row.addEventListener('click', async (e)=>{ if(e.target===startBtn) return; selected = b; await refreshSummary(); const st = live.state['bot:'+b.id]; if(st) showPosition(st.data); });
       botList.append(row);
     }
   }
@@ -97,18 +126,50 @@ async function initDashboard(){
     }
   }
 
+  // status badges and the selected bot's open position follow the bot rooms; the trade totals
+  // keep the REST definitions and are re-read only when the room's trades_version moves
+  function showPosition(s){
+    const pos = Object.values(s.positions || {});
+    document.getElementById('runRoi').textContent = (s.unrealised_roi_percent ?? 0) + '%';
+    document.getElementById('runSide').textContent = pos.length===1 ? pos[0].side : (pos.length ? pos.length + ' open' : '-');
+    document.getElementById('entryPrice').textContent = pos.length===1 ? pos[0].entry_price : '-';
+    document.getElementById('markPrice').textContent = pos.length===1 ? pos[0].mark_price : '-';
+  }
+  const tradesSeen = {};   // room -> trades_version the totals on screen were read at
+  function onRoom(room, s){
+    const [kind, id] = room.split(':');
+    if(kind!=='bot') return;
+    const b = badges[Number(id)];
+    if(b){ b.textContent = s.status; b.className = 'badge ' + (s.status==='running'?'on':'off'); }
+    const moved = room in tradesSeen && tradesSeen[room] !== s.trades_version;
+    tradesSeen[room] = s.trades_version;
+    if(selected && Number(id)===selected.id && !shell.classList.contains('hidden')){
+      if(moved) refreshSummary().then(()=>showPosition(live.state[room] ? live.state[room].data : s));
+      else showPosition(s);
+    }
+  }
+  liveOn('dashboard', onRoom);
+
   drawList();
   await refreshSummary();
+  liveFollow(list.bots.map(b=>'bot:'+b.id));
 }
 
 if(socket){
-  socket.on('bot_status_update', async ()=>{
-    try{
-      if(document.getElementById('dashboard')) await initDashboard();
-      if(document.getElementById('reportPage')) await initReportPage();
-      if(window.drawBots) await window.drawBots();
-    }catch(e){}
+  socket.on('snapshot', (s)=>{
+    if(!live.wanted.has(s.room)) return;
+    live.state[s.room] = {version: s.version, data: s.data};
+    liveNotify(s.room, s.data);
+  });
+  socket.on('delta', (d)=>{
+    const st = live.state[d.room];
+    if(!st || d.version <= st.version) return;
+    if(d.from !== st.version){ socket.emit('subscribe', roomsPayload([d.room])); return; } // missed one: resync
+    Object.assign(st.data, d.changes); st.version = d.version;
+    liveNotify(d.room, d.changes);
   });
+  // rooms belong to a connection: after a reconnect join them again for fresh snapshots
+  socket.on('connect', ()=>{ live.state = {}; if(live.wanted.size) socket.emit('subscribe', roomsPayload([...live.wanted])); });
 }
 
 /* -------- Bot page -------- */
@@ -0,0 +1,119 @@
+"""Latency of /accounts/api and /api/bots/<id>/positions: fresh client per request vs pooled client.
+
+A local HTTP server stands in for Binance. Every new connection pays
+``--handshake-ms`` (TCP+TLS set-up) and every request ``--rtt-ms``, so the
+numbers show what keep-alive reuse and skipping the constructor ping save.
+
+    python benchmarks/bench_clients.py --accounts 15 --requests 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def make_handler(handshake_ms, rtt_ms):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            time.sleep(handshake_ms / 1000)
+            super().setup()
+
+        def do_GET(self):
+            time.sleep(rtt_ms / 1000)
+            if 'balance' in self.path:
+                body = [{'asset': 'USDT', 'balance': '1000', 'withdrawAvailable': '900'}]
+            elif 'positionRisk' in self.path:
+                body = [{'symbol': 'BTCUSDT', 'positionAmt': '0.01', 'entryPrice': '60000'}]
+            elif 'openOrders' in self.path:
+                body = []
+            else:
+                body = {}
+            raw = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+def timed(client, path, n, before=None):
+    samples = []
+    for _ in range(n):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        r = client.get(path)
+        assert r.status_code == 200, r.data
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), max(samples)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--accounts', type=int, default=15)
+    ap.add_argument('--symbols', type=int, default=10)
+    ap.add_argument('--requests', type=int, default=20)
+    ap.add_argument('--handshake-ms', type=float, default=30.0)
+    ap.add_argument('--rtt-ms', type=float, default=20.0)
+    args = ap.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.handshake_ms, args.rtt_ms))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    from binance.client import Client
+    Client.API_URL = f'{base}/api'
+    Client.FUTURES_URL = f'{base}/fapi'
+
+    from app import create_app, db
+    from app.models import Account, Bot
+    from app.accounts import routes as acc_routes
+    from app.bots import routes as bot_routes
+    from app.utils.position_book import get_position_book
+    from app.utils.balance_cache import balance_cache
+
+    app = create_app()
+    with app.app_context():
+        for i in range(args.accounts):
+            db.session.add(Account(name=f'bench-{i}', api_key='k', api_secret='s', is_testnet=False))
+        db.session.commit()
+        db.session.add(Bot(name='bench', account_id=1, timeframe='1m', trade_mode='follow', leverage=1,
+                           margin_mode='normal', margin_usd=1, run_mode='ongoing',
+                           symbols=json.dumps([f'SYM{i}USDT' for i in range(args.symbols)])))
+        db.session.commit()
+
+    def fresh_client(acc):
+        # previous behaviour: a new Client (and session, and ping) for every use
+        return Client(acc.api_key, acc.api_secret, testnet=bool(acc.is_testnet))
+
+    # measure the client, not the position-book / balance caches: every request refetches once
+    def expire():
+        get_position_book(1).invalidate()
+        balance_cache._entries.clear()
+    http = app.test_client()
+    routes = [('/accounts/api', f'{args.accounts} accounts'), ('/api/bots/1/positions', f'{args.symbols} symbols')]
+    print(f"{'route':<24} {'mode':<8} {'median ms':>10} {'max ms':>8}")
+    for path, label in routes:
+        with mock.patch.object(acc_routes, 'get_account_client', fresh_client), \
+             mock.patch.object(bot_routes, 'get_account_client', fresh_client):
+            med, worst = timed(http, path, args.requests, expire)
+        print(f"{path:<24} {'fresh':<8} {med:>10.1f} {worst:>8.1f}")
+        med, worst = timed(http, path, args.requests, expire)
+        print(f"{path:<24} {'pooled':<8} {med:>10.1f} {worst:>8.1f}   ({label})")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
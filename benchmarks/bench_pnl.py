@@ -0,0 +1,80 @@
+"""Unrealised PnL benchmark: one mark-price tick over N open trades.
+
+Fills ``PnlEngine`` with ``--trades`` open trades spread over ``--symbols``
+symbols and ``--bots`` bots, then for each tick sets a new mark
+price for every symbol and takes a snapshot (per-trade PnL/ROI plus bot and
+account totals). The baseline is the same computation as a Python loop over
+per-trade dicts, which is what a per-row implementation costs.
+
+    python benchmarks/bench_pnl.py --trades 1000 10000 --symbols 300
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def python_pass(trades, marks):
+    """Per-row baseline: PnL/ROI per trade and totals per bot and account."""
+    bots, accounts = {}, {}
+    for t in trades:
+        mark = marks.get(t['symbol'], t['entry'])
+        pnl = t['qty'] * (mark - t['entry'])
+        t['pnl'], t['roi'] = pnl, pnl / t['margin'] * 100 if t['margin'] else 0.0
+        for totals, key in ((bots, t['bot']), (accounts, t['account'])):
+            agg = totals.setdefault(key, [0, 0.0, 0.0])
+            agg[0] += 1; agg[1] += pnl; agg[2] += t['margin']
+    return bots, accounts
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--trades', type=int, nargs='+', default=[1000, 10000])
+    ap.add_argument('--symbols', type=int, default=300)
+    ap.add_argument('--bots', type=int, default=50)
+    ap.add_argument('--ticks', type=int, default=50)
+    args = ap.parse_args()
+
+    from app import pnl
+    pnl.PNL_REFRESH_MS = 0
+
+    for n in args.trades:
+        engine = pnl.PnlEngine()
+        rnd = random.Random(n)
+        symbols = [f'S{i}USDT' for i in range(args.symbols)]
+        trades = []
+        for i in range(n):
+            # one open trade per (account, bot, symbol); extra accounts once every pair is taken
+            bot, rest = i % args.bots, i // args.bots
+            t = {'account': rest // len(symbols), 'bot': bot, 'symbol': symbols[rest % len(symbols)],
+                 'qty': rnd.choice((-1, 1)) * rnd.uniform(0.01, 2), 'entry': rnd.uniform(1, 1000)}
+            t['margin'] = abs(t['qty']) * t['entry'] / 5
+            trades.append(t)
+            engine.track(t['account'], t['bot'], t['symbol'], t['qty'], t['entry'], t['margin'])
+        marks = {}
+        mark_s = snap_s = py_s = 0.0
+        for _ in range(args.ticks):
+            t0 = time.perf_counter()
+            for sym in symbols:
+                marks[sym] = rnd.uniform(1, 1000)
+                engine.set_mark('', sym, marks[sym])
+            mark_s += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            snap = engine.snapshot()
+            snap_s += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            python_pass(trades, marks)
+            py_s += time.perf_counter() - t0
+        rows_ms = timed_rows(snap)
+        print(f"{n:>7} trades  mark updates {mark_s / args.ticks * 1000:7.3f} ms  "
+              f"snapshot {snap_s / args.ticks * 1000:7.3f} ms  python loop {py_s / args.ticks * 1000:8.3f} ms  "
+              f"rows(bot) {rows_ms:6.3f} ms  tracked {engine.open_count()}")
+
+def timed_rows(snap):
+    t0 = time.perf_counter()
+    snap.rows(1)
+    return (time.perf_counter() - t0) * 1000
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""Scale benchmark: N bots x M symbols on the real start/scheduler/trader path.
+
+Every case starts ``--bots`` bots with ``--symbols`` distinct symbols each on one
+simulated account (``app/utils/sim_exchange.py``) through ``/api/bots/<id>/start``,
+with candles shortened to ``--candle-s`` seconds, and lets them trade for
+``--candles`` candles. Reported per case:
+
+- time until every trader is set up
+- thread count and RSS (peak while trading, and the increase over the idle baseline)
+- cycle start skew: candle open -> ``run_cycle`` entered, percentiles in ms
+- order latency: candle open -> the cycle's last order accepted by the exchange
+- missed: share of (symbol, candle) cycles that never ran, and share of symbols
+  that missed at least one candle; ``scheduler.missed_cycles`` as counted there
+- API latency of ``GET /api/bots`` and ``GET /api/trades`` polled while trading
+
+The JSON report (config + one entry per case) goes to stdout or ``--out`` so two
+versions can be diffed; a table is printed on stderr.
+
+    python benchmarks/bench_scale.py --bots 1 10 --symbols 10 50 --candles 5 --candle-s 10
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak, KB on Linux
+
+def percentiles(values):
+    if not values:
+        return None
+    v = sorted(values)
+    pick = lambda q: round(v[min(len(v) - 1, int(q * len(v)))], 1)
+    return {'n': len(v), 'p50': pick(0.50), 'p90': pick(0.90), 'p99': pick(0.99), 'max': round(v[-1], 1)}
+
+class Recorder:
+    """Cycle and order timestamps of the running traders, keyed by candle open."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.cycles = {}       # (key, boundary) -> ms after the boundary run_cycle started
+        self.orders = {}       # (key, boundary) -> ms after the boundary of the cycle's last order
+
+    def wrap_cycle(self, run_cycle):
+        rec = self
+
+        def recorded(trader):
+            now = time.time() * 1000
+            boundary = int(now // trader.interval_ms * trader.interval_ms)
+            rec.local.cycle = (trader.key, boundary)
+            with rec.lock:
+                rec.cycles[rec.local.cycle] = now - boundary
+            try:
+                return run_cycle(trader)
+            finally:
+                rec.local.cycle = None
+        return recorded
+
+    def order_accepted(self):
+        cycle = getattr(self.local, 'cycle', None)
+        if cycle is not None:
+            with self.lock:
+                self.orders[cycle] = time.time() * 1000 - cycle[1]
+
+def measured_exchange(**kwargs):
+    """A SimExchange that reports every accepted order to ``exchange.recorder``."""
+    from app.utils.sim_exchange import SimExchange
+
+    class MeasuredExchange(SimExchange):
+        recorder = None
+
+        def create_order(self, *args, **params):
+            res = super().create_order(*args, **params)
+            if self.recorder is not None:
+                self.recorder.order_accepted()
+            return res
+    return MeasuredExchange(**kwargs)
+
+class Sampler(threading.Thread):
+    def __init__(self, period=0.2):
+        super().__init__(daemon=True)
+        self.period = period
+        self.stop = threading.Event()
+        self.threads = []
+        self.rss = []
+
+    def run(self):
+        while not self.stop.is_set():
+            self.threads.append(threading.active_count())
+            self.rss.append(rss_mb())
+            self.stop.wait(self.period)
+
+class ApiProbe(threading.Thread):
+    def __init__(self, app, period=0.25):
+        super().__init__(daemon=True)
+        self.client = app.test_client()
+        self.period = period
+        self.stop = threading.Event()
+        self.latency = {'/api/bots': [], '/api/trades?page_size=50': []}
+        self.errors = 0
+
+    def run(self):
+        while not self.stop.is_set():
+            for url, samples in self.latency.items():
+                t0 = time.perf_counter()
+                if self.client.get(url).status_code != 200:
+                    self.errors += 1
+                samples.append((time.perf_counter() - t0) * 1000)
+            self.stop.wait(self.period)
+
+def run_case(app, account_id, n_bots, n_symbols, args):
+    from app import db
+    from app import bot_logic
+    from app.models import Bot
+    from app.scheduler import scheduler
+    from app.utils.sim_exchange import get_sim_exchange
+
+    with app.app_context():
+        tag = time.time_ns()
+        bot_ids = []
+        for b in range(n_bots):
+            bot = Bot(name=f'scale-{tag}-{b}', account_id=account_id, timeframe='1m',
+                      symbols=json.dumps([f'B{b}S{s}X{tag % 10000}USDT' for s in range(n_symbols)]),
+                      trade_mode='follow', leverage=1, margin_mode='normal', margin_usd=args.margin,
+                      run_mode='ongoing')
+            db.session.add(bot)
+            db.session.flush()
+            bot_ids.append(bot.id)
+        db.session.commit()
+
+    interval_ms = args.candle_s * 1000
+    rec = Recorder()
+    get_sim_exchange().recorder = rec
+    sampler, probe = Sampler(), ApiProbe(app)
+    client = app.test_client()
+    threads_idle, rss_idle = threading.active_count(), rss_mb()
+    missed_before = scheduler.missed_cycles
+
+    sampler.start()
+    run_cycle = bot_logic.SymbolTrader.run_cycle
+    bot_logic.SymbolTrader.run_cycle = rec.wrap_cycle(run_cycle)
+    try:
+        t0 = time.perf_counter()
+        for bot_id in bot_ids:
+            client.post(f'/api/bots/{bot_id}/start')
+        traders = [t for bot_id in bot_ids for t in bot_logic.running_bots[bot_id]['traders'].values()]
+        deadline = time.time() + args.setup_timeout
+        while not all(t.ready for t in traders) and time.time() < deadline:
+            time.sleep(0.005)
+        ready_s = time.perf_counter() - t0
+        n_ready = sum(1 for t in traders if t.ready)
+
+        # measure whole candles starting after the first one every trader takes part in
+        window_start = (int(time.time() * 1000) // interval_ms + 2) * interval_ms
+        window_end = window_start + args.candles * interval_ms
+        probe.start()
+        time.sleep(max(0.0, (window_end + interval_ms / 2) / 1000 - time.time()))
+    finally:
+        probe.stop.set(); probe.join()
+        for bot_id in bot_ids:
+            client.post(f'/api/bots/{bot_id}/stop')
+        bot_logic.SymbolTrader.run_cycle = run_cycle
+        get_sim_exchange().recorder = None
+        sampler.stop.set(); sampler.join()
+
+    boundaries = range(window_start, window_end, interval_ms)
+    keys = [t.key for t in traders]
+    in_window = lambda d: {k: v for k, v in d.items() if window_start <= k[1] < window_end}
+    cycles, orders = in_window(rec.cycles), in_window(rec.orders)
+    missing = [(k, b) for k in keys for b in boundaries if (k, b) not in cycles]
+    expected = len(keys) * len(boundaries)
+    return {
+        'bots': n_bots,
+        'symbols_per_bot': n_symbols,
+        'traders': len(keys),
+        'traders_ready': n_ready,
+        'ready_s': round(ready_s, 3),
+        'threads_idle': threads_idle,
+        'threads_peak': max(sampler.threads, default=threads_idle),
+        'rss_idle_mb': round(rss_idle, 1),
+        'rss_peak_mb': round(max(sampler.rss, default=rss_idle), 1),
+        'rss_per_trader_kb': round((max(sampler.rss, default=rss_idle) - rss_idle) * 1024 / max(1, len(keys)), 1),
+        'candles': len(boundaries),
+        'cycles_expected': expected,
+        'cycles_run': len(cycles),
+        'missed_cycle_share': round(len(missing) / expected, 4) if expected else 0.0,
+        'missed_symbol_share': round(len({k for k, _ in missing}) / len(keys), 4) if keys else 0.0,
+        'scheduler_missed_cycles': scheduler.missed_cycles - missed_before,
+        'cycle_start_ms': percentiles(list(cycles.values())),
+        'order_latency_ms': percentiles(list(orders.values())),
+        'api_ms': {url: percentiles(v) for url, v in probe.latency.items()},
+        'api_errors': probe.errors,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    ap.add_argument('--bots', type=int, nargs='+', default=[1, 10])
+    ap.add_argument('--symbols', type=int, nargs='+', default=[10, 50])
+    ap.add_argument('--candles', type=int, default=5, help='candles measured per case')
+    ap.add_argument('--candle-s', type=int, default=10,
+                    help='accelerated length of the 1m candle; keep it well above the fixed waits of a cycle')
+    ap.add_argument('--latency-ms', type=float, default=20.0, help='simulated REST round trip')
+    ap.add_argument('--jitter-ms', type=float, default=5.0)
+    ap.add_argument('--margin', type=float, default=10.0, help='margin_usd of every bot')
+    ap.add_argument('--setup-timeout', type=float, default=60.0)
+    ap.add_argument('--workers', type=int, help='SCHEDULER_MAX_WORKERS')
+    ap.add_argument('--burst', type=int, help='SCHEDULER_BURST_SIZE')
+    ap.add_argument('--stagger-ms', type=int, help='SCHEDULER_STAGGER_MS')
+    ap.add_argument('--out', help='write JSON here instead of stdout')
+    args = ap.parse_args()
+
+    # the scheduler reads its settings at import
+    for env, value in (('SCHEDULER_MAX_WORKERS', args.workers), ('SCHEDULER_BURST_SIZE', args.burst),
+                       ('SCHEDULER_STAGGER_MS', args.stagger_ms)):
+        if value is not None:
+            os.environ[env] = str(value)
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+
+    from app import create_app, db, bot_logic
+    from app.models import Account
+    from app.scheduler import scheduler
+    from app.utils import sim_exchange
+
+    candle_ms = args.candle_s * 1000
+    bot_logic.TIMEFRAME_SECONDS['1m'] = args.candle_s
+    sim_exchange.INTERVAL_MS['1m'] = candle_ms
+    sim_exchange.set_sim_exchange(measured_exchange(
+        symbols=[], tick_ms=max(10, candle_ms // 20), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=0.0, start_balance=1e12, price_dir=None, auto_symbols=True,
+        history_ms=100 * candle_ms))  # short history keeps the fine-tick price paths cheap
+
+    app = create_app()
+    with app.app_context():
+        acc = Account(name=f'scale-{time.time_ns()}', api_key='', api_secret='', is_testnet=False, is_simulated=True)
+        db.session.add(acc); db.session.commit()
+        account_id = acc.id
+
+    config = {'candle_s': args.candle_s, 'candles': args.candles, 'latency_ms': args.latency_ms,
+              'jitter_ms': args.jitter_ms, 'scheduler': {'max_workers': scheduler.max_workers,
+                                                          'burst_size': scheduler.burst_size,
+                                                          'stagger_ms': scheduler.stagger_ms},
+              'python': sys.version.split()[0], 'cpus': os.cpu_count()}
+    results = []
+    print(f"{'bots':>5} {'sym/bot':>7} {'ready s':>8} {'threads':>8} {'rss MB':>7} {'start p99':>10} "
+          f"{'order p50':>10} {'order p99':>10} {'missed':>7} {'api p99':>8}", file=sys.stderr)
+    for n_bots in args.bots:
+        for n_symbols in args.symbols:
+            with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sys.stderr if os.getenv("BENCH_VERBOSE") else sink):
+                r = run_case(app, account_id, n_bots, n_symbols, args)
+            results.append(r)
+            start, order = r['cycle_start_ms'] or {}, r['order_latency_ms'] or {}
+            api = r['api_ms']['/api/bots'] or {}
+            print(f"{n_bots:>5} {n_symbols:>7} {r['ready_s']:>8.2f} {r['threads_peak']:>8} {r['rss_peak_mb']:>7.0f} "
+                  f"{start.get('p99', '-'):>10} {order.get('p50', '-'):>10} {order.get('p99', '-'):>10} "
+                  f"{r['missed_cycle_share']:>7.1%} {api.get('p99', '-'):>8}", file=sys.stderr)
+
+    out = json.dumps({'config': config, 'results': results}, indent=2)
+    if args.out:
+        with open(args.out, 'w') as fh:
+            fh.write(out)
+    else:
+        print(out)
+
+if __name__ == '__main__':
+    main()
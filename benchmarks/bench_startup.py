@@ -0,0 +1,97 @@
+"""Start-up benchmark: time-to-first-trade-cycle for a bot with N symbols.
+
+Runs the real ``/api/bots/<id>/start`` route and scheduler against an offline
+client (no Binance calls) with 1-second candles, and reports how long it takes
+until every trader is set up and until every trader has run its first cycle.
+The cost of one ``create_app()`` call is measured as well, since that is what
+each trader used to pay before it could trade.
+
+    python benchmarks/bench_startup.py --symbols 10 50 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+class OfflineClient:
+    testnet = True
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def futures_change_leverage(self, **kwargs):
+        return {}
+
+    def futures_position_information(self, **kwargs):
+        return []
+
+    def futures_klines(self, **kwargs):
+        return []
+
+def run(n_symbols, first_cycle):
+    from app import create_app, db
+    from app import bot_logic
+    from app.bots import routes as bot_routes
+    from app.scheduler import local_clock
+    from app.market_data import KlineFeed, ReplayStream
+    from app.models import Account, Bot
+
+    app = create_app()
+    with app.app_context():
+        acc = Account.query.filter_by(name='bench').first()
+        if not acc:
+            acc = Account(name='bench', api_key='k', api_secret='s', is_testnet=True)
+            db.session.add(acc); db.session.commit()
+        name = f'bench-{n_symbols}-{time.time_ns()}'
+        bot = Bot(name=name, account_id=acc.id, timeframe='1m', symbols=json.dumps([f'SYM{i}USDT' for i in range(n_symbols)]),
+                  trade_mode='follow', leverage=1, margin_mode='normal', margin_usd=1, run_mode='ongoing')
+        db.session.add(bot); db.session.commit()
+        bot_id = bot.id
+
+    def on_cycle(trader):
+        first_cycle.setdefault(trader.key, time.perf_counter())
+
+    client = app.test_client()
+    feed = KlineFeed('replay', stream_factory=ReplayStream.factory(tempfile.mkdtemp()))
+    with mock.patch.object(bot_logic, 'get_account_client', lambda acc: OfflineClient()), \
+         mock.patch.object(bot_logic, 'get_symbol_precision', lambda c, s: 3), \
+         mock.patch.object(bot_routes, 'get_clock', lambda testnet: local_clock), \
+         mock.patch.object(bot_logic, 'get_kline_feed', lambda *args: feed), \
+         mock.patch.object(bot_logic.SymbolTrader, 'run_cycle', on_cycle):
+        t0 = time.perf_counter()
+        client.post(f'/api/bots/{bot_id}/start')
+        traders = list(bot_logic.running_bots[bot_id]['traders'].values())
+        while not all(t.ready for t in traders):
+            time.sleep(0.001)
+        t_ready = time.perf_counter() - t0
+        deadline = time.time() + 10
+        while len([t for t in traders if t.key in first_cycle]) < n_symbols and time.time() < deadline:
+            time.sleep(0.005)
+        t_first = max(first_cycle[t.key] for t in traders) - t0 if traders else 0.0
+        client.post(f'/api/bots/{bot_id}/stop')
+    return t_ready, t_first
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--symbols', type=int, nargs='+', default=[10, 50, 200])
+    args = ap.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    from app import create_app, bot_logic
+    bot_logic.TIMEFRAME_SECONDS['1m'] = 1  # accelerated candles
+
+    create_app()  # warm imports so the timing below is the per-call cost
+    t0 = time.perf_counter(); create_app(); create_app_ms = (time.perf_counter() - t0) * 1000
+    print(f"create_app(): {create_app_ms:.1f} ms per call (previously paid once per trader)")
+    print(f"{'symbols':>8} {'all ready ms':>13} {'first cycle ms':>15} {'old create_app ms':>18}")
+    for n in args.symbols:
+        ready, first = run(n, {})
+        print(f"{n:>8} {ready * 1000:>13.1f} {first * 1000:>15.1f} {create_app_ms * n:>18.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Report-summary benchmark on a seeded Trade table.
+
+Seeds ``--rows`` trades into a throw-away SQLite database, then times
+``/api/reports/live-summary``-style and ``bot-summary``-style summaries:
+
+* ``python``: the previous implementation (load every Trade, bucket in Python)
+* ``sql``: the single aggregate query in ``bots.routes._build_summary``
+
+once without and once with the Trade indexes, and checks both give the same JSON.
+
+    python benchmarks/bench_summary.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def python_summary(query):
+    """The pre-aggregate implementation, kept here as the baseline."""
+    summary = {k: 0 for k in ('total_trades', 'running_trades', 'loss_trades', 'loss_negative_roi_stoploss',
+                              'loss_negative_roi_candle_close', 'win_trades', 'win_before_r2', 'win_between_r2_r3',
+                              'win_between_r3_r4', 'win_between_r4_r5', 'win_after_r5', 'breakeven_trades')}
+    summary.update(profit_total=0.0, loss_total=0.0, net_result=0.0)
+    for t in query.all():
+        summary['total_trades'] += 1
+        roi = t.roi_percent or 0.0
+        pnl = t.pnl or 0.0
+        reason = (t.close_reason or '').lower()
+        if t.exit_time is None:
+            summary['running_trades'] += 1
+            continue
+        if roi > 0:
+            summary['win_trades'] += 1
+            if roi < 5: summary['win_before_r2'] += 1
+            elif roi < 15: summary['win_between_r2_r3'] += 1
+            elif roi < 20: summary['win_between_r3_r4'] += 1
+            elif roi < 25: summary['win_between_r4_r5'] += 1
+            else: summary['win_after_r5'] += 1
+            summary['profit_total'] += pnl if pnl > 0 else abs(roi) * (t.margin_used or 0)/100.0
+        elif roi < 0:
+            summary['loss_trades'] += 1
+            if 'stop' in reason: summary['loss_negative_roi_stoploss'] += 1
+            else: summary['loss_negative_roi_candle_close'] += 1
+            summary['loss_total'] += abs(pnl) if pnl < 0 else abs(roi) * (t.margin_used or 0)/100.0
+        else:
+            summary['breakeven_trades'] += 1
+    summary['net_result'] = summary['profit_total'] - summary['loss_total']
+    return summary
+
+def seed(db, Trade, rows, bots):
+    rnd = random.Random(42)
+    start = datetime(2024, 1, 1)
+    reasons = ['stoploss_hit', 'candle_close', 'tp_R5', None]
+    batch = []
+    for i in range(rows):
+        entry = start + timedelta(minutes=i)
+        roi = round(rnd.uniform(-40, 40), 2) if rnd.random() > 0.05 else 0.0
+        margin = 10.0
+        batch.append({
+            'bot_id': rnd.randint(1, bots), 'symbol': f'SYM{rnd.randint(0, 49)}USDT',
+            'entry_price': 100.0, 'exit_price': 100.0, 'entry_time': entry,
+            'exit_time': None if rnd.random() < 0.01 else entry + timedelta(minutes=1),
+            'margin_used': margin, 'pnl': round(roi * margin / 100, 4) if rnd.random() > 0.1 else None,
+            'roi_percent': roi, 'close_reason': rnd.choice(reasons), 'side': rnd.choice(['LONG', 'SHORT']),
+        })
+        if len(batch) == 50000:
+            db.session.execute(Trade.__table__.insert(), batch); db.session.commit(); batch = []
+    if batch:
+        db.session.execute(Trade.__table__.insert(), batch); db.session.commit()
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - t0) * 1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=1000000)
+    ap.add_argument('--bots', type=int, default=50)
+    args = ap.parse_args()
+
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    from app import create_app, db
+    from app.models import Trade
+    from app.bots.routes import _build_summary
+
+    app = create_app()
+    with app.app_context():
+        for index in Trade.__table__.indexes:
+            index.drop(db.engine)
+        t0 = time.perf_counter()
+        seed(db, Trade, args.rows, args.bots)
+        print(f"seeded {args.rows} trades in {time.perf_counter() - t0:.1f}s")
+
+        def run(label):
+            for scope, q in (('all bots', Trade.query), ('one bot', Trade.query.filter(Trade.bot_id == 7))):
+                py, py_ms = timed(python_summary, q)
+                db.session.expunge_all()
+                sql, sql_ms = timed(_build_summary, q)
+                same = py.keys() == sql.keys() and all(
+                    abs(py[k] - sql[k]) < 1e-6 * max(1.0, abs(py[k])) for k in py)
+                print(f"{label:<11} {scope:<9} python {py_ms:>9.1f} ms   sql {sql_ms:>8.1f} ms   same={same}")
+
+        run('no indexes')
+        t0 = time.perf_counter()
+        from app.migrations import run_migrations
+        run_migrations(db.engine)
+        print(f"migration (create indexes) took {time.perf_counter() - t0:.1f}s")
+        run('indexed')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Trade persistence benchmark: rows per second and producer latency.
+
+``--threads`` producers each open and close ``--rows`` trades (one insert and
+one update per trade) while ``--readers`` threads keep querying the Trade table,
+like request handlers and the broadcaster do. Three configurations:
+
+* ``direct``: every producer commits each change itself, default journal (the old way)
+* ``direct+wal``: the same with WAL, ``synchronous=NORMAL`` and the busy timeout
+* ``writer``: producers enqueue to ``trade_writer``, which commits in batches (WAL on)
+
+Each configuration runs in its own process on a fresh SQLite file, since the
+settings are read at import time.
+
+    python benchmarks/bench_trade_writer.py --threads 8 --rows 500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+CONFIGS = (('direct', '0'), ('direct+wal', '1'), ('writer', '1'))
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] * 1000 if values else 0.0
+
+def child(mode, threads, rows, readers):
+    from app import create_app, db
+    from app.models import Account, Bot, Trade
+    from app.trade_writer import trade_writer
+
+    app = create_app()
+    with app.app_context():
+        acc = Account(name='bench', api_key='k', api_secret='s', is_testnet=True)
+        db.session.add(acc); db.session.commit()
+        bot = Bot(name='bench', account_id=acc.id, timeframe='1m', symbols='[]', trade_mode='follow',
+                  leverage=1, margin_mode='normal', margin_usd=1, run_mode='ongoing')
+        db.session.add(bot); db.session.commit()
+        bot_id = bot.id
+
+    latencies = [[] for _ in range(threads)]
+    errors = []
+    stop = threading.Event()
+    reads = []
+
+    def produce(n):
+        lat = latencies[n]
+        with app.app_context():
+            for i in range(rows):
+                fields = dict(bot_id=bot_id, symbol=f'S{n}USDT', side='LONG', entry_price=100.0,
+                              entry_time=datetime.utcnow(), margin_used=10.0, quantity=0.1, fees=0.004)
+                closed = dict(exit_price=101.0, exit_time=datetime.utcnow(), pnl=0.092, roi_percent=0.92,
+                              fees=0.008, close_reason='candle_close')
+                try:
+                    t0 = time.perf_counter()
+                    if mode == 'writer':
+                        ref = trade_writer.insert(**fields)
+                        lat.append(time.perf_counter() - t0)
+                        t0 = time.perf_counter()
+                        trade_writer.update(ref, **closed)
+                    else:
+                        trade = Trade(**fields)
+                        db.session.add(trade); db.session.commit()
+                        lat.append(time.perf_counter() - t0)
+                        t0 = time.perf_counter()
+                        for k, v in closed.items():
+                            setattr(trade, k, v)
+                        db.session.commit()
+                    lat.append(time.perf_counter() - t0)
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(str(e)[:80])
+
+    def read():
+        with app.app_context():
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    Trade.query.filter(Trade.exit_time.is_(None)).count()
+                    reads.append(time.perf_counter() - t0)
+                except Exception as e:
+                    errors.append(str(e)[:80])
+                db.session.remove()
+                time.sleep(0.01)
+
+    reader_threads = [threading.Thread(target=read, daemon=True) for _ in range(readers)]
+    for t in reader_threads:
+        t.start()
+    producers = [threading.Thread(target=produce, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for t in producers:
+        t.start()
+    for t in producers:
+        t.join()
+    enqueued = time.perf_counter() - started
+    trade_writer.flush()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for t in reader_threads:
+        t.join()
+
+    with app.app_context():
+        stored = Trade.query.filter(Trade.exit_time.isnot(None)).count()
+    all_lat = [x for lat in latencies for x in lat]
+    return {'mode': mode, 'threads': threads, 'trades': threads * rows, 'stored_closed': stored,
+            'writes_per_s': round(2 * threads * rows / elapsed, 1), 'elapsed_s': round(elapsed, 2),
+            'producers_done_s': round(enqueued, 2),
+            'write_call_ms': {'p50': round(pct(all_lat, 50), 3), 'p99': round(pct(all_lat, 99), 3),
+                              'max': round(pct(all_lat, 100), 3)},
+            'read_ms': {'n': len(reads), 'p50': round(pct(reads, 50), 3), 'p99': round(pct(reads, 99), 3)},
+            'errors': len(errors), 'first_error': errors[0] if errors else None}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--threads', type=int, default=8)
+    ap.add_argument('--rows', type=int, default=500, help='trades opened and closed per thread')
+    ap.add_argument('--readers', type=int, default=2)
+    ap.add_argument('--child', choices=[c for c, _ in CONFIGS])
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child, args.threads, args.rows, args.readers)))
+        return
+
+    for mode, wal in CONFIGS:
+        env = dict(os.environ, SQLITE_WAL=wal,
+                   DATABASE_URL='sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+        out = subprocess.run([sys.executable, __file__, '--child', mode, '--threads', str(args.threads),
+                              '--rows', str(args.rows), '--readers', str(args.readers)],
+                             env=env, capture_output=True, text=True)
+        lines = [line for line in out.stdout.splitlines() if line.startswith('{')]
+        if out.returncode or not lines:
+            print(f"{mode}: failed\n{out.stderr[-2000:]}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"{mode:<11} {r['writes_per_s']:>9.1f} writes/s  elapsed {r['elapsed_s']:>6.2f}s  "
+              f"write call p50 {r['write_call_ms']['p50']:>8.3f} ms p99 {r['write_call_ms']['p99']:>8.3f} ms  "
+              f"read p50 {r['read_ms']['p50']:>7.3f} ms p99 {r['read_ms']['p99']:>7.3f} ms  "
+              f"closed {r['stored_closed']}/{r['trades']}  errors {r['errors']}")
+        if r['first_error']:
+            print(f"            first error: {r['first_error']}")
+
+if __name__ == '__main__':
+    main()